@@ -0,0 +1,64 @@
+# alembic/env.py
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.database import Base, DATABASE_URL
+# Impor semua model agar tabelnya terdaftar di Base.metadata
+from app.roles import models as roles_models  # noqa: F401
+from app.users import models as users_models  # noqa: F401
+from app.dataizin import models as dataizin_models  # noqa: F401
+from app.datatelat import models as datatelat_models  # noqa: F401
+from app.shift import models as shift_models  # noqa: F401
+from app.core import archive as archive_tables  # noqa: F401
+from app.core import outbox as outbox_tables  # noqa: F401
+
+config = context.config
+
+# Saat dipanggil dari bootstrap aplikasi, logging sudah dikonfigurasi oleh aplikasi
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Bootstrap aplikasi meneruskan koneksinya sendiri (yang sudah memegang advisory lock)
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,133 @@
+"""baseline: tabel yang sebelumnya dibuat oleh create_all
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "roles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nama", sa.String(), nullable=False),
+        sa.Column("deskripsi", sa.String(), nullable=True),
+        sa.Column("createOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("modifiedOn", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_roles_id", "roles", ["id"], unique=False)
+    op.create_index("ix_roles_nama", "roles", ["nama"], unique=True)
+
+    op.create_table(
+        "users",
+        sa.Column("uid", sa.String(), nullable=False),
+        sa.Column("fullname", sa.String(), nullable=False),
+        sa.Column("nickname", sa.String(), nullable=True),
+        sa.Column("gender", sa.String(), nullable=True),
+        sa.Column("jabatan", sa.String(), nullable=True),
+        sa.Column("imageUrl", sa.String(), nullable=True),
+        sa.Column("joinDate", sa.Date(), nullable=False),
+        sa.Column("grupDate", sa.Date(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("role_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("createOn", sa.Date(), server_default=sa.text("CURRENT_DATE"), nullable=True),
+        sa.Column("modifiedOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("fcm_token", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["role_id"], ["roles.id"]),
+        sa.PrimaryKeyConstraint("uid"),
+    )
+    op.create_index("ix_users_uid", "users", ["uid"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_fcm_token", "users", ["fcm_token"], unique=True)
+
+    op.create_table(
+        "dataIzin",
+        sa.Column("no", sa.Integer(), nullable=False),
+        sa.Column("user_uid", sa.String(), nullable=False),
+        sa.Column("tanggal", sa.Date(), nullable=True),
+        sa.Column("jamKeluar", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("ipKeluar", sa.String(), nullable=True),
+        sa.Column("jamKembali", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("ipKembali", sa.String(), nullable=True),
+        sa.Column("durasi", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("createOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("modifiedOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_uid"], ["users.uid"]),
+        sa.PrimaryKeyConstraint("no"),
+    )
+    op.create_index("ix_dataIzin_no", "dataIzin", ["no"], unique=False)
+
+    op.create_table(
+        "dataTelat",
+        sa.Column("no", sa.Integer(), nullable=False),
+        sa.Column("izin_no", sa.Integer(), nullable=False),
+        sa.Column("user_uid", sa.String(), nullable=False),
+        sa.Column("sanksi", sa.String(), nullable=True),
+        sa.Column("denda", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("keterangan", sa.String(), nullable=True),
+        sa.Column("jam", sa.String(), nullable=True),
+        sa.Column("by", sa.String(), nullable=True),
+        sa.Column("createOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("modifiedOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["by"], ["users.uid"]),
+        sa.ForeignKeyConstraint(["izin_no"], ["dataIzin.no"]),
+        sa.ForeignKeyConstraint(["user_uid"], ["users.uid"]),
+        sa.PrimaryKeyConstraint("no"),
+        sa.UniqueConstraint("izin_no"),
+    )
+    op.create_index("ix_dataTelat_no", "dataTelat", ["no"], unique=False)
+
+    op.create_table(
+        "dataShift",
+        sa.Column("no", sa.Integer(), nullable=False),
+        sa.Column("user_uid", sa.String(), nullable=False),
+        sa.Column("tanggalMulai", sa.Date(), nullable=False),
+        sa.Column("tanggalAkhir", sa.Date(), nullable=False),
+        sa.Column("jamMasuk", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("jamPulang", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("jamMasukDoubleShift", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("jamPulangDoubleShift", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("jadwal", sa.String(), nullable=True),
+        sa.Column("keterangan", sa.String(), nullable=True),
+        sa.Column("createdBy_uid", sa.String(), nullable=False),
+        sa.Column("createOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("modifiedOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["createdBy_uid"], ["users.uid"]),
+        sa.ForeignKeyConstraint(["user_uid"], ["users.uid"]),
+        sa.PrimaryKeyConstraint("no"),
+    )
+    op.create_index("ix_dataShift_no", "dataShift", ["no"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_dataShift_no", table_name="dataShift")
+    op.drop_table("dataShift")
+    op.drop_index("ix_dataTelat_no", table_name="dataTelat")
+    op.drop_table("dataTelat")
+    op.drop_index("ix_dataIzin_no", table_name="dataIzin")
+    op.drop_table("dataIzin")
+    op.drop_index("ix_users_fcm_token", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_uid", table_name="users")
+    op.drop_table("users")
+    op.drop_index("ix_roles_nama", table_name="roles")
+    op.drop_index("ix_roles_id", table_name="roles")
+    op.drop_table("roles")
@@ -0,0 +1,44 @@
+"""partial unique index: satu izin Pending per user
+
+Revision ID: 0002_izin_pending_unique
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_izin_pending_unique"
+down_revision: Union[str, Sequence[str], None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplikat lama (hasil dua tap bersamaan) harus diakhiri terlebih dahulu agar index dapat dibuat
+    duplicates = op.get_bind().execute(sa.text(
+        'SELECT user_uid FROM "dataIzin" WHERE status = \'Pending\' GROUP BY user_uid HAVING COUNT(*) > 1'
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"Tidak dapat membuat uq_dataIzin_user_pending: user berikut memiliki lebih dari satu izin Pending: {duplicates}"
+        )
+
+    op.create_index(
+        "uq_dataIzin_user_pending",
+        "dataIzin",
+        ["user_uid"],
+        unique=True,
+        postgresql_where=sa.text("status = 'Pending'"),
+        sqlite_where=sa.text("status = 'Pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_dataIzin_user_pending", table_name="dataIzin")
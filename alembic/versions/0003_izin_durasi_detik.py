@@ -0,0 +1,114 @@
+"""durasi izin sebagai integer detik (durasi_detik) menggantikan teks durasi
+
+Revision ID: 0003_izin_durasi_detik
+Revises: 0002_izin_pending_unique
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+import re
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_izin_durasi_detik"
+down_revision: Union[str, Sequence[str], None] = "0002_izin_pending_unique"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ARCHIVE_TABLE = re.compile(r"^dataIzin_\d{4}$")
+
+# Salinan format teks durasi saat revisi ini dibuat; migrasi tidak bergantung pada kode aplikasi
+_DURASI_PART = re.compile(r"(\d+)\s*(Jam|Menit|Detik)", re.IGNORECASE)
+_DURASI_UNIT_SECONDS = {"jam": 3600, "menit": 60, "detik": 1}
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _duration_seconds(jam_keluar: datetime, jam_kembali: datetime) -> int:
+    """Selisih jamKembali - jamKeluar dalam detik; datetime naive dianggap UTC."""
+    return int((_utc(jam_kembali) - _utc(jam_keluar)).total_seconds())
+
+
+def _parse_durasi(text: Optional[str]) -> Optional[int]:
+    """Teks durasi lama (mis. '1 Jam 3 Menit') menjadi detik."""
+    if not text:
+        return None
+    parts = _DURASI_PART.findall(text)
+    if not parts:
+        return None
+    return sum(int(value) * _DURASI_UNIT_SECONDS[unit.lower()] for value, unit in parts)
+
+
+def _format_durasi(total_seconds: int) -> str:
+    """Detik menjadi teks durasi lama, mis. 3780 -> '1 Jam 3 Menit'."""
+    hours, rest = divmod(int(total_seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    parts = [f"{value} {unit}" for value, unit in ((hours, "Jam"), (minutes, "Menit"), (seconds, "Detik")) if value > 0]
+    return " ".join(parts) if parts else "0 Detik"
+
+
+def _izin_tables(bind) -> list:
+    """Tabel live beserta tabel arsip per tahun yang menyalin kolom dataIzin."""
+    inspector = sa.inspect(bind)
+    return ["dataIzin"] + sorted(name for name in inspector.get_table_names() if _ARCHIVE_TABLE.match(name))
+
+
+def _backfill(bind, table_name: str) -> None:
+    table = sa.table(
+        table_name,
+        sa.column("no", sa.Integer),
+        sa.column("jamKeluar", sa.DateTime(timezone=True)),
+        sa.column("jamKembali", sa.DateTime(timezone=True)),
+        sa.column("durasi", sa.String),
+        sa.column("durasi_detik", sa.Integer),
+    )
+    if bind.dialect.name == "postgresql":
+        # Satu UPDATE set-based untuk semua baris yang memiliki jamKeluar dan jamKembali
+        bind.execute(
+            table.update()
+            .where(table.c.jamKeluar.isnot(None), table.c.jamKembali.isnot(None))
+            .values(durasi_detik=sa.cast(sa.extract("epoch", table.c.jamKembali - table.c.jamKeluar), sa.Integer))
+        )
+
+    # Sisa baris (atau semua baris di non-PostgreSQL) dihitung di Python
+    rows = bind.execute(
+        sa.select(table.c.no, table.c.jamKeluar, table.c.jamKembali, table.c.durasi)
+        .where(table.c.durasi_detik.is_(None))
+    ).all()
+    for no, jam_keluar, jam_kembali, durasi in rows:
+        if jam_keluar and jam_kembali:
+            seconds = _duration_seconds(jam_keluar, jam_kembali)
+        else:
+            seconds = _parse_durasi(durasi)
+        if seconds is not None:
+            bind.execute(table.update().where(table.c.no == no).values(durasi_detik=seconds))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table_name in _izin_tables(bind):
+        columns = {column["name"] for column in sa.inspect(bind).get_columns(table_name)}
+        if "durasi_detik" not in columns:
+            op.add_column(table_name, sa.Column("durasi_detik", sa.Integer(), nullable=True))
+        if "durasi" in columns:
+            _backfill(bind, table_name)
+            op.drop_column(table_name, "durasi")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table_name in _izin_tables(bind):
+        op.add_column(table_name, sa.Column("durasi", sa.String(), nullable=True))
+        table = sa.table(table_name, sa.column("no", sa.Integer), sa.column("durasi", sa.String), sa.column("durasi_detik", sa.Integer))
+        rows = bind.execute(sa.select(table.c.no, table.c.durasi_detik).where(table.c.durasi_detik.isnot(None))).all()
+        for no, seconds in rows:
+            bind.execute(table.update().where(table.c.no == no).values(durasi=_format_durasi(seconds)))
+        op.drop_column(table_name, "durasi_detik")
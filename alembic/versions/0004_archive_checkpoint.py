@@ -0,0 +1,35 @@
+"""tabel watermark untuk proses arsip per batch
+
+Revision ID: 0004_archive_checkpoint
+Revises: 0003_izin_durasi_detik
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_archive_checkpoint"
+down_revision: Union[str, Sequence[str], None] = "0003_izin_durasi_detik"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "archive_checkpoint",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("last_no", sa.Integer(), nullable=False),
+        sa.Column("rows_moved", sa.Integer(), nullable=False),
+        sa.Column("modifiedOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("archive_checkpoint")
@@ -0,0 +1,69 @@
+"""dataTelat.tanggal: tanggal izin terkait sebagai kunci tahun
+
+Revision ID: 0005_datatelat_tanggal
+Revises: 0004_archive_checkpoint
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+import re
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_datatelat_tanggal"
+down_revision: Union[str, Sequence[str], None] = "0004_archive_checkpoint"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ARCHIVE_TABLE = re.compile(r"^dataTelat_(\d{4})$")
+
+
+def _backfill(bind, table_name: str, izin_table_names: list, fallback_year: int = None) -> None:
+    telat = sa.table(table_name, sa.column("izin_no", sa.Integer), sa.column("tanggal", sa.Date))
+    for izin_table_name in izin_table_names:
+        izin = sa.table(izin_table_name, sa.column("no", sa.Integer), sa.column("tanggal", sa.Date))
+        bind.execute(
+            telat.update()
+            .where(telat.c.tanggal.is_(None))
+            .values(
+                tanggal=sa.select(izin.c.tanggal).where(izin.c.no == telat.c.izin_no).scalar_subquery()
+            )
+        )
+    if fallback_year is not None:
+        # Izin arsip yang tidak ditemukan lagi: cukup tahunnya yang benar
+        bind.execute(telat.update().where(telat.c.tanggal.is_(None)).values(tanggal=date(fallback_year, 1, 1)))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    table_names = sa.inspect(bind).get_table_names()
+
+    op.add_column("dataTelat", sa.Column("tanggal", sa.Date(), nullable=True))
+    op.create_index("ix_dataTelat_tanggal", "dataTelat", ["tanggal"], unique=False)
+    izin_archives = sorted(name for name in table_names if re.match(r"^dataIzin_\d{4}$", name))
+    _backfill(bind, "dataTelat", ["dataIzin"] + izin_archives)
+
+    # Tabel arsip per tahun harus memiliki kolom yang sama dengan tabel live
+    for table_name in table_names:
+        match = _ARCHIVE_TABLE.match(table_name)
+        if not match:
+            continue
+        year = int(match.group(1))
+        op.add_column(table_name, sa.Column("tanggal", sa.Date(), nullable=True))
+        candidates = [name for name in (f"dataIzin_{year}", "dataIzin") if name in table_names]
+        _backfill(bind, table_name, candidates, fallback_year=year)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table_name in sa.inspect(bind).get_table_names():
+        if _ARCHIVE_TABLE.match(table_name):
+            op.drop_column(table_name, "tanggal")
+    op.drop_index("ix_dataTelat_tanggal", table_name="dataTelat")
+    op.drop_column("dataTelat", "tanggal")
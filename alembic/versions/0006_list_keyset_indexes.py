@@ -0,0 +1,46 @@
+"""index komposit untuk urutan daftar dan keyset pagination
+
+Revision ID: 0006_list_keyset_indexes
+Revises: 0005_datatelat_tanggal
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_list_keyset_indexes"
+down_revision: Union[str, Sequence[str], None] = "0005_datatelat_tanggal"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_dataIzin_user_tanggal_createOn_no",
+        "dataIzin",
+        ["user_uid", sa.text('tanggal DESC'), sa.text('"createOn" DESC'), sa.text('no DESC')],
+    )
+    op.create_index(
+        "ix_dataIzin_tanggal_createOn_no",
+        "dataIzin",
+        [sa.text('tanggal DESC'), sa.text('"createOn" DESC'), sa.text('no DESC')],
+    )
+    op.create_index(
+        "ix_dataTelat_tanggal_createOn_no",
+        "dataTelat",
+        [sa.text('tanggal DESC'), sa.text('"createOn" DESC'), sa.text('no DESC')],
+    )
+    op.create_index("ix_dataShift_user_uid_no", "dataShift", ["user_uid", "no"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_dataShift_user_uid_no", table_name="dataShift")
+    op.drop_index("ix_dataTelat_tanggal_createOn_no", table_name="dataTelat")
+    op.drop_index("ix_dataIzin_tanggal_createOn_no", table_name="dataIzin")
+    op.drop_index("ix_dataIzin_user_tanggal_createOn_no", table_name="dataIzin")
@@ -0,0 +1,37 @@
+"""expression index tanggal lokal GMT+7 dari dataIzin.createOn
+
+Revision ID: 0007_izin_local_date_index
+Revises: 0006_list_keyset_indexes
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_izin_local_date_index"
+down_revision: Union[str, Sequence[str], None] = "0006_list_keyset_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _local_date_expression() -> sa.TextClause:
+    # Harus identik dengan app.core.timezone.local_date agar planner memakai index ini
+    if op.get_bind().dialect.name == "postgresql":
+        return sa.text("((\"createOn\" AT TIME ZONE 'Asia/Jakarta')::date)")
+    return sa.text("date(\"createOn\", '+7 hours')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_dataIzin_user_local_date", "dataIzin", ["user_uid", _local_date_expression()])
+    op.create_index("ix_dataIzin_local_date", "dataIzin", [_local_date_expression()])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_dataIzin_local_date", table_name="dataIzin")
+    op.drop_index("ix_dataIzin_user_local_date", table_name="dataIzin")
@@ -0,0 +1,166 @@
+"""denda sebagai integer (denda_nominal) dan tabel rekap fine_ledger per user per bulan
+
+Revision ID: 0008_fine_ledger
+Revises: 0007_izin_local_date_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+import re
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_fine_ledger"
+down_revision: Union[str, Sequence[str], None] = "0007_izin_local_date_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ARCHIVE_TABLE = re.compile(r"^dataTelat_\d{4}$")
+
+
+def _attached_partitions(bind, table_name: str) -> set:
+    """Nama partisi yang ter-attach ke `table_name` (kosong bila tabel tidak dipartisi atau bukan PostgreSQL)."""
+    if bind.dialect.name != "postgresql":
+        return set()
+    partitioned = bind.execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(quote_ident(:name)))"),
+        {"name": table_name},
+    ).scalar()
+    if not partitioned:
+        return set()
+    return set(bind.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(quote_ident(:name))"
+        ),
+        {"name": table_name},
+    ).scalars())
+
+
+def _telat_tables(bind) -> list:
+    """
+    Tabel live beserta tabel arsip per tahun. Partisi yang masih ter-attach dilewati:
+    kolomnya mengikuti tabel induk dan barisnya sudah terbaca lewat tabel induk.
+    """
+    attached = _attached_partitions(bind, "dataTelat")
+    archives = sorted(
+        name for name in sa.inspect(bind).get_table_names() if _ARCHIVE_TABLE.match(name) and name not in attached
+    )
+    return ["dataTelat"] + archives
+
+
+def _backfill_denda(bind, table_name: str) -> None:
+    table = sa.table(
+        table_name,
+        sa.column("no", sa.Integer),
+        sa.column("denda", sa.String),
+        sa.column("denda_nominal", sa.Integer),
+    )
+    if bind.dialect.name == "postgresql":
+        # Satu UPDATE set-based untuk semua teks denda yang berupa angka
+        bind.execute(
+            table.update()
+            .where(table.c.denda.op("~")(r"^\s*[0-9]+\s*$"))
+            .values(denda_nominal=sa.cast(sa.func.trim(table.c.denda), sa.Integer))
+        )
+
+    # Sisa baris (atau semua baris di non-PostgreSQL) diparse di Python
+    rows = bind.execute(
+        sa.select(table.c.no, table.c.denda).where(table.c.denda_nominal.is_(None), table.c.denda.isnot(None))
+    ).all()
+    for no, denda in rows:
+        digits = re.sub(r"[^0-9]", "", denda)
+        if digits:
+            bind.execute(table.update().where(table.c.no == no).values(denda_nominal=int(digits)))
+
+
+def _backfill_ledger(bind, table_names: list) -> None:
+    """Rekap awal dari dataTelat dan semua arsip, dikelompokkan per user dan bulan di SQL."""
+    sources = []
+    for table_name in table_names:
+        table = sa.table(
+            table_name,
+            sa.column("user_uid", sa.String),
+            sa.column("tanggal", sa.Date),
+            sa.column("denda_nominal", sa.Integer),
+        )
+        sources.append(
+            sa.select(table.c.user_uid, table.c.tanggal, table.c.denda_nominal).where(table.c.tanggal.isnot(None))
+        )
+    rows = sa.union_all(*sources).subquery()
+    tahun = sa.extract("year", rows.c.tanggal)
+    bulan = sa.extract("month", rows.c.tanggal)
+    totals = bind.execute(
+        sa.select(
+            rows.c.user_uid,
+            tahun,
+            bulan,
+            sa.func.count(),
+            sa.func.coalesce(sa.func.sum(rows.c.denda_nominal), 0),
+        ).group_by(rows.c.user_uid, tahun, bulan)
+    ).all()
+
+    ledger = sa.table(
+        "fine_ledger",
+        sa.column("user_uid", sa.String),
+        sa.column("periode", sa.Date),
+        sa.column("jumlah_telat", sa.Integer),
+        sa.column("total_denda", sa.Integer),
+    )
+    if totals:
+        op.bulk_insert(ledger, [
+            {
+                "user_uid": user_uid,
+                "periode": date(int(tahun), int(bulan), 1),
+                "jumlah_telat": int(jumlah),
+                "total_denda": int(total),
+            }
+            for user_uid, tahun, bulan, jumlah, total in totals
+        ])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    table_names = _telat_tables(bind)
+    for table_name in table_names:
+        columns = {column["name"] for column in sa.inspect(bind).get_columns(table_name)}
+        if "denda_nominal" not in columns:
+            op.add_column(table_name, sa.Column("denda_nominal", sa.Integer(), nullable=True))
+        if "denda" in columns:
+            _backfill_denda(bind, table_name)
+            op.drop_column(table_name, "denda")
+
+    op.create_table(
+        "fine_ledger",
+        sa.Column("user_uid", sa.String(), nullable=False),
+        sa.Column("periode", sa.Date(), nullable=False),
+        sa.Column("jumlah_telat", sa.Integer(), nullable=False),
+        sa.Column("total_denda", sa.Integer(), nullable=False),
+        sa.Column("modifiedOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_uid"], ["users.uid"]),
+        sa.PrimaryKeyConstraint("user_uid", "periode", name="pk_fine_ledger"),
+    )
+    op.create_index("ix_fine_ledger_periode", "fine_ledger", ["periode"], unique=False)
+    _backfill_ledger(bind, table_names)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    op.drop_index("ix_fine_ledger_periode", table_name="fine_ledger")
+    op.drop_table("fine_ledger")
+
+    for table_name in _telat_tables(bind):
+        op.add_column(table_name, sa.Column("denda", sa.String(), nullable=True))
+        table = sa.table(table_name, sa.column("denda", sa.String), sa.column("denda_nominal", sa.Integer))
+        bind.execute(
+            table.update()
+            .where(table.c.denda_nominal.isnot(None))
+            .values(denda=sa.cast(table.c.denda_nominal, sa.String))
+        )
+        op.drop_column(table_name, "denda_nominal")
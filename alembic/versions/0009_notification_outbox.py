@@ -0,0 +1,47 @@
+"""tabel notification_outbox untuk notifikasi yang dikirim dispatcher
+
+Revision ID: 0009_notification_outbox
+Revises: 0008_fine_ledger
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_notification_outbox"
+down_revision: Union[str, Sequence[str], None] = "0008_fine_ledger"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("user_uid", sa.String(), nullable=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("body", sa.String(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("createOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("sentOn", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_notification_outbox_status_next_attempt", "notification_outbox", ["status", "next_attempt_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notification_outbox_status_next_attempt", table_name="notification_outbox")
+    op.drop_table("notification_outbox")
@@ -0,0 +1,53 @@
+"""tabel user_devices: banyak token FCM per user
+
+Revision ID: 0010_user_devices
+Revises: 0009_notification_outbox
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_user_devices"
+down_revision: Union[str, Sequence[str], None] = "0009_notification_outbox"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_devices",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_uid", sa.String(), nullable=False),
+        sa.Column("fcm_token", sa.String(), nullable=False),
+        sa.Column("platform", sa.String(), nullable=True),
+        sa.Column("createOn", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("last_seen", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["user_uid"], ["users.uid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("fcm_token"),
+    )
+    op.create_index("ix_user_devices_id", "user_devices", ["id"], unique=False)
+    op.create_index("ix_user_devices_user_uid", "user_devices", ["user_uid"], unique=False)
+
+    # Token tunggal di users.fcm_token menjadi perangkat pertama setiap user
+    users = sa.table("users", sa.column("uid", sa.String), sa.column("fcm_token", sa.String))
+    devices = sa.table("user_devices", sa.column("user_uid", sa.String), sa.column("fcm_token", sa.String))
+    op.execute(
+        devices.insert().from_select(
+            ["user_uid", "fcm_token"],
+            sa.select(users.c.uid, users.c.fcm_token).where(users.c.fcm_token.isnot(None)),
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_user_devices_user_uid", table_name="user_devices")
+    op.drop_index("ix_user_devices_id", table_name="user_devices")
+    op.drop_table("user_devices")
@@ -0,0 +1,29 @@
+"""watermark arsip terikat pada cutoff tanggal
+
+Revision ID: 0011_archive_checkpoint_cutoff
+Revises: 0010_user_devices
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_archive_checkpoint_cutoff"
+down_revision: Union[str, Sequence[str], None] = "0010_user_devices"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Checkpoint lama tanpa cutoff dianggap kedaluwarsa: run berikutnya memindai ulang dari awal
+    op.add_column("archive_checkpoint", sa.Column("cutoff", sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("archive_checkpoint", "cutoff")
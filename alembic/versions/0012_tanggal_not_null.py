@@ -0,0 +1,59 @@
+"""dataIzin.tanggal dan dataTelat.tanggal wajib diisi (kunci urutan keyset dan kunci partisi)
+
+Revision ID: 0012_tanggal_not_null
+Revises: 0011_archive_checkpoint_cutoff
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_tanggal_not_null"
+down_revision: Union[str, Sequence[str], None] = "0011_archive_checkpoint_cutoff"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _local_date(bind, column):
+    """Tanggal lokal GMT+7 dari kolom timestamp (di non-PostgreSQL cukup tanggalnya)."""
+    if bind.dialect.name == "postgresql":
+        return sa.cast(sa.func.timezone("Asia/Jakarta", column), sa.Date)
+    return sa.func.date(column)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    izin = sa.table("dataIzin", sa.column("no", sa.Integer), sa.column("tanggal", sa.Date), sa.column("createOn", sa.DateTime))
+    telat = sa.table(
+        "dataTelat",
+        sa.column("izin_no", sa.Integer),
+        sa.column("tanggal", sa.Date),
+        sa.column("createOn", sa.DateTime),
+    )
+
+    bind.execute(izin.update().where(izin.c.tanggal.is_(None)).values(tanggal=_local_date(bind, izin.c.createOn)))
+    # Data telat mengikuti tanggal izinnya; izin yang sudah tidak ada memakai tanggal pembuatan data telat
+    bind.execute(
+        telat.update()
+        .where(telat.c.tanggal.is_(None))
+        .values(tanggal=sa.select(izin.c.tanggal).where(izin.c.no == telat.c.izin_no).scalar_subquery())
+    )
+    bind.execute(telat.update().where(telat.c.tanggal.is_(None)).values(tanggal=_local_date(bind, telat.c.createOn)))
+
+    with op.batch_alter_table("dataIzin") as batch_op:
+        batch_op.alter_column("tanggal", existing_type=sa.Date(), nullable=False)
+    with op.batch_alter_table("dataTelat") as batch_op:
+        batch_op.alter_column("tanggal", existing_type=sa.Date(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("dataTelat") as batch_op:
+        batch_op.alter_column("tanggal", existing_type=sa.Date(), nullable=True)
+    with op.batch_alter_table("dataIzin") as batch_op:
+        batch_op.alter_column("tanggal", existing_type=sa.Date(), nullable=True)
@@ -0,0 +1,165 @@
+# app/autentikasi/keystore.py
+import json
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import firebase_admin
+import jwt
+import requests
+from cryptography import x509
+from jwt.algorithms import RSAAlgorithm
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+_DEFAULT_MAX_AGE_SECONDS = 3600
+
+
+class SigningKeyStore:
+    """
+    Menyimpan kunci publik penandatangan token Firebase (kid -> public key).
+
+    Kunci dimuat saat startup dan diperbarui oleh job scheduler sebelum kedaluwarsa,
+    sehingga verifikasi token di jalur request tidak pernah menunggu HTTP ke Google.
+    Jika `local_file` diisi, kunci dibaca dari file (format x509 Google atau JWKS)
+    tanpa akses jaringan sama sekali.
+    """
+
+    def __init__(self, certs_url: str, local_file: Optional[str] = None, refresh_margin_seconds: int = 900):
+        self.certs_url = certs_url
+        self.local_file = local_file
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._keys: Dict[str, Any] = {}
+        self._expires_at: float = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._keys)
+
+    def get_key(self, kid: str):
+        return self._keys.get(kid)
+
+    def load(self) -> None:
+        """Memuat kunci dari file lokal atau dari endpoint sertifikat Google."""
+        if self.local_file:
+            keys = self._parse_keys(self._read_local_file())
+            expires_at = float("inf")
+            source = self.local_file
+        else:
+            response = requests.get(self.certs_url, timeout=10)
+            response.raise_for_status()
+            keys = self._parse_keys(response.json())
+            expires_at = time.time() + self._max_age(response.headers.get("Cache-Control", ""))
+            source = self.certs_url
+
+        if not keys:
+            raise ValueError(f"Tidak ada kunci publik yang valid dari {source}.")
+
+        with self._lock:
+            # Ganti seluruh dict sekaligus agar pembaca tidak pernah melihat keadaan setengah jadi
+            self._keys = keys
+            self._expires_at = expires_at
+        logger.info(f"Signing key store dimuat dari {source}: {len(keys)} kunci.")
+
+    def refresh_if_needed(self) -> None:
+        """Dipanggil berkala oleh scheduler; memuat ulang kunci mendekati masa kedaluwarsa."""
+        if self._expires_at - time.time() > self.refresh_margin_seconds:
+            return
+        try:
+            self.load()
+        except Exception as e:
+            # Kunci lama tetap dipakai; Google merotasi kunci jauh sebelum kunci lama tidak berlaku
+            logger.warning(f"Gagal memperbarui signing key store, kunci lama tetap dipakai: {e}")
+
+    def mark_stale(self) -> None:
+        """Meminta refresh pada putaran scheduler berikutnya (mis. saat ditemukan kid yang tidak dikenal)."""
+        self._expires_at = 0.0
+
+    def _read_local_file(self) -> dict:
+        with open(self.local_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _max_age(cache_control: str) -> int:
+        match = _MAX_AGE_PATTERN.search(cache_control)
+        return int(match.group(1)) if match else _DEFAULT_MAX_AGE_SECONDS
+
+    @staticmethod
+    def _parse_keys(payload: dict) -> Dict[str, Any]:
+        keys = {}
+        if "keys" in payload:
+            # Format JWKS: {"keys": [{"kid": ..., "kty": "RSA", "n": ..., "e": ...}]}
+            for jwk in payload["keys"]:
+                keys[jwk["kid"]] = RSAAlgorithm.from_jwk(json.dumps(jwk))
+        else:
+            # Format x509 Google: {"<kid>": "-----BEGIN CERTIFICATE-----..."}
+            for kid, pem in payload.items():
+                certificate = x509.load_pem_x509_certificate(pem.encode("utf-8"))
+                keys[kid] = certificate.public_key()
+        return keys
+
+
+key_store = SigningKeyStore(
+    certs_url=settings.FIREBASE_CERTS_URL,
+    local_file=settings.FIREBASE_CERTS_FILE,
+    refresh_margin_seconds=settings.KEYSTORE_REFRESH_MARGIN_SECONDS,
+)
+
+
+def _get_project_id() -> Optional[str]:
+    if settings.FIREBASE_PROJECT_ID:
+        return settings.FIREBASE_PROJECT_ID
+    if firebase_admin._apps:
+        return firebase_admin.get_app().project_id
+    return None
+
+
+def verify_id_token_locally(token: str, clock_skew_seconds: int = 5) -> Optional[dict]:
+    """
+    Memverifikasi ID token Firebase dengan kunci dari `key_store`.
+
+    Mengembalikan None jika key store belum siap atau `kid` token tidak dikenal,
+    sehingga pemanggil dapat kembali ke `auth.verify_id_token`. Token yang tidak valid
+    menghasilkan exception dari PyJWT.
+    """
+    project_id = _get_project_id()
+    if not key_store.ready or not project_id:
+        return None
+
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") != "RS256":
+        raise jwt.InvalidAlgorithmError(f"Algoritma token tidak didukung: {header.get('alg')}")
+
+    kid = header.get("kid")
+    public_key = key_store.get_key(kid)
+    if public_key is None:
+        logger.info(f"kid '{kid}' tidak ada di signing key store, meminta refresh.")
+        key_store.mark_stale()
+        return None
+
+    decoded_token = jwt.decode(
+        token,
+        key=public_key,
+        algorithms=["RS256"],
+        audience=project_id,
+        issuer=f"https://securetoken.google.com/{project_id}",
+        leeway=clock_skew_seconds,
+        options={"require": ["exp", "iat", "aud", "iss", "sub"]},
+    )
+
+    subject = decoded_token.get("sub")
+    if not isinstance(subject, str) or not subject or len(subject) > 128:
+        raise jwt.InvalidTokenError("Klaim 'sub' pada token tidak valid.")
+    auth_time = decoded_token.get("auth_time")
+    if auth_time is not None and auth_time > time.time() + clock_skew_seconds:
+        raise jwt.InvalidTokenError("Klaim 'auth_time' pada token berada di masa depan.")
+
+    # Samakan dengan payload dari firebase_admin yang menyediakan 'uid'
+    decoded_token["uid"] = subject
+    return decoded_token
@@ -0,0 +1,77 @@
+# app/autentikasi/principal_cache.py
+import threading
+import logging
+from typing import Optional
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.autentikasi.schemas import Principal
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """
+    Cache per proses untuk snapshot `Principal` (user + role) berdasarkan UID.
+
+    Entri diinvalidasi secara eksplisit oleh crud users/roles. Setiap invalidasi menaikkan
+    `generation`, sehingga hasil query yang dimulai sebelum invalidasi tidak disimpan.
+    TTL yang pendek membatasi data basi dari perubahan di worker lain.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_uid: str) -> Optional[Principal]:
+        with self._lock:
+            principal = self._cache.get(user_uid)
+            if principal is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return principal
+
+    def set(self, principal: Principal, generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                logger.debug(f"Principal {principal.uid} tidak disimpan karena cache diinvalidasi selama query.")
+                return
+            self._cache[principal.uid] = principal
+
+    def invalidate(self, user_uid: str) -> None:
+        with self._lock:
+            self.generation += 1
+            self._cache.pop(user_uid, None)
+
+    def invalidate_role(self, role_id: int) -> None:
+        with self._lock:
+            self.generation += 1
+            stale_uids = [uid for uid, principal in self._cache.items() if principal.role_id == role_id]
+            for uid in stale_uids:
+                self._cache.pop(uid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
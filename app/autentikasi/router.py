@@ -1,19 +1,20 @@
 # app/autentikasi/router.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging # Import logging
 
 # Import dari Firebase
 from firebase_admin import auth 
 from app.core.firebase import get_firebase_auth # Ini perlu ada
 
-from app.core.database import get_db
+from app.core.database import get_async_db, run_and_validate
 from app.users import schemas as user_schemas
 from app.users import crud as user_crud
 from app.users import models as user_models 
 from app.roles import crud as role_crud
 from app.autentikasi import security as auth_security
+from app.core.offload import run_blocking
 
 logger = logging.getLogger(__name__) # Inisialisasi logger di sini
 
@@ -27,28 +28,28 @@ def get_firebase_auth_instance():
     return get_firebase_auth()
 
 @router.post("/register_user/", response_model=user_schemas.UserInDB, status_code=status.HTTP_201_CREATED)
-async def register_user_from_firebase_signup(user_data: user_schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user_from_firebase_signup(user_data: user_schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Mendaftarkan pengguna baru ke database lokal setelah pendaftaran Firebase berhasil.
     Asumsi: user_data.uid adalah UID dari Firebase.
     """
     # Periksa apakah pengguna dengan UID ini sudah ada di DB lokal
-    db_user_by_uid = user_crud.get_user(db, user_data.uid)
+    db_user_by_uid = await db.run_sync(user_crud.get_user, user_data.uid)
     if db_user_by_uid:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Pengguna dengan UID ini sudah terdaftar di database lokal.")
 
     # Periksa apakah pengguna dengan email ini sudah terdaftar di DB lokal
-    db_user_by_email = user_crud.get_user_by_email(db, user_data.email)
+    db_user_by_email = await db.run_sync(user_crud.get_user_by_email, user_data.email)
     if db_user_by_email:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Pengguna dengan email ini sudah terdaftar di database lokal.")
 
     # Verifikasi role_id
-    role = role_crud.get_role(db, role_id=user_data.role_id)
+    role = await db.run_sync(role_crud.get_role, role_id=user_data.role_id)
     if not role:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID peran tidak valid diberikan.")
 
     # Buat pengguna baru di database lokal
-    new_user = user_crud.create_user(db=db, user=user_data)
+    new_user = await run_and_validate(db, user_schemas.UserInDB, user_crud.create_user, user=user_data)
     if not new_user:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Gagal mendaftarkan pengguna di database lokal.")
     
@@ -75,7 +76,7 @@ async def verify_auth_status(
 @router.post("/admin/create_user/", response_model=user_schemas.UserInDB, status_code=status.HTTP_201_CREATED) # Mengubah path dan response_model
 async def create_new_user_by_admin(
     user_data: user_schemas.UserCreateByAdmin, # Menggunakan skema dari app.users.schemas
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     firebase_auth = Depends(get_firebase_auth_instance)
     # Anda mungkin ingin menambahkan otorisasi admin di sini
     # current_admin_user: user_models.User = Depends(auth_security.get_current_active_admin_user)
@@ -84,17 +85,18 @@ async def create_new_user_by_admin(
     Membuat pengguna baru di Firebase Authentication dan database backend.
     Endpoint ini ditujukan untuk digunakan oleh admin.
     """
-    db_user_by_email_local = user_crud.get_user_by_email(db, email=user_data.email)
+    db_user_by_email_local = await db.run_sync(user_crud.get_user_by_email, email=user_data.email)
     if db_user_by_email_local:
         raise HTTPException(status_code=400, detail="Email ini sudah terdaftar di database lokal.")
 
-    db_role = role_crud.get_role(db, role_id=user_data.role_id)
+    db_role = await db.run_sync(role_crud.get_role, role_id=user_data.role_id)
     if not db_role:
         raise HTTPException(status_code=400, detail="Invalid role_id provided")
 
     new_uid = None
     try:
-        firebase_user_record = auth.create_user(
+        firebase_user_record = await run_blocking(
+            auth.create_user,
             email=user_data.email,
             password=user_data.password,
             display_name=user_data.fullname,
@@ -127,7 +129,7 @@ async def create_new_user_by_admin(
             status=user_data.status,
             tanggalAkhirCuti=user_data.tanggalAkhirCuti
         )
-        created_user_in_db = user_crud.create_user(db=db, user=user_create_data)
+        created_user_in_db = await run_and_validate(db, user_schemas.UserInDB, user_crud.create_user, user=user_create_data)
         logger.info(f"Pengguna berhasil disimpan ke database lokal: {created_user_in_db.uid}")
         return created_user_in_db
 
@@ -135,7 +137,7 @@ async def create_new_user_by_admin(
         logger.error(f"Gagal menyimpan data pengguna ke database lokal setelah membuat di Firebase: {e}", exc_info=True)
         if new_uid:
             try:
-                auth.delete_user(new_uid)
+                await run_blocking(auth.delete_user, new_uid)
                 logger.warning(f"User {new_uid} dihapus dari Firebase Auth karena gagal disimpan ke DB lokal.")
             except Exception as delete_e:
                 logger.error(f"Gagal menghapus user {new_uid} dari Firebase Auth setelah error DB lokal: {delete_e}")
@@ -2,10 +2,21 @@
 
 # Misalnya, jika Anda ingin mengirim informasi token dari backend untuk tujuan tertentu
 from pydantic import BaseModel
+from app.users.schemas import UserInDB
 
 class Token(BaseModel):
     access_token: str
     token_type: str
 
 class TokenData(BaseModel):
-    username: str | None = None
\ No newline at end of file
+    username: str | None = None
+
+class Principal(UserInDB):
+    """
+    Snapshot immutable dari pengguna yang terautentikasi beserta perannya.
+    Dibuat sekali dari baris `users` + `roles` lalu disimpan di principal cache.
+    """
+
+    class Config:
+        from_attributes = True
+        frozen = True
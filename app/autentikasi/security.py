@@ -9,9 +9,15 @@ import json
 import logging
 
 # --- Tambahan Import ---
-from sqlalchemy.orm import Session # Untuk tipe hint sesi database
-from app.core.database import get_db # Untuk mendapatkan sesi database
+from sqlalchemy.orm import Session, joinedload # Untuk tipe hint sesi database
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db # Untuk mendapatkan sesi database
 from app.users.models import User # Import model User Anda
+from app.autentikasi.token_cache import token_cache
+from app.autentikasi.keystore import verify_id_token_locally
+from app.core.offload import run_blocking
+from app.autentikasi.principal_cache import principal_cache
+from app.autentikasi.schemas import Principal
 # --- Akhir Tambahan Import ---
 
 logger = logging.getLogger(__name__)
@@ -34,6 +40,14 @@ if not firebase_admin._apps:
 
 reusable_oauth2 = HTTPBearer(scheme_name="Authorization")
 
+def _verify_id_token_blocking(token: str) -> dict:
+    # Verifikasi dengan signing key store lokal; fallback ke firebase_admin
+    # hanya jika key store belum siap atau kid token belum dikenal.
+    decoded_token = verify_id_token_locally(token, clock_skew_seconds=5)
+    if decoded_token is None:
+        decoded_token = auth.verify_id_token(token, clock_skew_seconds=5)
+    return decoded_token
+
 async def verify_firebase_token(credentials: HTTPAuthorizationCredentials = Security(reusable_oauth2)):
     logger.debug("Attempting to verify Firebase token...")
 
@@ -44,33 +58,48 @@ async def verify_firebase_token(credentials: HTTPAuthorizationCredentials = Secu
     token = credentials.credentials
     logger.debug(f"Received token (first 10 chars): {token[:10]}...") 
 
+    # Token yang sama sudah diverifikasi sebelumnya dan belum melewati klaim 'exp'
+    cached_token = token_cache.get(token)
+    if cached_token is not None:
+        logger.debug(f"Firebase token served from cache for UID: {cached_token.get('uid')}")
+        return cached_token
+
     try:
-        decoded_token = auth.verify_id_token(token, clock_skew_seconds=5) 
+        decoded_token = await run_blocking(_verify_id_token_blocking, token)
 
         uid = decoded_token.get('uid')
         logger.info(f"Firebase token verified successfully for UID: {uid}")
         logger.debug(f"Decoded token payload: {decoded_token}")
+        token_cache.set(token, decoded_token)
         return decoded_token
     except Exception as e:
         logger.error(f"Firebase token verification failed: {e}", exc_info=True)
         raise HTTPException(status_code=401, detail=f"Invalid or expired token: {e}")
 
+def _load_principal(db: Session, user_uid: str):
+    # Role dimuat bersamaan agar akses current_user.role tidak memicu query kedua
+    user_in_db = db.query(User).options(joinedload(User.role)).filter(User.uid == user_uid).first()
+    if not user_in_db:
+        return None
+    return Principal.model_validate(user_in_db)
+
 # ---
 ## Fungsi get_current_active_user yang diperbarui
 
 async def get_current_active_user(
     token_data: dict = Security(verify_firebase_token),
-    db: Session = Depends(get_db) # Tambahkan dependensi sesi database
-) -> User: # Menentukan tipe kembalian adalah objek User
+    db: AsyncSession = Depends(get_async_db) # Tambahkan dependensi sesi database
+) -> Principal:
     """
-    Mengambil objek pengguna aktif dari database berdasarkan token Firebase yang diverifikasi.
+    Mengambil pengguna aktif berdasarkan token Firebase yang diverifikasi.
+    Snapshot user + role disajikan dari principal cache bila tersedia.
     
     Args:
         token_data: Dict yang berisi payload token Firebase yang sudah diverifikasi.
-        db: Sesi database SQLAlchemy, disuntikkan oleh FastAPI Depends.
+        db: Sesi database async SQLAlchemy, disuntikkan oleh FastAPI Depends.
 
     Returns:
-        Objek User lengkap dari database.
+        Snapshot Principal (user beserta role) yang immutable.
 
     Raises:
         HTTPException: Jika UID tidak ditemukan di token, atau pengguna tidak ditemukan di database.
@@ -80,15 +109,19 @@ async def get_current_active_user(
         logger.error("UID not found in Firebase token payload.")
         raise HTTPException(status_code=400, detail="UID not found in token.")
     
-    # Mengambil objek User lengkap dari database
-    user_in_db = db.query(User).filter(User.uid == user_uid).first()
+    principal = principal_cache.get(user_uid)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation
+    principal = await db.run_sync(_load_principal, user_uid)
     
-    if not user_in_db:
+    if not principal:
         logger.warning(f"User with UID {user_uid} not found in database after Firebase verification.")
         raise HTTPException(status_code=404, detail="User not found in local database.")
     
-    # Mengembalikan objek User lengkap
-    return user_in_db
+    principal_cache.set(principal, generation)
+    return principal
 
 # Fungsi ini bisa Anda tambahkan jika ingin memverifikasi admin secara eksplisit
 async def get_admin_user_token(current_user_token: dict = Security(verify_firebase_token)):
@@ -0,0 +1,69 @@
+# app/autentikasi/token_cache.py
+import hashlib
+import threading
+import time
+import logging
+from typing import Optional
+
+from cachetools import TLRUCache
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_token(token: str) -> str:
+    """Token mentah tidak pernah disimpan; kunci cache adalah hash SHA-256-nya."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _expire_at_exp_claim(_key: str, decoded_token: dict, now: float) -> float:
+    # Setiap entri kedaluwarsa tepat pada klaim 'exp' milik token itu sendiri
+    return float(decoded_token.get("exp", now))
+
+
+class VerifiedTokenCache:
+    """
+    Cache LRU terbatas untuk payload token Firebase yang sudah lolos verifikasi tanda tangan.
+    """
+
+    def __init__(self, maxsize: int):
+        self._cache = TLRUCache(maxsize=maxsize, ttu=_expire_at_exp_claim, timer=time.time)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        key = _hash_token(token)
+        with self._lock:
+            decoded_token = self._cache.get(key)
+            if decoded_token is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Kembalikan salinan agar pemanggil tidak mengubah entri di cache
+        return dict(decoded_token)
+
+    def set(self, token: str, decoded_token: dict) -> None:
+        if "exp" not in decoded_token:
+            logger.debug("Token tanpa klaim 'exp' tidak disimpan ke cache.")
+            return
+        with self._lock:
+            # TLRUCache otomatis menolak entri yang 'exp'-nya sudah lewat
+            self._cache[_hash_token(token)] = dict(decoded_token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_cache = VerifiedTokenCache(maxsize=settings.TOKEN_CACHE_MAXSIZE)
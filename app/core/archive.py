@@ -0,0 +1,162 @@
+# app/core/archive.py
+import logging
+import re
+import threading
+import time
+from datetime import date
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import Column, Date, DateTime, Integer, MetaData, String, Table, and_, inspect, select, update, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+logger = logging.getLogger(__name__)
+
+# Watermark per proses arsip: `no` tertinggi yang sudah diperiksa, beserta batas tanggal (cutoff) run
+# terakhir. Run berikutnya hanya memindai baris baru dan run yang terputus dapat dilanjutkan.
+archive_checkpoint_table = Table(
+    "archive_checkpoint",
+    Base.metadata,
+    Column("name", String, primary_key=True),
+    Column("last_no", Integer, nullable=False, default=0),
+    Column("rows_moved", Integer, nullable=False, default=0),
+    Column("cutoff", Date, nullable=True),
+    Column("modifiedOn", DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+)
+
+# Tabel arsip per tahun dibuat di luar Base.metadata agar tidak ikut fingerprint/migrasi
+_archive_metadata = MetaData()
+
+
+def get_archive_table(source: Table, archive_table_name: str) -> Table:
+    """
+    Tabel arsip dengan kolom yang sama seperti `source` (tanpa foreign key, index, dan default),
+    sehingga baris dapat dipindahkan apa adanya dengan INSERT ... SELECT.
+    """
+    existing = _archive_metadata.tables.get(archive_table_name)
+    if existing is not None:
+        return existing
+    return Table(
+        archive_table_name,
+        _archive_metadata,
+        *[
+            Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable, autoincrement=False)
+            for column in source.columns
+        ],
+    )
+
+
+def get_checkpoint(db: Session, name: str) -> Tuple[int, Optional[date]]:
+    """Mengembalikan watermark dan cutoff run terakhir; (0, None) bila proses belum pernah berjalan."""
+    row = db.execute(
+        select(archive_checkpoint_table.c.last_no, archive_checkpoint_table.c.cutoff)
+        .where(archive_checkpoint_table.c.name == name)
+    ).first()
+    if row is None:
+        return 0, None
+    return row.last_no or 0, row.cutoff
+
+
+def catch_up_predicate(no_column, tanggal_column, watermark: int, previous_cutoff: Optional[date], cutoff: date):
+    """
+    Watermark tetap berlaku saat cutoff maju, tetapi baris dengan `no` di bawah watermark hanya
+    diperiksa terhadap cutoff lama. Baris yang baru lolos di antara cutoff lama dan baru (mis. izin
+    hari kemarin yang dibuat sebelum run terakhir, atau tanggal yang diisi mundur) disapu sekali
+    dengan predikat ini. Mengembalikan None bila tidak ada yang perlu disapu.
+    """
+    if not watermark or previous_cutoff == cutoff:
+        return None
+    clauses = [no_column <= watermark, tanggal_column < cutoff]
+    if previous_cutoff is not None:
+        clauses.append(tanggal_column >= previous_cutoff)
+    return and_(*clauses)
+
+
+def set_watermark(db: Session, name: str, last_no: int, rows_moved: int, cutoff: Optional[date] = None) -> None:
+    """Memperbarui watermark dalam transaksi yang sama dengan batch yang dipindahkan (tanpa commit)."""
+    result = db.execute(
+        update(archive_checkpoint_table)
+        .where(archive_checkpoint_table.c.name == name)
+        .values(last_no=last_no, cutoff=cutoff, rows_moved=archive_checkpoint_table.c.rows_moved + rows_moved)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(archive_checkpoint_table).values(name=name, last_no=last_no, rows_moved=rows_moved, cutoff=cutoff))
+
+
+class ArchiveModelRegistry:
+    """
+    Model ORM untuk tabel arsip `{prefix}_{tahun}`, dibangun sekali per tabel lalu dipakai ulang.
+    Keberadaan tabel arsip juga di-cache: hasil positif permanen, hasil negatif selama `missing_ttl_seconds`.
+    """
+
+    def __init__(self, missing_ttl_seconds: float = 60):
+        self.missing_ttl_seconds = missing_ttl_seconds
+        self._specs = {}
+        self._models = {}
+        self._existing = set()
+        self._missing = {}
+        self._lock = threading.RLock()
+
+    def register(self, prefix: str, source: Table, relationships: Optional[Callable[[Table, int], dict]] = None) -> None:
+        """`relationships(table, year)` mengembalikan atribut relationship untuk model arsip tahun tersebut."""
+        self._specs[prefix] = (source, relationships)
+
+    def _parse(self, table_name: str):
+        match = re.fullmatch(r"(\w+?)_(\d{4})", table_name)
+        if match and match.group(1) in self._specs:
+            return match.group(1), int(match.group(2))
+        return None
+
+    def get_model(self, prefix: str, year: int):
+        table_name = f"{prefix}_{year}"
+        model = self._models.get(table_name)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(table_name)
+            if model is None:
+                source, relationships = self._specs[prefix]
+                table = get_archive_table(source, table_name)
+                attrs = {"__table__": table}
+                if relationships is not None:
+                    attrs.update(relationships(table, year))
+                model = type(f"Archived{prefix[0].upper()}{prefix[1:]}{year}", (Base,), attrs)
+                self._models[table_name] = model
+        return model
+
+    def is_known(self, table_name: str) -> bool:
+        return table_name in self._existing
+
+    def mark_exists(self, table_name: str) -> None:
+        with self._lock:
+            self._existing.add(table_name)
+            self._missing.pop(table_name, None)
+
+    def table_exists(self, bind, table_name: str) -> bool:
+        if table_name in self._existing:
+            return True
+        checked_at = self._missing.get(table_name)
+        if checked_at is not None and time.monotonic() - checked_at < self.missing_ttl_seconds:
+            return False
+        if inspect(bind).has_table(table_name):
+            self.mark_exists(table_name)
+            return True
+        self._missing[table_name] = time.monotonic()
+        return False
+
+    def prewarm(self, bind) -> int:
+        """Mendaftarkan semua tabel arsip yang sudah ada dan membangun modelnya (dipanggil saat startup)."""
+        found = sorted(filter(None, (self._parse(name) for name in inspect(bind).get_table_names())))
+        for prefix, year in found:
+            self.mark_exists(f"{prefix}_{year}")
+        for prefix, year in found:
+            self.get_model(prefix, year)
+        return len(found)
+
+    def stats(self) -> dict:
+        return {"models": len(self._models), "existing_tables": len(self._existing), "missing_cached": len(self._missing)}
+
+
+archive_models = ArchiveModelRegistry()
@@ -11,6 +11,90 @@ class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     FIREBASE_SERVICE_ACCOUNT_KEY: str = os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY_PATH")
 
+    # Jumlah maksimum token Firebase terverifikasi yang disimpan di cache per proses
+    TOKEN_CACHE_MAXSIZE: int = int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000"))
+
+    # Cache snapshot user + role untuk get_current_active_user
+    PRINCIPAL_CACHE_MAXSIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "5000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+
+    # Cache set token FCM (user_devices) per proses; TTL membatasi data basi dari perubahan di worker lain
+    DEVICE_TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("DEVICE_TOKEN_CACHE_TTL_SECONDS", "300"))
+
+    # Signing key store untuk verifikasi token Firebase tanpa fetch sertifikat di jalur request
+    FIREBASE_PROJECT_ID: str = os.getenv("FIREBASE_PROJECT_ID")
+    FIREBASE_CERTS_URL: str = os.getenv(
+        "FIREBASE_CERTS_URL",
+        "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com",
+    )
+    # File lokal berisi sertifikat x509 (format Google) atau JWKS, untuk test/benchmark offline
+    FIREBASE_CERTS_FILE: str = os.getenv("FIREBASE_CERTS_FILE")
+    KEYSTORE_REFRESH_MARGIN_SECONDS: int = int(os.getenv("KEYSTORE_REFRESH_MARGIN_SECONDS", "900"))
+    KEYSTORE_CHECK_INTERVAL_SECONDS: int = int(os.getenv("KEYSTORE_CHECK_INTERVAL_SECONDS", "60"))
+
+    # Pool koneksi database (berlaku untuk engine sinkron dan async)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_TIMEOUT_SECONDS: int = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    # Checkout yang menunggu lebih lama dari ini dicatat sebagai peringatan
+    DB_POOL_SLOW_CHECKOUT_MS: int = int(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+    DB_POOL_STATS_LOG_INTERVAL_SECONDS: int = int(os.getenv("DB_POOL_STATS_LOG_INTERVAL_SECONDS", "300"))
+    # Ukuran cache prepared statement asyncpg; set 0 jika memakai PgBouncer mode transaction
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+    # Read replica opsional untuk endpoint GET yang berat
+    REPLICA_DATABASE_URL: str = os.getenv("REPLICA_DATABASE_URL")
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: int = int(os.getenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "5"))
+    # Setelah klien menulis, bacaannya tetap ke primary selama jendela ini
+    READ_AFTER_WRITE_WINDOW_SECONDS: int = int(os.getenv("READ_AFTER_WRITE_WINDOW_SECONDS", "10"))
+
+    # Statistik query per request (header X-DB-Query-Count / X-DB-Time-ms dan deteksi N+1)
+    QUERY_STATS_ENABLED: bool = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+    # Statement identik yang dijalankan sebanyak ini dalam satu request dianggap pola N+1
+    QUERY_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+
+    # Jumlah baris per batch (satu transaksi) saat memindahkan data lama ke tabel arsip
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+    # Mode opsional PostgreSQL: dataIzin dan dataTelat dipartisi per tahun (RANGE pada kolom tanggal)
+    # Catatan: FK ke dataIzin dilepas dan uq_dataIzin_user_pending menjadi unik per (user_uid, tanggal)
+    DB_PARTITIONING_ENABLED: bool = os.getenv("DB_PARTITIONING_ENABLED", "false").lower() == "true"
+    # Di mode partisi, jumlah tahun terakhir yang tetap ter-attach; partisi yang lebih lama di-detach saat arsip
+    PARTITION_RETAIN_YEARS: int = int(os.getenv("PARTITION_RETAIN_YEARS", "2"))
+
+    # Outbox notifikasi: ditulis dalam transaksi yang sama dengan perubahan data, dikirim oleh dispatcher
+    OUTBOX_POLL_INTERVAL_SECONDS: float = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "2"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    # Backoff eksponensial antar percobaan: base * 2^(percobaan-1), dibatasi max
+    OUTBOX_BACKOFF_BASE_SECONDS: float = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+    OUTBOX_BACKOFF_MAX_SECONDS: float = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "600"))
+    # Baris yang diklaim worker tapi tidak selesai (mis. proses mati) dicoba lagi setelah lease habis
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    OUTBOX_RETAIN_DAYS: int = int(os.getenv("OUTBOX_RETAIN_DAYS", "7"))
+
+    # Pengiriman FCM: multicast dipecah per 500 token (batas FCM) dan dikirim bersamaan secara terbatas
+    FCM_MULTICAST_CHUNK_SIZE: int = int(os.getenv("FCM_MULTICAST_CHUNK_SIZE", "500"))
+    FCM_SEND_CONCURRENCY: int = int(os.getenv("FCM_SEND_CONCURRENCY", "4"))
+    FCM_MAX_RETRIES: int = int(os.getenv("FCM_MAX_RETRIES", "3"))
+    FCM_RETRY_BASE_SECONDS: float = float(os.getenv("FCM_RETRY_BASE_SECONDS", "0.5"))
+    # Mode broadcast izin: "multicast" (semua token) atau "topic" (satu kirim ke topic all_staff,
+    # perangkat di-subscribe ke topic saat didaftarkan); multicast tetap menjadi fallback
+    FCM_DELIVERY_MODE: str = os.getenv("FCM_DELIVERY_MODE", "multicast").lower()
+    # Endpoint FCM palsu untuk benchmark offline; jika diisi, pesan dikirim ke URL ini, bukan ke Firebase
+    FCM_FAKE_ENDPOINT_URL: str = os.getenv("FCM_FAKE_ENDPOINT_URL")
+    # Mengaktifkan router /api/fake-fcm (server FCM palsu + endpoint benchmark); hanya untuk pengembangan
+    FCM_FAKE_SERVER_ENABLED: bool = os.getenv("FCM_FAKE_SERVER_ENABLED", "false").lower() == "true"
+    FCM_FAKE_LATENCY_MS: int = int(os.getenv("FCM_FAKE_LATENCY_MS", "50"))
+
+    # Thread pool khusus untuk panggilan blocking (Firebase Admin SDK, query sinkron)
+    OFFLOAD_MAX_WORKERS: int = int(os.getenv("OFFLOAD_MAX_WORKERS", "16"))
+    OFFLOAD_MAX_CONCURRENCY: int = int(os.getenv("OFFLOAD_MAX_CONCURRENCY", "16"))
+    OFFLOAD_QUEUE_WARNING_THRESHOLD: int = int(os.getenv("OFFLOAD_QUEUE_WARNING_THRESHOLD", "64"))
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,48 @@
+# app/core/duration.py
+import re
+from datetime import datetime
+from typing import Optional
+
+from app.core.timezone import convert_to_utc_aware
+
+# Batas waktu izin keluar sebelum dianggap 'Lewat Waktu'
+IZIN_BATAS_DETIK = 15 * 60
+
+_DURASI_PART = re.compile(r"(\d+)\s*(Jam|Menit|Detik)", re.IGNORECASE)
+_DURASI_UNIT_SECONDS = {"jam": 3600, "menit": 60, "detik": 1}
+
+
+def duration_seconds(jamKeluar: datetime, jamKembali: datetime) -> int:
+    """Selisih jamKembali - jamKeluar dalam detik; datetime naive dianggap UTC."""
+    return int((convert_to_utc_aware(jamKembali) - convert_to_utc_aware(jamKeluar)).total_seconds())
+
+
+def format_durasi(total_seconds: Optional[int]) -> Optional[str]:
+    """Merender durasi (detik) menjadi teks tampilan, mis. 3780 -> '1 Jam 3 Menit'."""
+    if total_seconds is None:
+        return None
+    total_seconds = int(total_seconds)
+
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+
+    duration_parts = []
+    if hours > 0:
+        duration_parts.append(f"{hours} Jam")
+    if minutes > 0:
+        duration_parts.append(f"{minutes} Menit")
+    if seconds > 0:
+        duration_parts.append(f"{seconds} Detik")
+
+    return " ".join(duration_parts) if duration_parts else "0 Detik"
+
+
+def parse_durasi(text: Optional[str]) -> Optional[int]:
+    """Kebalikan format_durasi; dipakai untuk backfill baris lama yang hanya menyimpan teks."""
+    if not text:
+        return None
+    parts = _DURASI_PART.findall(text)
+    if not parts:
+        return None
+    return sum(int(value) * _DURASI_UNIT_SECONDS[unit.lower()] for value, unit in parts)
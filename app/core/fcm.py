@@ -1,86 +1,321 @@
 # app/core/fcm.py
 
+import asyncio
+import random
+import time
+
 import firebase_admin
-from firebase_admin import credentials, messaging
+import httpx
+from firebase_admin import credentials, exceptions, messaging
 import logging
 from typing import List, Optional, Dict, Any
 
+from app.core.config import settings
+from app.core.fcm_topics import ALL_STAFF_TOPIC, topic_mode_enabled
+
 logger = logging.getLogger(__name__)
 
 # Asumsi firebase_admin sudah diinisialisasi di app/main.py
 # Jika belum, pastikan Anda memanggil initialize_firebase_admin()
 # yang memuat kredensial Anda.
 
+# Kategori hasil per token
+_INVALID_TOKEN = "invalid_token"        # token harus dihapus dari user_devices
+_INVALID_ARGUMENT = "invalid_argument"  # token tidak valid, kecuali semua token dalam chunk gagal (payload salah)
+_TRANSIENT = "transient"                # dicoba ulang dengan backoff
+_ERROR = "error"                        # gagal permanen, tidak dicoba ulang
+
+_INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+_TRANSIENT_ERRORS = (
+    exceptions.UnavailableError,
+    exceptions.InternalError,
+    exceptions.DeadlineExceededError,
+    exceptions.ResourceExhaustedError,
+    httpx.TransportError,
+)
+# Kode error dari endpoint FCM palsu (lihat app/core/fcm_fake.py)
+_FAKE_ERROR_CATEGORIES = {
+    "UNREGISTERED": _INVALID_TOKEN,
+    "SENDER_ID_MISMATCH": _INVALID_TOKEN,
+    "INVALID_ARGUMENT": _INVALID_ARGUMENT,
+    "UNAVAILABLE": _TRANSIENT,
+    "INTERNAL": _TRANSIENT,
+    "QUOTA_EXCEEDED": _TRANSIENT,
+}
+
+_fake_client: Optional[httpx.AsyncClient] = None
+
+
+class FcmSendResult:
+    """Ringkasan satu pengiriman notifikasi ke banyak token."""
+
+    def __init__(self):
+        self.success_count = 0
+        self.failure_count = 0
+        self.retry_count = 0
+        self.invalid_tokens: List[str] = []
+        self.pruned_count = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "success": self.success_count,
+            "failure": self.failure_count,
+            "retries": self.retry_count,
+            "invalid_tokens": len(self.invalid_tokens),
+            "pruned": self.pruned_count,
+        }
+
+
+def _classify(error: Exception) -> str:
+    if isinstance(error, _INVALID_TOKEN_ERRORS):
+        return _INVALID_TOKEN
+    if isinstance(error, exceptions.InvalidArgumentError):
+        return _INVALID_ARGUMENT
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return _TRANSIENT
+    return _ERROR
+
+
+async def _send_chunk_fake(tokens: List[str], title: str, body: str, data, image_url) -> List[Optional[str]]:
+    global _fake_client
+    if _fake_client is None:
+        _fake_client = httpx.AsyncClient(timeout=30)
+    response = await _fake_client.post(
+        settings.FCM_FAKE_ENDPOINT_URL,
+        json={"tokens": tokens, "notification": {"title": title, "body": body, "image": image_url}, "data": data},
+    )
+    if response.status_code == 429 or response.status_code >= 500:
+        return [_TRANSIENT] * len(tokens)
+    response.raise_for_status()
+    return [
+        None if not result.get("error") else _FAKE_ERROR_CATEGORIES.get(result["error"], _ERROR)
+        for result in response.json()["results"]
+    ]
+
+
+async def _send_chunk(tokens: List[str], title: str, body: str, data, image_url) -> List[Optional[str]]:
+    """Mengirim satu multicast (maks. 500 token); mengembalikan kategori error per token (None = berhasil)."""
+    try:
+        if settings.FCM_FAKE_ENDPOINT_URL:
+            return await _send_chunk_fake(tokens, title, body, data, image_url)
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+                image=image_url # Opsional: URL gambar notifikasi
+            ),
+            data=data, # Opsional: Data kustom untuk aplikasi
+            tokens=tokens,
+        )
+        response = await messaging.send_each_for_multicast_async(message)
+    except Exception as e:
+        category = _classify(e)
+        logger.warning(f"Multicast FCM untuk {len(tokens)} token gagal ({category}): {e}")
+        return [category] * len(tokens)
+
+    outcomes = []
+    for item in response.responses:
+        if item.success:
+            outcomes.append(None)
+        else:
+            outcomes.append(_classify(item.exception))
+            logger.debug(f"Gagal mengirim pesan: {item.exception}")
+    return outcomes
+
+
+async def _deliver_chunk(tokens: List[str], title: str, body: str, data, image_url, semaphore: asyncio.Semaphore, result: FcmSendResult):
+    remaining = tokens
+    for attempt in range(settings.FCM_MAX_RETRIES + 1):
+        async with semaphore:
+            outcomes = await _send_chunk(remaining, title, body, data, image_url)
+
+        # INVALID_ARGUMENT untuk seluruh chunk berarti payload yang salah, bukan tokennya
+        payload_rejected = all(outcome == _INVALID_ARGUMENT for outcome in outcomes)
+        transient = []
+        for token, outcome in zip(remaining, outcomes):
+            if outcome is None:
+                result.success_count += 1
+            elif outcome == _INVALID_TOKEN or (outcome == _INVALID_ARGUMENT and not payload_rejected):
+                result.failure_count += 1
+                result.invalid_tokens.append(token)
+            elif outcome == _TRANSIENT:
+                transient.append(token)
+            else:
+                result.failure_count += 1
+
+        if not transient:
+            return
+        if attempt == settings.FCM_MAX_RETRIES:
+            result.failure_count += len(transient)
+            logger.warning(f"{len(transient)} token FCM tetap gagal setelah {attempt + 1} percobaan.")
+            return
+
+        # Backoff eksponensial dengan jitter agar chunk yang gagal bersamaan tidak mencoba ulang serentak
+        delay = settings.FCM_RETRY_BASE_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+        result.retry_count += len(transient)
+        await asyncio.sleep(delay)
+        remaining = transient
+
+
 async def send_fcm_notification(
     device_tokens: List[str],
     title: str,
     body: str,
     data: Optional[Dict[str, str]] = None,
-    image_url: Optional[str] = None
-):
+    image_url: Optional[str] = None,
+    raise_on_error: bool = False
+) -> Optional[FcmSendResult]:
     """
     Mengirim notifikasi FCM ke daftar token perangkat yang diberikan.
+
+    Token dipecah per FCM_MULTICAST_CHUNK_SIZE (batas multicast FCM 500) dan dikirim bersamaan
+    dengan batas FCM_SEND_CONCURRENCY. Error sementara dicoba ulang dengan backoff ber-jitter;
+    token yang dilaporkan tidak terdaftar/tidak valid dihapus dari user_devices.
+    Dengan `raise_on_error=True` (dispatcher outbox) pengiriman yang gagal seluruhnya dilempar agar dapat dicoba ulang.
     """
-    if not firebase_admin._apps:
+    if not settings.FCM_FAKE_ENDPOINT_URL and not firebase_admin._apps:
         logger.error("Firebase Admin SDK belum diinisialisasi. Tidak dapat mengirim notifikasi.")
-        return
+        if raise_on_error:
+            raise RuntimeError("Firebase Admin SDK belum diinisialisasi.")
+        return None
 
-    if not device_tokens:
+    tokens = list(dict.fromkeys(token for token in device_tokens if token))
+    if not tokens:
         logger.info("Tidak ada token perangkat yang diberikan, tidak ada notifikasi yang dikirim.")
-        return
+        return None
+
+    chunk_size = min(settings.FCM_MULTICAST_CHUNK_SIZE, 500)
+    semaphore = asyncio.Semaphore(settings.FCM_SEND_CONCURRENCY)
+    result = FcmSendResult()
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _deliver_chunk(tokens[i:i + chunk_size], title, body, data, image_url, semaphore, result)
+        for i in range(0, len(tokens), chunk_size)
+    ])
+    elapsed = time.perf_counter() - started
+
+    if result.invalid_tokens:
+        from app.users.crud import clear_fcm_tokens # Import di dalam fungsi untuk menghindari circular import
+        from app.core.offload import run_blocking
+        try:
+            result.pruned_count = await run_blocking(_query_with_own_session, None, clear_fcm_tokens, result.invalid_tokens)
+        except Exception as e:
+            logger.error(f"Gagal menghapus {len(result.invalid_tokens)} token FCM tidak valid: {e}", exc_info=True)
 
-    message = messaging.MulticastMessage(
-        notification=messaging.Notification(
-            title=title,
-            body=body,
-            image=image_url # Opsional: URL gambar notifikasi
-        ),
-        data=data, # Opsional: Data kustom untuk aplikasi
-        tokens=device_tokens,
+    logger.info(
+        f"Berhasil mengirim {result.success_count} pesan, gagal {result.failure_count} "
+        f"({len(tokens)} token, {elapsed:.2f} s, {len(tokens) / elapsed if elapsed > 0 else 0:.0f} token/detik, "
+        f"{result.retry_count} dicoba ulang, {result.pruned_count} token dihapus)."
     )
+    if raise_on_error and result.success_count == 0 and result.failure_count > len(result.invalid_tokens):
+        raise RuntimeError(f"Semua {len(tokens)} pengiriman FCM gagal.")
+    return result
 
+def _query_with_own_session(db_session, query_fn, *args):
+    """
+    Menjalankan query token dengan sesi milik pemanggil, atau membuka sesi sendiri
+    jika tidak ada (mis. dari background task yang berjalan setelah sesi request ditutup).
+    """
+    if db_session is not None:
+        return query_fn(db_session, *args)
+    from app.core.database import SessionLocal # Import di dalam fungsi untuk menghindari circular import
+    own_session = SessionLocal()
     try:
-        response = await messaging.send_multicast_async(message)
-        logger.info(f"Berhasil mengirim {response.success_count} pesan, gagal {response.failure_count}.")
-        if response.failure_count > 0:
-            for error in response.responses:
-                if error.exception:
-                    logger.warning(f"Gagal mengirim pesan: {error.exception}")
-        return response
-    except Exception as e:
-        logger.error(f"Kesalahan saat mengirim notifikasi FCM: {e}", exc_info=True)
-        return None
+        return query_fn(own_session, *args)
+    finally:
+        own_session.close()
+
+async def send_fcm_notification_to_topic(
+    topic: str,
+    title: str,
+    body: str,
+    data: Optional[Dict[str, str]] = None,
+    image_url: Optional[str] = None
+) -> FcmSendResult:
+    """Satu pesan ke topic FCM (biaya tetap, tidak bergantung jumlah perangkat). Kegagalan dilempar."""
+    started = time.perf_counter()
+    if settings.FCM_FAKE_ENDPOINT_URL:
+        global _fake_client
+        if _fake_client is None:
+            _fake_client = httpx.AsyncClient(timeout=30)
+        response = await _fake_client.post(
+            settings.FCM_FAKE_ENDPOINT_URL,
+            json={"topic": topic, "tokens": [], "notification": {"title": title, "body": body, "image": image_url}, "data": data},
+        )
+        response.raise_for_status()
+    else:
+        if not firebase_admin._apps:
+            raise RuntimeError("Firebase Admin SDK belum diinisialisasi.")
+        message = messaging.Message(
+            notification=messaging.Notification(title=title, body=body, image=image_url),
+            data=data,
+            topic=topic,
+        )
+        response = await messaging.send_each_async([message])
+        if not response.responses[0].success:
+            raise response.responses[0].exception
 
-async def send_fcm_notification_to_all_users(db_session, title: str, body: str, data: Optional[Dict[str, str]] = None):
+    result = FcmSendResult()
+    result.success_count = 1
+    logger.info(f"Notifikasi dikirim ke topic '{topic}' dalam {(time.perf_counter() - started) * 1000:.0f} ms.")
+    return result
+
+async def send_fcm_notification_to_all_users(title: str, body: str, data: Optional[Dict[str, str]] = None, db_session=None, raise_on_error: bool = False):
     """
     Mengambil semua token FCM dari database dan mengirim notifikasi ke semua.
+    Di mode topic (FCM_DELIVERY_MODE=topic) cukup satu kirim ke topic all_staff;
+    jika gagal, pengiriman jatuh kembali ke multicast per token.
     """
+    if topic_mode_enabled():
+        try:
+            return await send_fcm_notification_to_topic(ALL_STAFF_TOPIC, title, body, data)
+        except Exception as e:
+            logger.warning(f"Kirim ke topic '{ALL_STAFF_TOPIC}' gagal, beralih ke multicast: {e}")
+
     from app.users.crud import get_users_fcm_tokens # Import di dalam fungsi untuk menghindari circular import
-    all_fcm_tokens = get_users_fcm_tokens(db_session)
+    from app.users.device_cache import device_token_cache
+    from app.core.offload import run_blocking
+    # Set token dibaca dari cache per proses; database hanya disentuh saat cache kosong/kedaluwarsa
+    all_fcm_tokens = device_token_cache.get_all()
+    if all_fcm_tokens is None:
+        all_fcm_tokens = await run_blocking(_query_with_own_session, db_session, get_users_fcm_tokens)
     if not all_fcm_tokens:
         logger.info("Tidak ada token FCM yang terdaftar untuk mengirim notifikasi ke semua pengguna.")
         return
 
-    await send_fcm_notification(
+    return await send_fcm_notification(
         device_tokens=all_fcm_tokens,
         title=title,
         body=body,
-        data=data
+        data=data,
+        raise_on_error=raise_on_error
     )
 
-async def send_fcm_notification_to_single_user(db_session, user_uid: str, title: str, body: str, data: Optional[Dict[str, str]] = None):
+async def send_fcm_notification_to_single_user(user_uid: str, title: str, body: str, data: Optional[Dict[str, str]] = None, db_session=None, raise_on_error: bool = False):
     """
-    Mengambil token FCM untuk user tertentu dan mengirim notifikasi.
+    Mengambil token FCM semua perangkat milik user tertentu dan mengirim notifikasi.
     """
-    from app.users.crud import get_fcm_token_by_user_uid # Import di dalam fungsi untuk menghindari circular import
-    fcm_token = get_fcm_token_by_user_uid(db_session, user_uid)
-    if not fcm_token:
+    from app.users.crud import get_fcm_tokens_by_user_uid # Import di dalam fungsi untuk menghindari circular import
+    from app.users.device_cache import device_token_cache
+    from app.core.offload import run_blocking
+    fcm_tokens = device_token_cache.get_user(user_uid)
+    if fcm_tokens is None:
+        fcm_tokens = await run_blocking(_query_with_own_session, db_session, get_fcm_tokens_by_user_uid, user_uid)
+    if not fcm_tokens:
         logger.info(f"Tidak ada token FCM yang terdaftar untuk user_uid: {user_uid}")
         return
 
-    await send_fcm_notification(
-        device_tokens=[fcm_token],
+    return await send_fcm_notification(
+        device_tokens=fcm_tokens,
         title=title,
         body=body,
-        data=data
-    )
\ No newline at end of file
+        data=data,
+        raise_on_error=raise_on_error
+    )
+
+
+async def close_fake_client():
+    global _fake_client
+    if _fake_client is not None:
+        await _fake_client.aclose()
+        _fake_client = None
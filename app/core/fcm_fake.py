@@ -0,0 +1,74 @@
+# app/core/fcm_fake.py
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.fcm import send_fcm_notification
+
+# Server FCM palsu untuk benchmark fan-out tanpa jaringan ke Firebase.
+# Hanya dipasang jika FCM_FAKE_SERVER_ENABLED=true; arahkan FCM_FAKE_ENDPOINT_URL ke /api/fake-fcm/send.
+router = APIRouter(
+    prefix="/api/fake-fcm",
+    tags=["Fake-FCM"],
+)
+
+
+class FakeMulticastRequest(BaseModel):
+    tokens: List[str] = []
+    topic: Optional[str] = None
+    notification: Optional[Dict[str, Optional[str]]] = None
+    data: Optional[Dict[str, str]] = None
+
+
+def _fake_result(token: str) -> dict:
+    # Prefix token menentukan hasilnya: invalid-* tidak terdaftar, flaky-* kadang tidak tersedia
+    if token.startswith("invalid-"):
+        return {"error": "UNREGISTERED"}
+    if token.startswith("flaky-") and random.random() < 0.3:
+        return {"error": "UNAVAILABLE"}
+    return {"error": None}
+
+
+@router.post("/send")
+async def fake_send_multicast(payload: FakeMulticastRequest):
+    """Meniru multicast FCM (satu hasil per token) atau kirim ke topic, dengan latensi tetap per panggilan."""
+    await asyncio.sleep(settings.FCM_FAKE_LATENCY_MS / 1000)
+    return {"results": [_fake_result(token) for token in payload.tokens]}
+
+
+@router.post("/benchmark/")
+async def benchmark_fan_out(
+    jumlah: int = Query(10000, ge=1, le=200000, description="Jumlah token sintetis"),
+    rasio_invalid: float = Query(0.01, ge=0, le=1, description="Porsi token invalid-*"),
+    rasio_flaky: float = Query(0.05, ge=0, le=1, description="Porsi token flaky-*"),
+):
+    """
+    Mengukur send_fcm_notification terhadap endpoint palsu dengan token sintetis.
+    Membutuhkan FCM_FAKE_ENDPOINT_URL yang menunjuk ke /api/fake-fcm/send.
+    """
+    if not settings.FCM_FAKE_ENDPOINT_URL:
+        return {"detail": "FCM_FAKE_ENDPOINT_URL belum diatur; benchmark akan mengirim ke Firebase sungguhan."}
+
+    tokens = []
+    for _ in range(jumlah):
+        roll = random.random()
+        prefix = "invalid-" if roll < rasio_invalid else "flaky-" if roll < rasio_invalid + rasio_flaky else "ok-"
+        tokens.append(f"{prefix}{uuid.uuid4().hex}")
+
+    started = time.perf_counter()
+    result = await send_fcm_notification(tokens, title="Benchmark", body="Benchmark fan-out FCM")
+    elapsed = time.perf_counter() - started
+    return {
+        "tokens": jumlah,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "tokens_per_second": round(jumlah / elapsed) if elapsed > 0 else None,
+        "chunk_size": settings.FCM_MULTICAST_CHUNK_SIZE,
+        "concurrency": settings.FCM_SEND_CONCURRENCY,
+        **(result.as_dict() if result else {}),
+    }
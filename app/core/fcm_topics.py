@@ -0,0 +1,125 @@
+# app/core/fcm_topics.py
+import logging
+import re
+from typing import Iterable, List, Optional
+
+import firebase_admin
+from firebase_admin import messaging
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Topic broadcast: semua staff, admin, dan per jabatan
+ALL_STAFF_TOPIC = "all_staff"
+ADMINS_TOPIC = "admins"
+ADMIN_ROLE_NAME = "Admin"
+# Batas token per panggilan subscribe/unsubscribe topic FCM
+TOPIC_MANAGEMENT_BATCH = 1000
+
+
+def topic_mode_enabled() -> bool:
+    return settings.FCM_DELIVERY_MODE == "topic"
+
+
+def jabatan_topic(jabatan: str) -> str:
+    # Nama topic FCM hanya boleh [a-zA-Z0-9-_.~%]
+    slug = re.sub(r"[^a-zA-Z0-9\-_.~%]+", "_", jabatan.strip().lower()).strip("_")
+    return f"jabatan_{slug}"
+
+
+def topics_for_user(user) -> List[str]:
+    topics = [ALL_STAFF_TOPIC]
+    if user.role is not None and user.role.nama == ADMIN_ROLE_NAME:
+        topics.append(ADMINS_TOPIC)
+    if user.jabatan:
+        topics.append(jabatan_topic(user.jabatan))
+    return topics
+
+
+def _can_manage_topics() -> bool:
+    if not topic_mode_enabled():
+        return False
+    if settings.FCM_FAKE_ENDPOINT_URL:
+        logger.debug("Endpoint FCM palsu aktif, subscribe topic dilewati.")
+        return False
+    if not firebase_admin._apps:
+        logger.error("Firebase Admin SDK belum diinisialisasi. Tidak dapat mengelola topic.")
+        return False
+    return True
+
+
+def _manage(tokens: List[str], topics: Iterable[str], subscribe: bool) -> None:
+    action = messaging.subscribe_to_topic if subscribe else messaging.unsubscribe_from_topic
+    for topic in topics:
+        for i in range(0, len(tokens), TOPIC_MANAGEMENT_BATCH):
+            batch = tokens[i:i + TOPIC_MANAGEMENT_BATCH]
+            try:
+                response = action(batch, topic)
+            except Exception as e:
+                logger.error(f"Gagal {'subscribe' if subscribe else 'unsubscribe'} {len(batch)} token ke topic '{topic}': {e}")
+                continue
+            if response.failure_count:
+                logger.warning(
+                    f"{response.failure_count} token gagal {'subscribe' if subscribe else 'unsubscribe'} "
+                    f"topic '{topic}': {[error.reason for error in response.errors[:5]]}"
+                )
+
+
+def subscribe_tokens(tokens: List[str], topics: Iterable[str]) -> None:
+    """Blocking (Firebase Admin SDK); dipanggil dari background task atau thread pool."""
+    if tokens and _can_manage_topics():
+        _manage(tokens, topics, subscribe=True)
+
+
+def unsubscribe_tokens(tokens: List[str], topics: Iterable[str]) -> None:
+    if tokens and _can_manage_topics():
+        _manage(tokens, topics, subscribe=False)
+
+
+def sync_user_topics(user_uid: str, previous_topics: Optional[List[str]] = None) -> None:
+    """
+    Menyamakan langganan topic semua perangkat user dengan role/jabatan saat ini.
+    `previous_topics` (topic sebelum user diubah) yang tidak berlaku lagi di-unsubscribe.
+    Membuka sesi sendiri karena dijalankan sebagai background task setelah request selesai.
+    """
+    if not _can_manage_topics():
+        return
+    from app.core.database import SessionLocal # Import di dalam fungsi untuk menghindari circular import
+    from app.users import models as user_models
+    db: Session = SessionLocal()
+    try:
+        user = db.query(user_models.User).options(
+            selectinload(user_models.User.role), selectinload(user_models.User.devices)
+        ).filter(user_models.User.uid == user_uid).first()
+        if user is None:
+            return
+        tokens = [device.fcm_token for device in user.devices]
+        topics = topics_for_user(user)
+    finally:
+        db.close()
+
+    stale = [topic for topic in (previous_topics or []) if topic not in topics]
+    unsubscribe_tokens(tokens, stale)
+    subscribe_tokens(tokens, topics)
+
+
+def sync_all_topic_subscriptions(db: Session) -> int:
+    """Subscribe ulang semua perangkat ke topic-nya (mis. saat pertama kali beralih ke mode topic)."""
+    if not _can_manage_topics():
+        return 0
+    from app.users import models as user_models
+    users = db.query(user_models.User).options(
+        selectinload(user_models.User.role), selectinload(user_models.User.devices)
+    ).all()
+    tokens_by_topic = {}
+    for user in users:
+        for topic in topics_for_user(user):
+            tokens_by_topic.setdefault(topic, []).extend(device.fcm_token for device in user.devices)
+    total = 0
+    for topic, tokens in tokens_by_topic.items():
+        _manage(tokens, [topic], subscribe=True)
+        total += len(tokens)
+    logger.info(f"Sinkronisasi topic FCM selesai: {total} langganan di {len(tokens_by_topic)} topic.")
+    return total
@@ -0,0 +1,90 @@
+# app/core/offload.py
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingOffloader:
+    """
+    Menjalankan panggilan blocking (Firebase Admin SDK, query SQLAlchemy sinkron)
+    di thread pool khusus agar event loop uvicorn tetap melayani klien lain.
+
+    Jumlah panggilan yang berjalan bersamaan dibatasi oleh semaphore sendiri sehingga
+    antrean terlihat di sisi event loop dan dapat diukur, bukan tersembunyi di executor.
+    """
+
+    def __init__(self, max_workers: int, max_concurrency: int, queue_warning_threshold: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking-offload")
+        self._max_workers = max_workers
+        self._max_concurrency = max_concurrency
+        self._queue_warning_threshold = queue_warning_threshold
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Semua counter hanya diubah dari thread event loop, jadi tidak perlu lock
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_waiting = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        if self.waiting > self._queue_warning_threshold:
+            logger.warning(f"Antrean offload blocking mencapai {self.waiting} panggilan (batas peringatan {self._queue_warning_threshold}).")
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Salin contextvars agar konteks request ikut terbawa ke thread pool
+            call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+            result = await loop.run_in_executor(self._executor, call)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+        # Hanya panggilan yang berhasil; kegagalan dihitung di `failed`
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self._max_workers,
+            "max_concurrency": self._max_concurrency,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "max_waiting": self.max_waiting,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+offloader = BlockingOffloader(
+    max_workers=settings.OFFLOAD_MAX_WORKERS,
+    max_concurrency=settings.OFFLOAD_MAX_CONCURRENCY,
+    queue_warning_threshold=settings.OFFLOAD_QUEUE_WARNING_THRESHOLD,
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Menjalankan `func(*args, **kwargs)` di thread pool offload dan menunggu hasilnya."""
+    return await offloader.run(func, *args, **kwargs)
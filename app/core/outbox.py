@@ -0,0 +1,247 @@
+# app/core/outbox.py
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Table, delete, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base
+
+logger = logging.getLogger(__name__)
+
+# Jenis notifikasi: broadcast ke semua user atau ke satu user (user_uid)
+KIND_ALL_USERS = "all_users"
+KIND_SINGLE_USER = "single_user"
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+# Notifikasi ditulis dalam transaksi yang sama dengan perubahan izin/data telat,
+# lalu dikirim oleh NotificationDispatcher di luar jalur request.
+notification_outbox_table = Table(
+    "notification_outbox",
+    Base.metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("kind", String, nullable=False),
+    Column("user_uid", String, nullable=True),
+    Column("title", String, nullable=False),
+    Column("body", String, nullable=False),
+    Column("data", JSON, nullable=True),
+    Column("status", String, nullable=False, default=STATUS_PENDING),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("next_attempt_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("last_error", String, nullable=True),
+    Column("createOn", DateTime(timezone=True), server_default=func.now()),
+    Column("sentOn", DateTime(timezone=True), nullable=True),
+    # Antrean yang siap dikirim: status pending dengan next_attempt_at terlama dulu
+    Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+)
+
+
+def enqueue_notification(
+    db: Session,
+    title: str,
+    body: str,
+    data: Optional[Dict[str, str]] = None,
+    user_uid: Optional[str] = None,
+) -> None:
+    """
+    Menambahkan notifikasi ke outbox tanpa commit; pemanggil meng-commit bersama perubahan datanya
+    sehingga notifikasi hanya terkirim jika perubahan tersebut benar-benar tersimpan.
+    Tanpa `user_uid` notifikasi dikirim ke semua user.
+    """
+    db.execute(
+        insert(notification_outbox_table).values(
+            kind=KIND_SINGLE_USER if user_uid else KIND_ALL_USERS,
+            user_uid=user_uid,
+            title=title,
+            body=body,
+            data=data,
+            status=STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=datetime.now(timezone.utc),
+        )
+    )
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), settings.OUTBOX_BACKOFF_MAX_SECONDS)
+
+
+class NotificationDispatcher:
+    """
+    Worker async per proses yang menguras outbox per batch dengan sesinya sendiri.
+
+    Baris diklaim dengan SELECT ... FOR UPDATE SKIP LOCKED lalu diberi lease (next_attempt_at
+    dimajukan), sehingga beberapa worker uvicorn tidak mengirim baris yang sama dan baris milik
+    worker yang mati dicoba lagi setelah lease habis. Lease setiap baris diperbarui tepat sebelum
+    dikirim dan selama pengiriman berjalan, karena baris dalam satu batch dikirim berurutan. Kegagalan dijadwalkan ulang dengan backoff
+    eksponensial sampai OUTBOX_MAX_ATTEMPTS, setelah itu ditandai failed.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._last_purge: Optional[datetime] = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="notification-dispatcher")
+        logger.info("Dispatcher outbox notifikasi dimulai.")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Dispatcher outbox notifikasi dihentikan.")
+
+    def wake(self) -> None:
+        """Dipanggil setelah commit yang menulis outbox agar notifikasi tidak menunggu interval poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.dispatch_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Kesalahan pada dispatcher outbox notifikasi: {e}", exc_info=True)
+                processed = 0
+
+            if processed >= settings.OUTBOX_BATCH_SIZE:
+                # Masih ada antrean; lanjutkan tanpa menunggu
+                continue
+            if processed == 0:
+                await self._purge_if_due()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.OUTBOX_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def dispatch_batch(self) -> int:
+        table = notification_outbox_table
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                rows = (await session.execute(
+                    select(table)
+                    .where(table.c.status == STATUS_PENDING, table.c.next_attempt_at <= now)
+                    .order_by(table.c.next_attempt_at, table.c.id)
+                    .limit(settings.OUTBOX_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                )).mappings().all()
+                if not rows:
+                    return 0
+                await session.execute(
+                    update(table)
+                    .where(table.c.id.in_([row["id"] for row in rows]))
+                    .values(attempts=table.c.attempts + 1, next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS))
+                )
+
+            for row in rows:
+                attempts = row["attempts"] + 1
+                # Lease klaim batch bisa sudah habis saat giliran baris ini tiba; perbarui tepat sebelum dikirim
+                if not await self._extend_lease(row["id"], attempts):
+                    logger.warning(f"Lease notifikasi outbox {row['id']} sudah diambil worker lain, dilewati.")
+                    continue
+                heartbeat = asyncio.create_task(self._keep_lease(row["id"], attempts))
+                try:
+                    await self._deliver(row)
+                except Exception as e:
+                    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                        values = {"status": STATUS_FAILED, "last_error": str(e)[:1000]}
+                        self.failed += 1
+                        logger.error(f"Notifikasi outbox {row['id']} gagal permanen setelah {attempts} percobaan: {e}")
+                    else:
+                        delay = backoff_seconds(attempts)
+                        values = {
+                            "last_error": str(e)[:1000],
+                            "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+                        }
+                        self.retried += 1
+                        logger.warning(f"Notifikasi outbox {row['id']} gagal (percobaan {attempts}), dicoba lagi dalam {delay:.0f} s: {e}")
+                else:
+                    values = {"status": STATUS_SENT, "sentOn": datetime.now(timezone.utc), "last_error": None}
+                    self.sent += 1
+                finally:
+                    heartbeat.cancel()
+                await session.execute(
+                    update(table).where(table.c.id == row["id"], table.c.attempts == attempts).values(**values)
+                )
+                await session.commit()
+        return len(rows)
+
+    async def _extend_lease(self, row_id: int, attempts: int) -> bool:
+        """
+        Memajukan lease satu baris selama masih milik worker ini (attempts belum dinaikkan worker lain).
+        Memakai sesi sendiri karena juga dipanggil dari heartbeat selama pengiriman berjalan.
+        """
+        table = notification_outbox_table
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(table)
+                .where(table.c.id == row_id, table.c.attempts == attempts, table.c.status == STATUS_PENDING)
+                .values(next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS))
+            )
+            await session.commit()
+        return result.rowcount > 0
+
+    async def _keep_lease(self, row_id: int, attempts: int) -> None:
+        """Heartbeat: fan-out yang lebih lama dari satu lease tidak diklaim ulang worker lain."""
+        while True:
+            await asyncio.sleep(settings.OUTBOX_LEASE_SECONDS / 2)
+            try:
+                await self._extend_lease(row_id, attempts)
+            except Exception as e:
+                logger.warning(f"Gagal memperbarui lease notifikasi outbox {row_id}: {e}")
+
+    async def _deliver(self, row) -> None:
+        from app.core.fcm import send_fcm_notification_to_all_users, send_fcm_notification_to_single_user # Import di dalam fungsi untuk menghindari circular import
+        if row["kind"] == KIND_SINGLE_USER:
+            await send_fcm_notification_to_single_user(
+                row["user_uid"], row["title"], row["body"], data=row["data"], raise_on_error=True
+            )
+        else:
+            await send_fcm_notification_to_all_users(row["title"], row["body"], data=row["data"], raise_on_error=True)
+
+    async def _purge_if_due(self) -> None:
+        """Menghapus baris terkirim yang lebih lama dari OUTBOX_RETAIN_DAYS, paling sering sekali per jam."""
+        now = datetime.now(timezone.utc)
+        if self._last_purge is not None and now - self._last_purge < timedelta(hours=1):
+            return
+        self._last_purge = now
+        table = notification_outbox_table
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                delete(table).where(
+                    table.c.status == STATUS_SENT,
+                    table.c.sentOn < now - timedelta(days=settings.OUTBOX_RETAIN_DAYS),
+                )
+            )
+            await session.commit()
+        if result.rowcount:
+            logger.info(f"{result.rowcount} notifikasi outbox terkirim yang lama dihapus.")
+
+    def stats(self) -> dict:
+        return {"running": self._task is not None, "sent": self.sent, "retried": self.retried, "failed": self.failed}
+
+
+notification_dispatcher = NotificationDispatcher()
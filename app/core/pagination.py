@@ -0,0 +1,84 @@
+# app/core/pagination.py
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+# Header berisi cursor halaman berikutnya; kosong/tidak ada berarti halaman terakhir
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Nilai cursor tidak didukung: {type(value).__name__}")
+
+
+def encode_cursor(values: dict) -> str:
+    """Cursor keyset opaque: JSON nilai kunci baris terakhir, dikodekan base64 url-safe."""
+    raw = json.dumps(values, default=_default, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Kebalikan encode_cursor; ValueError jika cursor rusak."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor tidak valid.") from e
+    if not isinstance(values, dict):
+        raise ValueError("Cursor tidak valid.")
+    return values
+
+
+def keyset_after(columns: list, values: list, descending: bool = True):
+    """
+    Predikat "sesudah baris (values)" untuk urutan `columns` (semua ASC atau semua DESC),
+    ditulis sebagai OR/AND berantai agar portabel (tanpa row-value comparison).
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column < value if descending else column > value))
+    return or_(*clauses)
+
+
+def _restore(value, column):
+    """Mengembalikan nilai JSON cursor ke tipe Python kolomnya (date/datetime dari ISO string)."""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def apply_keyset(query, columns: list, cursor: str = None, descending: bool = True):
+    """
+    Mengurutkan `query` menurut `columns` (kunci terakhir harus unik sebagai tiebreak) dan,
+    jika ada cursor, hanya mengambil baris sesudah baris terakhir halaman sebelumnya.
+    """
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    if cursor:
+        values = decode_cursor(cursor).get("k")
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor tidak cocok dengan urutan daftar ini.")
+        query = query.filter(keyset_after(columns, [_restore(v, c) for v, c in zip(values, columns)], descending))
+    return query
+
+
+def next_cursor(items: list, attrs: list, limit: int):
+    """Cursor halaman berikutnya dari item terakhir, atau None jika halaman tidak penuh."""
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor({"k": [getattr(items[-1], attr) for attr in attrs]})
+
+
+def set_next_cursor(response, cursor) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
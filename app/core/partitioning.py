@@ -0,0 +1,213 @@
+# app/core/partitioning.py
+import logging
+import re
+from datetime import date
+
+from sqlalchemy import inspect, text
+
+from app.core.config import settings
+from app.core.timezone import now_local
+
+logger = logging.getLogger(__name__)
+
+# Tabel yang dipartisi per tahun (mode PostgreSQL opsional) beserta kolom kunci partisinya.
+# Nama partisi sama dengan tabel arsip lama, `dataIzin_{tahun}` / `dataTelat_{tahun}`,
+# sehingga endpoint arsip tetap bekerja baik untuk partisi yang ter-attach maupun ter-detach.
+PARTITIONED_TABLES = {
+    "dataIzin": "tanggal",
+    "dataTelat": "tanggal",
+}
+
+
+def partition_name(table_name: str, year: int) -> str:
+    return f"{table_name}_{year}"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _current_year() -> int:
+    return now_local().year
+
+
+def is_partitioned(connection, table_name: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(quote_ident(:name)))"),
+        {"name": table_name},
+    ).scalar())
+
+
+def list_partitions(connection, table_name: str) -> list:
+    return list(connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(quote_ident(:name)) ORDER BY c.relname"
+        ),
+        {"name": table_name},
+    ).scalars())
+
+
+def _year_bounds(year: int) -> str:
+    return f"FROM ('{date(year, 1, 1).isoformat()}') TO ('{date(year + 1, 1, 1).isoformat()}')"
+
+
+def ensure_partitions(connection, table_name: str, years) -> None:
+    """Membuat partisi tahunan yang belum ada (termasuk partisi DEFAULT untuk tanggal di luar rentang)."""
+    for year in sorted(set(years)):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_quote(partition_name(table_name, year))} "
+            f"PARTITION OF {_quote(table_name)} FOR VALUES {_year_bounds(year)}"
+        ))
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_quote(table_name + '_default')} PARTITION OF {_quote(table_name)} DEFAULT"
+    ))
+
+
+def _unique_with_key(indexdef: str, key: str) -> str:
+    """
+    Index unik pada tabel terpartisi wajib memuat kunci partisi, sehingga keunikannya melemah menjadi
+    per nilai kunci. Contoh: `uq_dataIzin_user_pending` menjadi satu izin Pending per (user_uid, tanggal),
+    bukan per user; batas satu Pending per user di mode partisi hanya dijaga oleh kunci baris user
+    (FOR UPDATE) di admit_izin_keluar, yang tidak bergantung pada partisi.
+    """
+    match = re.search(r"USING \w+ \((.*?)\)", indexdef)
+    if match is None or re.search(rf'\b"?{key}"?\b', match.group(1)):
+        return indexdef
+    logger.warning(
+        f"Index unik ditambah kunci partisi '{key}' dan hanya unik per nilai '{key}': {indexdef}"
+    )
+    return indexdef[:match.end(1)] + f", {key}" + indexdef[match.end(1):]
+
+
+def convert_to_partitioned(connection, table_name: str, key: str) -> None:
+    """
+    Mengubah tabel biasa menjadi tabel terpartisi RANGE(key) per tahun, dalam transaksi pemanggil.
+
+    Tabel arsip lama `{table}_{tahun}` di-ATTACH sebagai partisi (tanpa menyalin baris), baris live
+    disalin sekali ke partisi tahunnya. Foreign key dari tabel lain yang merujuk tabel ini dilepas,
+    karena PostgreSQL tidak mengizinkan foreign key ke tabel terpartisi tanpa kunci partisi.
+    Index unik ikut memuat kunci partisi (lihat _unique_with_key), sehingga jaminannya melemah.
+    """
+    legacy_name = f"{table_name}_legacy"
+    inspector = inspect(connection)
+
+    pk_name = inspector.get_pk_constraint(table_name)["name"]
+    index_defs = connection.execute(
+        text("SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :name"),
+        {"name": table_name},
+    ).all()
+    own_fks = inspector.get_foreign_keys(table_name)
+
+    for other in inspector.get_table_names():
+        for fk in inspector.get_foreign_keys(other):
+            if fk["referred_table"] == table_name and other != table_name:
+                logger.warning(f"Foreign key {fk['name']} ({other} -> {table_name}) dilepas untuk mode partisi.")
+                connection.execute(text(f"ALTER TABLE {_quote(other)} DROP CONSTRAINT {_quote(fk['name'])}"))
+
+    connection.execute(text(f"UPDATE {_quote(table_name)} SET {key} = (\"createOn\" AT TIME ZONE 'Asia/Jakarta')::date WHERE {key} IS NULL"))
+    connection.execute(text(f"ALTER TABLE {_quote(table_name)} RENAME TO {_quote(legacy_name)}"))
+    connection.execute(text(f"ALTER TABLE {_quote(legacy_name)} RENAME CONSTRAINT {_quote(pk_name)} TO {_quote(legacy_name + '_pkey')}"))
+    for index_name, _ in index_defs:
+        if index_name != pk_name:
+            connection.execute(text(f"ALTER INDEX {_quote(index_name)} RENAME TO {_quote(index_name + '_legacy')}"))
+
+    connection.execute(text(
+        f"CREATE TABLE {_quote(table_name)} (LIKE {_quote(legacy_name)} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})"
+    ))
+    connection.execute(text(f"ALTER TABLE {_quote(table_name)} ALTER COLUMN {key} SET NOT NULL"))
+    connection.execute(text(f"ALTER TABLE {_quote(table_name)} ADD CONSTRAINT {_quote(pk_name)} PRIMARY KEY (no, {key})"))
+
+    # Tabel arsip per tahun yang sudah ada menjadi partisi apa adanya
+    attached_years = set()
+    for archive_name in inspector.get_table_names():
+        match = re.fullmatch(rf"{re.escape(table_name)}_(\d{{4}})", archive_name)
+        if not match:
+            continue
+        year = int(match.group(1))
+        connection.execute(text(f"ALTER TABLE {_quote(archive_name)} ALTER COLUMN {key} SET NOT NULL"))
+        connection.execute(text(
+            f"ALTER TABLE {_quote(table_name)} ATTACH PARTITION {_quote(archive_name)} FOR VALUES {_year_bounds(year)}"
+        ))
+        attached_years.add(year)
+        logger.info(f"Tabel arsip '{archive_name}' di-attach sebagai partisi {table_name}.")
+
+    live_years = connection.execute(
+        text(f"SELECT DISTINCT EXTRACT(YEAR FROM {key})::int FROM {_quote(legacy_name)}")
+    ).scalars().all()
+    current_year = _current_year()
+    ensure_partitions(connection, table_name, (set(live_years) | {current_year, current_year + 1}) - attached_years)
+
+    connection.execute(text(f"INSERT INTO {_quote(table_name)} SELECT * FROM {_quote(legacy_name)}"))
+
+    sequence = connection.execute(
+        text("SELECT pg_get_serial_sequence(quote_ident(:name), 'no')"), {"name": legacy_name}
+    ).scalar()
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {_quote(table_name)}.no"))
+    connection.execute(text(f"DROP TABLE {_quote(legacy_name)}"))
+
+    for index_name, indexdef in index_defs:
+        if index_name == pk_name:
+            continue
+        # Definisi ditangkap sebelum rename, cukup pastikan targetnya tabel induk yang baru
+        indexdef = re.sub(r" ON \S+", f" ON {_quote(table_name)}", indexdef, count=1)
+        if indexdef.startswith("CREATE UNIQUE"):
+            indexdef = _unique_with_key(indexdef, key)
+        connection.execute(text(indexdef))
+
+    for fk in own_fks:
+        columns = ", ".join(_quote(c) for c in fk["constrained_columns"])
+        referred = ", ".join(_quote(c) for c in fk["referred_columns"])
+        connection.execute(text(
+            f"ALTER TABLE {_quote(table_name)} ADD FOREIGN KEY ({columns}) "
+            f"REFERENCES {_quote(fk['referred_table'])} ({referred})"
+        ))
+
+    logger.info(f"Tabel '{table_name}' sekarang dipartisi per tahun pada kolom '{key}'.")
+
+
+def enable_partitioning(connection) -> None:
+    """Dipanggil bootstrap skema (di bawah advisory lock) jika DB_PARTITIONING_ENABLED aktif."""
+    if connection.dialect.name != "postgresql":
+        logger.warning("DB_PARTITIONING_ENABLED hanya didukung di PostgreSQL, diabaikan.")
+        return
+    for table_name, key in PARTITIONED_TABLES.items():
+        if not is_partitioned(connection, table_name):
+            convert_to_partitioned(connection, table_name, key)
+    ensure_upcoming_partitions(connection)
+
+
+def ensure_upcoming_partitions(connection) -> None:
+    """Partisi tahun berjalan dan tahun depan dibuat lebih awal agar insert tidak jatuh ke partisi DEFAULT."""
+    current_year = _current_year()
+    for table_name in PARTITIONED_TABLES:
+        if is_partitioned(connection, table_name):
+            ensure_partitions(connection, table_name, [current_year, current_year + 1])
+
+
+def detach_old_partitions(connection, table_name: str, retain_years: int = None) -> list:
+    """
+    Pengarsipan di mode partisi: partisi tahun lama di-DETACH (hanya metadata, tanpa menyalin baris)
+    dan tetap tersedia sebagai tabel arsip `{table}_{tahun}`. Kebalikannya adalah attach_partition.
+    """
+    retain_years = retain_years or settings.PARTITION_RETAIN_YEARS
+    oldest_kept = _current_year() - retain_years + 1
+    detached = []
+    for name in list_partitions(connection, table_name):
+        match = re.fullmatch(rf"{re.escape(table_name)}_(\d{{4}})", name)
+        if match and int(match.group(1)) < oldest_kept:
+            connection.execute(text(f"ALTER TABLE {_quote(table_name)} DETACH PARTITION {_quote(name)}"))
+            detached.append(name)
+            logger.info(f"Partisi '{name}' di-detach dari '{table_name}'.")
+    return detached
+
+
+def attach_partition(connection, table_name: str, year: int) -> None:
+    """Mengembalikan tabel arsip `{table}_{tahun}` sebagai partisi aktif."""
+    connection.execute(text(
+        f"ALTER TABLE {_quote(table_name)} ATTACH PARTITION {_quote(partition_name(table_name, year))} "
+        f"FOR VALUES {_year_bounds(year)}"
+    ))
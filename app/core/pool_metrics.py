@@ -0,0 +1,154 @@
+# app/core/pool_metrics.py
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Batas atas bucket histogram waktu tunggu checkout, dalam milidetik
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Statistik satu pool koneksi di worker (proses) ini."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self._wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._connected_at: Dict[int, float] = {}
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def observe_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self._wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self._wait_total_ms += wait_ms
+            self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+            self.checkouts += 1
+        if wait_ms >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+            logger.warning(f"Checkout koneksi pool '{self.name}' menunggu {wait_ms:.1f} ms.")
+
+    def on_connect(self, connection_record) -> None:
+        with self._lock:
+            self._connected_at[id(connection_record)] = time.monotonic()
+            self.connects += 1
+
+    def on_close(self, connection_record) -> None:
+        with self._lock:
+            self._connected_at.pop(id(connection_record), None)
+
+    def on_invalidate(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - connected_at for connected_at in self._connected_at.values()]
+            histogram = {
+                f"le_{bucket}ms": count for bucket, count in zip(WAIT_BUCKETS_MS, self._wait_histogram)
+            }
+            histogram["le_inf"] = self._wait_histogram[-1]
+            wait = {
+                "count": self.checkouts,
+                "avg_ms": round(self._wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_ms": round(self._wait_max_ms, 3),
+                "histogram": histogram,
+            }
+            counters = {"connects": self.connects, "invalidations": self.invalidations}
+
+        return {
+            "name": self.name,
+            "pid": os.getpid(),
+            "size": _pool_value(pool, "size"),
+            "checked_out": _pool_value(pool, "checkedout"),
+            "checked_in": _pool_value(pool, "checkedin"),
+            "overflow": _pool_value(pool, "overflow"),
+            "status": pool.status(),
+            "checkout_wait": wait,
+            "connection_age_seconds": {
+                "count": len(ages),
+                "min": round(min(ages), 1) if ages else None,
+                "max": round(max(ages), 1) if ages else None,
+                "avg": round(sum(ages) / len(ages), 1) if ages else None,
+            },
+            **counters,
+        }
+
+
+def _pool_value(pool, method: str):
+    # Pool bawaan SQLite (NullPool/SingletonThreadPool) tidak punya semua metode QueuePool
+    fn = getattr(pool, method, None)
+    return fn() if callable(fn) else None
+
+
+_metrics: Dict[str, PoolMetrics] = {}
+
+
+def get_metrics(name: str) -> PoolMetrics:
+    if name not in _metrics:
+        _metrics[name] = PoolMetrics(name)
+    return _metrics[name]
+
+
+def get_all_snapshots() -> list:
+    return [metrics.snapshot() for metrics in _metrics.values() if metrics.engine is not None]
+
+
+class _CheckoutTimingMixin:
+    # Nama logging pool dipertahankan saat pool dibuat ulang (engine.dispose()),
+    # sehingga metrik tetap terhubung ke pool yang benar.
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            get_metrics(self._orig_logging_name).observe_wait((time.perf_counter() - started) * 1000)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(sync_engine, name: str) -> None:
+    """Memasang listener event pool untuk umur koneksi, invalidasi, dan log kehabisan pool."""
+    metrics = get_metrics(name)
+    metrics.engine = sync_engine
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.on_connect(connection_record)
+        logger.debug(f"Pool '{name}' membuka koneksi baru.")
+
+    @event.listens_for(sync_engine, "close")
+    def _on_close(dbapi_connection, connection_record):
+        metrics.on_close(connection_record)
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.on_invalidate()
+        logger.warning(f"Koneksi pool '{name}' diinvalidasi: {exception}")
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool = sync_engine.pool
+        if isinstance(pool, QueuePool) and pool.checkedout() >= pool.size() + pool._max_overflow:
+            logger.warning(f"Pool '{name}' penuh: {pool.status()}")
@@ -0,0 +1,102 @@
+# app/core/query_stats.py
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-ms"
+
+# Anggaran jumlah statement per route (path template FastAPI, method).
+# Route yang melebihi anggarannya dicatat sebagai warning.
+QUERY_BUDGETS = {
+    ("GET", "/api/users/"): 2,
+    ("GET", "/api/users/{user_uid}"): 2,
+    ("GET", "/api/roles/"): 1,
+    ("GET", "/api/shifts/"): 3,
+    ("GET", "/api/shifts/{shift_no}"): 3,
+    ("GET", "/api/dataizin/"): 3,
+    ("GET", "/api/dataizin/all-pending/"): 3,
+    ("GET", "/api/dataizin/all-history/"): 3,
+    ("GET", "/api/dataizin/archive/"): 6,
+    ("GET", "/api/datatelat/"): 5,
+    ("GET", "/api/datatelat/ledger/"): 2,
+}
+
+
+class RequestQueryStats:
+    """Jumlah statement dan total waktu DB untuk satu request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> list:
+        """Statement identik yang dijalankan berulang kali, kemungkinan besar pola N+1."""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+# Objek stats dibagikan lewat context: run_sync (greenlet), threadpool FastAPI
+# dan offloader menyalin context sehingga semuanya menulis ke objek yang sama.
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request_stats() -> RequestQueryStats:
+    stats = RequestQueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_request_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_started_at")
+    if stats is None or not started:
+        return
+    stats.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+def report_request_stats(request, response, stats: RequestQueryStats) -> None:
+    """Menambahkan header statistik query dan mencatat pola N+1 / pelanggaran anggaran."""
+    response.headers[QUERY_COUNT_HEADER] = str(stats.count)
+    response.headers[QUERY_TIME_HEADER] = f"{stats.total_ms:.1f}"
+
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", request.url.path)
+
+    for statement, n in stats.repeated_statements(settings.QUERY_N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            f"Kemungkinan N+1 pada {request.method} {route_path}: statement yang sama dijalankan {n}x: "
+            f"{' '.join(statement.split())[:200]}"
+        )
+
+    budget = QUERY_BUDGETS.get((request.method, route_path))
+    if budget is not None and stats.count > budget:
+        logger.warning(
+            f"Anggaran query terlampaui pada {request.method} {route_path}: "
+            f"{stats.count} statement (anggaran {budget}), {stats.total_ms:.1f} ms."
+        )
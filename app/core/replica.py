@@ -0,0 +1,159 @@
+# app/core/replica.py
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import (
+    AsyncSessionLocal,
+    SessionLocal,
+    get_async_database_url,
+    get_pool_kwargs,
+)
+from app.core.pool_metrics import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Cookie penanda bahwa klien baru saja menulis; bacaan berikutnya diarahkan ke primary
+LAST_WRITE_COOKIE = "db_last_write"
+# Header opsional dari klien untuk memaksa bacaan dari primary
+CONSISTENCY_HEADER = "X-Read-Consistency"
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_PG_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+replica_engine = None
+ReplicaSessionLocal = None
+AsyncReplicaSessionLocal = None
+replica_async_engine = None
+
+if settings.REPLICA_DATABASE_URL:
+    replica_engine = create_engine(
+        settings.REPLICA_DATABASE_URL,
+        **get_pool_kwargs(settings.REPLICA_DATABASE_URL, "replica"),
+    )
+    instrument_engine(replica_engine, "replica")
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+    _replica_async_url = get_async_database_url(settings.REPLICA_DATABASE_URL)
+    replica_async_engine = create_async_engine(
+        _replica_async_url,
+        connect_args=(
+            {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+            if _replica_async_url.drivername == "postgresql+asyncpg" else {}
+        ),
+        **get_pool_kwargs(_replica_async_url, "replica_async", is_async=True),
+    )
+    instrument_engine(replica_async_engine.sync_engine, "replica_async")
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=replica_async_engine, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaLagMonitor:
+    """
+    Mengukur replication lag replica secara berkala (dari job scheduler, bukan dari request).
+    Jalur request hanya membaca nilai terakhir; nilai yang basi dianggap tidak sehat.
+    """
+
+    def __init__(self, max_lag_seconds: float, check_interval_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.lag_seconds: Optional[float] = None
+        self.checked_at: float = 0.0
+        self._healthy = False
+
+    def refresh(self) -> None:
+        if replica_engine is None:
+            return
+        try:
+            with replica_engine.connect() as connection:
+                if connection.dialect.name == "postgresql":
+                    lag = float(connection.execute(_PG_LAG_QUERY).scalar() or 0)
+                else:
+                    # Stand-in replica non-PostgreSQL (mis. file SQLite kedua) tidak memiliki lag
+                    lag = 0.0
+        except Exception as e:
+            logger.warning(f"Gagal mengukur lag replica: {e}")
+            lag = None
+
+        self.lag_seconds = lag
+        self.checked_at = time.monotonic()
+        healthy = lag is not None and lag <= self.max_lag_seconds
+        if healthy != self._healthy:
+            if healthy:
+                logger.info(f"Replica kembali dipakai untuk bacaan (lag {lag:.1f} s).")
+            else:
+                logger.warning(f"Replica tidak dipakai, bacaan dialihkan ke primary (lag {lag} s).")
+        self._healthy = healthy
+
+    def is_healthy(self) -> bool:
+        # Hasil pengukuran yang terlalu lama dianggap tidak dapat dipercaya
+        if time.monotonic() - self.checked_at > self.check_interval_seconds * 3:
+            return False
+        return self._healthy
+
+
+replica_monitor = ReplicaLagMonitor(
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval_seconds=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+)
+
+
+def _recently_wrote(request: Request) -> bool:
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong":
+        return True
+    last_write = request.cookies.get(LAST_WRITE_COOKIE)
+    if not last_write:
+        return False
+    try:
+        return time.time() - float(last_write) < settings.READ_AFTER_WRITE_WINDOW_SECONDS
+    except ValueError:
+        return False
+
+
+def should_use_replica(request: Request) -> bool:
+    """Bacaan diarahkan ke replica hanya jika replica ada, sehat, dan klien tidak baru saja menulis."""
+    return replica_engine is not None and replica_monitor.is_healthy() and not _recently_wrote(request)
+
+
+def mark_write(request: Request, response) -> None:
+    """Dipanggil middleware: tandai klien yang baru saja menulis agar bacaan berikutnya ke primary."""
+    if replica_engine is None or request.method in _SAFE_METHODS or response.status_code >= 400:
+        return
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        str(time.time()),
+        max_age=settings.READ_AFTER_WRITE_WINDOW_SECONDS,
+        httponly=True,
+        samesite="none",
+        secure=True,
+    )
+
+
+def get_read_db(request: Request):
+    """Seperti get_db, tetapi memakai replica untuk endpoint baca jika memungkinkan."""
+    db = ReplicaSessionLocal() if should_use_replica(request) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Seperti get_async_db, tetapi memakai replica untuk endpoint baca jika memungkinkan."""
+    session_factory = AsyncReplicaSessionLocal if should_use_replica(request) else AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
@@ -0,0 +1,126 @@
+# app/core/schema.py
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.partitioning import enable_partitioning
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI_PATH = Path(__file__).resolve().parents[2] / "alembic.ini"
+# Revisi yang setara dengan tabel hasil create_all sebelum Alembic dipakai
+BASELINE_REVISION = "0001_baseline"
+# Kunci advisory lock PostgreSQL agar hanya satu worker yang menjalankan migrasi
+_BOOTSTRAP_LOCK_KEY = 7254011
+
+# Tabel status bootstrap sengaja memakai MetaData terpisah, bukan Base.metadata,
+# supaya tidak ikut dalam fingerprint maupun migrasi Alembic.
+_bootstrap_metadata = MetaData()
+schema_bootstrap_table = Table(
+    "schema_bootstrap",
+    _bootstrap_metadata,
+    Column("id", String, primary_key=True),
+    Column("fingerprint", String, nullable=False),
+    Column("updatedOn", DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+)
+
+
+def get_alembic_config(connection=None) -> Config:
+    config = Config(str(ALEMBIC_INI_PATH))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def compute_schema_fingerprint(engine) -> str:
+    """
+    Hash dari head migrasi Alembic, DDL semua model, dan mode partisi.
+    Berubah setiap kali ada migrasi baru, definisi model berubah, atau mode partisi diaktifkan.
+    """
+    script = ScriptDirectory.from_config(get_alembic_config())
+    digest = hashlib.sha256()
+    for head in sorted(script.get_heads()):
+        digest.update(head.encode("utf-8"))
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode("utf-8"))
+    if settings.DB_PARTITIONING_ENABLED:
+        digest.update(b"partitioned")
+    return digest.hexdigest()
+
+
+def _select_fingerprint(connection) -> Optional[str]:
+    return connection.execute(
+        select(schema_bootstrap_table.c.fingerprint).where(schema_bootstrap_table.c.id == "default")
+    ).scalar()
+
+
+def _read_stored_fingerprint(connection) -> Optional[str]:
+    try:
+        return _select_fingerprint(connection)
+    except DBAPIError:
+        # Tabel status belum ada (database baru atau sebelum bootstrap pertama)
+        connection.rollback()
+        return None
+
+
+def _store_fingerprint(connection, fingerprint: str) -> None:
+    schema_bootstrap_table.create(connection, checkfirst=True)
+    updated = connection.execute(
+        schema_bootstrap_table.update()
+        .where(schema_bootstrap_table.c.id == "default")
+        .values(fingerprint=fingerprint)
+    )
+    if updated.rowcount == 0:
+        connection.execute(schema_bootstrap_table.insert().values(id="default", fingerprint=fingerprint))
+
+
+def bootstrap_schema(engine) -> bool:
+    """
+    Memastikan skema database sesuai dengan migrasi Alembic terbaru.
+
+    Jika fingerprint yang tersimpan sama dengan fingerprint saat ini, tidak ada refleksi
+    maupun DDL yang dijalankan (cukup satu SELECT). Mengembalikan True jika migrasi dijalankan.
+    """
+    fingerprint = compute_schema_fingerprint(engine)
+
+    with engine.connect() as connection:
+        if _read_stored_fingerprint(connection) == fingerprint:
+            logger.info("Fingerprint skema tidak berubah, bootstrap skema dilewati.")
+            return False
+
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _BOOTSTRAP_LOCK_KEY})
+
+        inspector = inspect(connection)
+        # Worker lain mungkin sudah menyelesaikan migrasi selama kita menunggu lock
+        if inspector.has_table(schema_bootstrap_table.name) and _select_fingerprint(connection) == fingerprint:
+            logger.info("Skema sudah dimigrasikan oleh worker lain.")
+            return False
+
+        config = get_alembic_config(connection)
+        if not inspector.has_table("alembic_version") and inspector.has_table("users"):
+            # Database lama yang dibuat oleh create_all: tandai sebagai baseline tanpa DDL
+            logger.info(f"Database tanpa riwayat Alembic terdeteksi, menandai revisi '{BASELINE_REVISION}'.")
+            command.stamp(config, BASELINE_REVISION)
+
+        started = time.perf_counter()
+        command.upgrade(config, "head")
+        if settings.DB_PARTITIONING_ENABLED:
+            enable_partitioning(connection)
+        _store_fingerprint(connection, fingerprint)
+        logger.info(f"Migrasi skema selesai dalam {(time.perf_counter() - started) * 1000:.0f} ms.")
+    return True
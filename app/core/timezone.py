@@ -0,0 +1,56 @@
+# app/core/timezone.py
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+# Zona waktu operasional aplikasi (WIB). Indonesia tidak memakai DST, jadi offset tetap +7.
+LOCAL_TIMEZONE_NAME = "Asia/Jakarta"
+GMT7_OFFSET = timedelta(hours=7)
+GMT7_TIMEZONE = timezone(GMT7_OFFSET)
+
+
+def get_local_datetime_gmt7(dt_utc: datetime) -> datetime:
+    """Mengonversi datetime UTC menjadi datetime dengan zona waktu GMT+7."""
+    if dt_utc.tzinfo is None:
+        # Jika datetime naive, asumsikan itu UTC dan buat aware
+        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+    return dt_utc.astimezone(GMT7_TIMEZONE)
+
+
+def convert_to_utc_aware(dt: datetime) -> datetime:
+    """Mengonversi datetime menjadi UTC aware jika belum; datetime naive dianggap UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def now_local() -> datetime:
+    return datetime.now(GMT7_TIMEZONE)
+
+
+def today_local() -> date:
+    return now_local().date()
+
+
+class local_date(FunctionElement):
+    """
+    Tanggal lokal GMT+7 dari kolom timestamptz, mis. `local_date(Izin.createOn) == tanggal`.
+    Di PostgreSQL dirender persis seperti expression index `ix_dataIzin_*_local_date`,
+    sehingga filter "hari ini" / "per tanggal" menjadi index lookup.
+    """
+    type = Date()
+    name = "local_date"
+    inherit_cache = True
+
+
+@compiles(local_date, "postgresql")
+def _local_date_postgresql(element, compiler, **kw):
+    return f"(({compiler.process(element.clauses, **kw)} AT TIME ZONE '{LOCAL_TIMEZONE_NAME}')::date)"
+
+
+@compiles(local_date)
+def _local_date_default(element, compiler, **kw):
+    # SQLite (dan dialek lain untuk pengujian lokal): offset tetap +7 jam
+    return f"date({compiler.process(element.clauses, **kw)}, '+7 hours')"
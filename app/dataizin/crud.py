@@ -1,48 +1,28 @@
 # app/dataizin/crud.py (Revisi dengan hapus 'jabatan')
 
+from sqlalchemy import delete, exists, extract, select, func, union_all
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 from app.dataizin import models, schemas
+from app.core.duration import IZIN_BATAS_DETIK, duration_seconds, format_durasi
+from app.core.outbox import enqueue_notification
+from app.core.timezone import get_local_datetime_gmt7, local_date, today_local
+from app.core.archive import archive_models, catch_up_predicate, get_archive_table, get_checkpoint, set_watermark
+from app.core.partitioning import detach_old_partitions, is_partitioned, list_partitions
+from app.core.pagination import apply_keyset, keyset_after
+from app.core.config import settings
+from app.users import models as user_models
+from app.datatelat.models import DataTelat
 from datetime import datetime, timedelta, date, timezone
-from typing import Optional, List # Tambahkan List
-import enum # Tambahkan enum
+from typing import Optional, List, Tuple # Tambahkan List
 import logging # Tambahkan logging
+import time
 
 # Inisialisasi logger
 logger = logging.getLogger(__name__)
 # Contoh konfigurasi dasar (sesuaikan dengan setup logging aplikasi Anda)
 # logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# Definisikan offset untuk GMT+7
-GMT7_OFFSET = timedelta(hours=7)
-GMT7_TIMEZONE = timezone(GMT7_OFFSET)
-
-# --- Tambahan: Fungsi untuk mengonversi UTC ke GMT+7 ---
-def get_local_datetime_gmt7(dt_utc: datetime) -> datetime:
-    """Mengonversi datetime UTC menjadi datetime dengan zona waktu GMT+7."""
-    if dt_utc.tzinfo is None:
-        # Jika datetime naive, asumsikan itu UTC dan buat aware
-        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    
-    # Konversi ke zona waktu GMT+7
-    return dt_utc.astimezone(GMT7_TIMEZONE)
-
-# --- Tambahan: Fungsi untuk memastikan datetime adalah UTC aware ---
-def convert_to_utc_aware(dt: datetime) -> datetime:
-    """Mengonversi datetime menjadi UTC aware jika belum."""
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc)
-
-# --- Fungsi dummy untuk delete_data_telat_by_izin_no (Anda perlu mengimplementasikannya) ---
-def delete_data_telat_by_izin_no(db: Session, izin_no: int):
-    """
-    Fungsi placeholder untuk menghapus data terkait 'data_telat' berdasarkan nomor izin.
-    Anda perlu mengimplementasikan logika ini berdasarkan model 'data_telat' Anda.
-    """
-    logger.info(f"Menghapus data terkait 'data_telat' untuk izin_no: {izin_no} (placeholder)")
-    # Contoh: db.query(models.DataTelat).filter(models.DataTelat.izin_no == izin_no).delete()
-    # db.commit()
-
 # --- Fungsi yang sudah ada (tanpa perubahan besar, kecuali yang dimodifikasi) ---
 def get_izin(db: Session, izin_no: int):
     return db.query(models.Izin).options(joinedload(models.Izin.user)).filter(models.Izin.no == izin_no).first()
@@ -50,7 +30,7 @@ def get_izin(db: Session, izin_no: int):
 def get_izins(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Izin).options(joinedload(models.Izin.user)).offset(skip).limit(limit).all()
 
-def create_izin(db: Session, izin: schemas.IzinCreate):
+def _add_izin(db: Session, izin: schemas.IzinCreate) -> models.Izin:
     # Pastikan jamKeluar adalah UTC saat disimpan
     if izin.jamKeluar.tzinfo is None:
         izin.jamKeluar = izin.jamKeluar.replace(tzinfo=timezone.utc)
@@ -61,9 +41,13 @@ def create_izin(db: Session, izin: schemas.IzinCreate):
         jamKeluar=izin.jamKeluar,
         ipKeluar=izin.ipKeluar,
         status="Pending",
-        durasi=None
+        durasi_detik=None
     )
     db.add(db_dataIzin)
+    return db_dataIzin
+
+def create_izin(db: Session, izin: schemas.IzinCreate):
+    db_dataIzin = _add_izin(db, izin)
     db.commit()
     db.refresh(db_dataIzin)
     return db_dataIzin
@@ -81,38 +65,33 @@ def update_izin_kembali(db: Session, izin_no: int, jamKembali: datetime, ipKemba
     db_dataIzin.ipKembali = ipKembali
 
     if db_dataIzin.jamKeluar and db_dataIzin.jamKembali:
-        jam_keluar_aware = db_dataIzin.jamKeluar if db_dataIzin.jamKeluar.tzinfo is not None else db_dataIzin.jamKeluar.replace(tzinfo=timezone.utc)
-        jam_kembali_aware = db_dataIzin.jamKembali if db_dataIzin.jamKembali.tzinfo is not None else db_dataIzin.jamKembali.replace(tzinfo=timezone.utc)
-
-        delta = jam_kembali_aware - jam_keluar_aware
-        total_seconds = int(delta.total_seconds())
-
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-
-        duration_parts = []
-        if hours > 0:
-            duration_parts.append(f"{hours} Jam")
-        if minutes > 0:
-            duration_parts.append(f"{minutes} Menit")
-        if seconds > 0:
-            duration_parts.append(f"{seconds} Detik")
-
-        if not duration_parts:
-            db_dataIzin.durasi = "0 Detik"
-        else:
-            db_dataIzin.durasi = " ".join(duration_parts)
+        # Durasi disimpan sebagai detik; teks tampilan dirender oleh schema
+        total_seconds = duration_seconds(db_dataIzin.jamKeluar, db_dataIzin.jamKembali)
+        db_dataIzin.durasi_detik = total_seconds
 
-        if total_seconds > (15 * 60):
+        if total_seconds > IZIN_BATAS_DETIK:
             db_dataIzin.status = "Lewat Waktu"
         else:
             db_dataIzin.status = "Tepat Waktu"
     else:
         db_dataIzin.status = "Pending"
-        db_dataIzin.durasi = None
+        db_dataIzin.durasi_detik = None
 
     db.add(db_dataIzin)
+    # Notifikasi izin kembali masuk outbox dalam transaksi yang sama
+    user_name = db_dataIzin.user.fullname if db_dataIzin.user and db_dataIzin.user.fullname else "Seorang pengguna"
+    if db_dataIzin.status == "Lewat Waktu":
+        title = "Izin Kembali Lewat Waktu!"
+        body = f"{user_name} telah kembali dari izin dengan status 'Lewat Waktu'. Durasi: {format_durasi(db_dataIzin.durasi_detik)}"
+    else:
+        title = "Izin Kembali Tepat Waktu!"
+        body = f"{user_name} telah kembali dari izin dengan status 'Tepat Waktu'. Durasi: {format_durasi(db_dataIzin.durasi_detik)}"
+    enqueue_notification(
+        db,
+        title=title,
+        body=body,
+        data={"type": "izin_kembali", "izin_no": str(db_dataIzin.no), "user_uid": db_dataIzin.user_uid, "status": db_dataIzin.status}
+    )
     db.commit()
     db.refresh(db_dataIzin)
     return db_dataIzin
@@ -142,30 +121,11 @@ def update_izin(db: Session, izin_no: int, izin_update: schemas.IzinUpdate):
             setattr(db_dataIzin, key, value)
 
     if db_dataIzin.jamKeluar and db_dataIzin.jamKembali:
-        jam_keluar_aware = db_dataIzin.jamKeluar if db_dataIzin.jamKeluar.tzinfo is not None else db_dataIzin.jamKeluar.replace(tzinfo=timezone.utc)
-        jam_kembali_aware = db_dataIzin.jamKembali if db_dataIzin.jamKembali.tzinfo is not None else db_dataIzin.jamKembali.replace(tzinfo=timezone.utc)
-
-        delta = jam_kembali_aware - jam_keluar_aware
-        total_seconds = int(delta.total_seconds())
-
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-
-        duration_parts = []
-        if hours > 0:
-            duration_parts.append(f"{hours} Jam")
-        if minutes > 0:
-            duration_parts.append(f"{minutes} Menit")
-        if seconds > 0:
-            duration_parts.append(f"{seconds} Detik")
-
-        if not duration_parts:
-            db_dataIzin.durasi = "0 Detik"
-        else:
-            db_dataIzin.durasi = " ".join(duration_parts)
+        # Durasi disimpan sebagai detik; teks tampilan dirender oleh schema
+        total_seconds = duration_seconds(db_dataIzin.jamKeluar, db_dataIzin.jamKembali)
+        db_dataIzin.durasi_detik = total_seconds
 
-        if total_seconds > (15 * 60):
+        if total_seconds > IZIN_BATAS_DETIK:
             db_dataIzin.status = "Lewat Waktu"
         else:
             db_dataIzin.status = "Tepat Waktu"
@@ -190,26 +150,20 @@ def delete_izin(db: Session, izin_no: int):
         return True
     return False
 
+def get_max_daily_izin(now_utc: Optional[datetime] = None) -> int:
+    """Batas izin harian: 4 kali, atau 6 kali pada hari Jumat (GMT+7)."""
+    local_now = get_local_datetime_gmt7(now_utc or datetime.now(timezone.utc))
+    return 6 if local_now.weekday() == 4 else 4 # 0=Senin, 4=Jumat
+
 def get_izin_count_for_today(db: Session, user_uid: str) -> int:
     """
     Menghitung jumlah izin yang dibuat oleh user_uid pada tanggal lokal GMT+7 hari ini.
     Kita harus mengonversi tanggal izin yang tersimpan (UTC) ke GMT+7 untuk perbandingan.
     """
-    now_utc = datetime.now(timezone.utc)
-    today_gmt7 = get_local_datetime_gmt7(now_utc).date()
-
-    # Mengambil awal dan akhir hari GMT+7 dalam UTC
-    start_of_day_gmt7_aware = datetime.combine(today_gmt7, datetime.min.time()).replace(tzinfo=GMT7_TIMEZONE)
-    end_of_day_gmt7_aware = datetime.combine(today_gmt7, datetime.max.time()).replace(tzinfo=GMT7_TIMEZONE)
-
-    # Mengonversi kembali ke UTC untuk perbandingan di database
-    start_of_day_utc = start_of_day_gmt7_aware.astimezone(timezone.utc)
-    end_of_day_utc = end_of_day_gmt7_aware.astimezone(timezone.utc)
-
+    # Index lookup pada ix_dataIzin_user_local_date (user_uid, tanggal lokal createOn)
     count = db.query(models.Izin).filter(
         models.Izin.user_uid == user_uid,
-        models.Izin.createOn >= start_of_day_utc,
-        models.Izin.createOn <= end_of_day_utc
+        local_date(models.Izin.createOn) == today_local()
     ).count()
     return count
 
@@ -220,27 +174,104 @@ def get_pending_izin_by_user(db: Session, user_uid: str):
         models.Izin.status == "Pending"
     ).first()
 
-def get_izin_history_by_user(db: Session, user_uid: str, tanggal: Optional[date] = None, skip: int = 0, limit: int = 100):
+class IzinAdmissionRejected(Exception):
+    """Izin keluar ditolak oleh pemeriksaan admission; `reason` salah satu dari USER_NOT_FOUND, PENDING, QUOTA."""
+    USER_NOT_FOUND = "user_not_found"
+    PENDING = "pending"
+    QUOTA = "quota"
+
+    def __init__(self, reason: str, user_name: Optional[str] = None, max_daily: Optional[int] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.user_name = user_name
+        self.max_daily = max_daily
+
+def admit_izin_keluar(db: Session, izin: schemas.IzinCreate):
+    """
+    Pemeriksaan user, izin Pending, dan kuota harian lalu insert (beserta notifikasi outbox) dalam satu transaksi.
+    Baris user dikunci (FOR UPDATE) lebih dulu, baru kemudian izin dihitung dengan statement terpisah:
+    di READ COMMITTED setiap statement mendapat snapshot baru, sehingga tap kedua yang menunggu kunci
+    melihat izin Pending yang sudah di-commit tap pertama. Partial unique index `uq_dataIzin_user_pending`
+    tetap menjadi pengaman terakhir, kecuali di mode partisi: di sana index tersebut hanya unik per
+    (user_uid, tanggal), sehingga kunci baris user inilah satu-satunya jaminan satu Pending per user.
+    Mengembalikan tuple (izin, fullname user).
+    """
+    today = today_local()
+    max_daily = get_max_daily_izin()
+
+    locked = db.execute(
+        select(user_models.User.fullname)
+        .where(user_models.User.uid == izin.user_uid)
+        .with_for_update()
+    ).first()
+    if locked is None:
+        db.rollback()
+        raise IzinAdmissionRejected(IzinAdmissionRejected.USER_NOT_FOUND)
+    fullname = locked.fullname
+
+    # Statement kedua (setelah kunci didapat) agar hitungan tidak memakai snapshot sebelum menunggu kunci
+    pending_count = (
+        select(func.count())
+        .where(models.Izin.user_uid == izin.user_uid, models.Izin.status == "Pending")
+        .scalar_subquery()
+    )
+    today_count = (
+        select(func.count())
+        .where(models.Izin.user_uid == izin.user_uid, local_date(models.Izin.createOn) == today)
+        .scalar_subquery()
+    )
+    pending_n, today_n = db.execute(select(pending_count, today_count)).one()
+    if pending_n:
+        db.rollback()
+        raise IzinAdmissionRejected(IzinAdmissionRejected.PENDING, user_name=fullname)
+    if today_n >= max_daily:
+        db.rollback()
+        raise IzinAdmissionRejected(IzinAdmissionRejected.QUOTA, user_name=fullname, max_daily=max_daily)
+
+    if izin.jamKeluar is None:
+        izin.jamKeluar = datetime.now(timezone.utc)
+    try:
+        db_dataIzin = _add_izin(db, izin)
+        db.flush()
+        # Notifikasi izin keluar masuk outbox; commit sekaligus melepas kunci baris user
+        enqueue_notification(
+            db,
+            title="Izin Keluar Baru!",
+            body=f"{fullname or 'Seorang pengguna'} baru saja memulai izin keluar.",
+            data={"type": "izin_keluar", "izin_no": str(db_dataIzin.no), "user_uid": db_dataIzin.user_uid}
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise IzinAdmissionRejected(IzinAdmissionRejected.PENDING, user_name=fullname)
+    db.refresh(db_dataIzin)
+    return db_dataIzin, fullname
+
+# Urutan daftar izin; `no` sebagai tiebreak unik untuk keyset pagination
+IZIN_SORT_ATTRS = ["tanggal", "createOn", "no"]
+
+def _izin_sort_columns():
+    return [getattr(models.Izin, attr) for attr in IZIN_SORT_ATTRS]
+
+def _izin_history_page(query, tanggal: Optional[date], skip: int, limit: int, cursor: Optional[str]):
+    """
+    Filter tanggal dan paginasi bersama untuk riwayat izin. Filter tanggal memakai tanggal lokal
+    GMT+7 dari `createOn` (expression index yang sama). Dengan cursor (keyset) halaman dalam tetap
+    cepat; offset dipertahankan untuk klien lama.
+    """
+    if tanggal:
+        query = query.filter(local_date(models.Izin.createOn) == tanggal)
+    query = apply_keyset(query, _izin_sort_columns(), cursor)
+    if cursor is None:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def get_izin_history_by_user(db: Session, user_uid: str, tanggal: Optional[date] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
     """Mengambil riwayat izin untuk user tertentu, dengan opsi filter tanggal."""
     query = db.query(models.Izin).options(joinedload(models.Izin.user)).filter(
         models.Izin.user_uid == user_uid
     )
-    if tanggal:
-        # Mengonversi tanggal lokal input menjadi rentang UTC untuk query
-        start_of_target_day_gmt7 = datetime.combine(tanggal, datetime.min.time()).replace(tzinfo=GMT7_TIMEZONE)
-        end_of_target_day_gmt7 = datetime.combine(tanggal, datetime.max.time()).replace(tzinfo=GMT7_TIMEZONE)
-        
-        start_of_target_day_utc = start_of_target_day_gmt7.astimezone(timezone.utc)
-        end_of_target_day_utc = end_of_target_day_gmt7.astimezone(timezone.utc)
-        
-        query = query.filter(
-            models.Izin.createOn >= start_of_target_day_utc,
-            models.Izin.createOn <= end_of_target_day_utc
-        )
-    
-    query = query.order_by(models.Izin.tanggal.desc(), models.Izin.createOn.desc())
-    
-    return query.offset(skip).limit(limit).all()
+    return _izin_history_page(query, tanggal, skip, limit, cursor)
 
 def get_all_pending_izins(db: Session, skip: int = 0, limit: int = 100):
     """Mengambil semua izin yang statusnya 'Pending' dari semua user."""
@@ -248,29 +279,79 @@ def get_all_pending_izins(db: Session, skip: int = 0, limit: int = 100):
         models.Izin.status == "Pending"
     ).offset(skip).limit(limit).all()
 
-def get_all_izins_history(db: Session, tanggal: Optional[date] = None, skip: int = 0, limit: int = 100):
+def get_all_izins_history(db: Session, tanggal: Optional[date] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
     """
     Mengambil semua riwayat izin dari semua user, dengan opsi filter tanggal.
     Filter tanggal bekerja berdasarkan tanggal lokal GMT+7 dari `createOn`.
     """
     query = db.query(models.Izin).options(joinedload(models.Izin.user))
-
-    if tanggal:
-        # Mengonversi tanggal lokal input menjadi rentang UTC untuk query
-        start_of_target_day_gmt7 = datetime.combine(tanggal, datetime.min.time()).replace(tzinfo=GMT7_TIMEZONE)
-        end_of_target_day_gmt7 = datetime.combine(tanggal, datetime.max.time()).replace(tzinfo=GMT7_TIMEZONE)
-        
-        start_of_target_day_utc = start_of_target_day_gmt7.astimezone(timezone.utc)
-        end_of_target_day_utc = end_of_target_day_gmt7.astimezone(timezone.utc)
-        
-        query = query.filter(
-            models.Izin.createOn >= start_of_target_day_utc,
-            models.Izin.createOn <= end_of_target_day_utc
-        )
-    
-    query = query.order_by(models.Izin.tanggal.desc(), models.Izin.createOn.desc())
-    
-    return query.offset(skip).limit(limit).all()
+    return _izin_history_page(query, tanggal, skip, limit, cursor)
+
+def get_izin_durasi_summary(db: Session, user_uid: Optional[str] = None, tanggal_mulai: Optional[date] = None, tanggal_selesai: Optional[date] = None) -> dict:
+    """Jumlah, total, dan rata-rata durasi izin yang sudah selesai, dihitung dengan SUM/AVG di database."""
+    query = db.query(
+        func.count(models.Izin.no),
+        func.coalesce(func.sum(models.Izin.durasi_detik), 0),
+        func.avg(models.Izin.durasi_detik),
+    ).filter(models.Izin.durasi_detik.isnot(None))
+
+    if user_uid:
+        query = query.filter(models.Izin.user_uid == user_uid)
+    if tanggal_mulai:
+        query = query.filter(models.Izin.tanggal >= tanggal_mulai)
+    if tanggal_selesai:
+        query = query.filter(models.Izin.tanggal <= tanggal_selesai)
+
+    jumlah, total_detik, rata_rata_detik = query.one()
+    return {
+        "jumlah": jumlah,
+        "total_detik": int(total_detik),
+        "rata_rata_detik": float(rata_rata_detik) if rata_rata_detik is not None else None,
+    }
+
+def search_izin_all_years(
+    db: Session,
+    tanggal_mulai: date,
+    tanggal_selesai: date,
+    user_uid: Optional[str] = None,
+    status: Optional[str] = None,
+    descending: bool = True,
+    limit: int = 100,
+    after: Optional[tuple] = None,
+) -> list:
+    """
+    Mencari izin di tabel live dan semua tabel arsip `dataIzin_{tahun}` dalam rentang tanggal
+    sebagai satu UNION ALL, diurutkan (tanggal, no) dengan keyset pagination.
+    `after` adalah (tanggal, no) baris terakhir halaman sebelumnya.
+    Mengembalikan baris (mapping) kolom dataIzin.
+    """
+    izin_table = models.Izin.__table__
+    tables = [izin_table]
+    # Di mode partisi, partisi yang masih ter-attach sudah termasuk dalam tabel live
+    attached = set(list_partitions(db.connection(), izin_table.name)) if is_partitioned(db.connection(), izin_table.name) else set()
+    for year in range(tanggal_mulai.year, tanggal_selesai.year + 1):
+        archive_table_name = f"{izin_table.name}_{year}"
+        if archive_table_name not in attached and archive_models.table_exists(db.get_bind(), archive_table_name):
+            tables.append(archive_models.get_model(izin_table.name, year).__table__)
+
+    branches = []
+    for table in tables:
+        columns = [table.c[column.name] for column in izin_table.columns]
+        branch = select(*columns).where(table.c.tanggal >= tanggal_mulai, table.c.tanggal <= tanggal_selesai)
+        if user_uid:
+            branch = branch.where(table.c.user_uid == user_uid)
+        if status:
+            branch = branch.where(table.c.status == status)
+        if after is not None:
+            branch = branch.where(keyset_after([table.c.tanggal, table.c.no], list(after), descending))
+        order = [table.c.tanggal.desc(), table.c.no.desc()] if descending else [table.c.tanggal.asc(), table.c.no.asc()]
+        # Setiap cabang sudah diurutkan dan dibatasi, sehingga UNION ALL hanya menggabungkan `limit` baris per tabel
+        branch_subquery = branch.order_by(*order).limit(limit).subquery()
+        branches.append(select(*branch_subquery.c))
+
+    combined = union_all(*branches).subquery() if len(branches) > 1 else branches[0].subquery()
+    order = [combined.c.tanggal.desc(), combined.c.no.desc()] if descending else [combined.c.tanggal.asc(), combined.c.no.asc()]
+    return db.execute(select(combined).order_by(*order).limit(limit)).mappings().all()
 
 def get_izin_by_no(db: Session, izin_no: int):
     """
@@ -282,81 +363,118 @@ def get_oldest_data_izin_date(db: Session) -> Optional[date]:
     result = db.query(models.Izin.tanggal).order_by(models.Izin.tanggal.asc()).first() 
     return result[0] if result else None 
 
-### FUNGSI TRANSFER DATA YANG DIREVISI
-
-def transfer_old_data_izin_to_archive(db: Session): 
-    try: 
-        # Dapatkan tanggal hari ini di zona waktu GMT+7 
-        now_utc = datetime.now(timezone.utc)
-        today_gmt7 = get_local_datetime_gmt7(now_utc).date()
-
-        logger.info(f"Memulai proses pemindahan data izin lama. Data dengan tanggal '{today_gmt7}' akan dipertahankan.") 
-
-        # Filter semua data yang BUKAN tanggal hari ini 
-        old_izins: List[models.Izin] = db.query(models.Izin).filter( 
-            models.Izin.tanggal != today_gmt7
-        ).all() 
-
-        if not old_izins: 
-            logger.info("Tidak ada data izin lama yang ditemukan untuk diarsipkan (kecuali data hari ini).") 
-            return 
-
-        izins_by_year = {} 
-        for izin in old_izins: 
-            year = izin.tanggal.year 
-            # Semua data yang bukan hari ini akan dipertimbangkan untuk diarsipkan berdasarkan tahunnya 
-            if year not in izins_by_year: 
-                izins_by_year[year] = [] 
-            izins_by_year[year].append(izin) 
-
-        for year, izins_to_transfer in izins_by_year.items(): 
-            archive_table_name = f"dataIzin_{year}" 
-            # Pastikan models.Izin.create_dynamic_table_model tersedia dan berfungsi dengan baik
-            DynamicDataIzinModel = models.Izin.create_dynamic_table_model(archive_table_name) 
-
-            archive_table_obj = DynamicDataIzinModel.__table__ 
-            if not archive_table_obj.exists(db.bind): 
-                archive_table_obj.create(db.bind) 
-                logger.info(f"Tabel arsip '{archive_table_name}' berhasil dibuat.") 
-
-            transferred_count = 0 
-            for izin in izins_to_transfer: 
-                try: 
-                    # Memastikan izin.no adalah integer sebelum memanggil delete_data_telat_by_izin_no
-                    if isinstance(izin.no, int): 
-                        delete_data_telat_by_izin_no(db, izin_no=izin.no) 
-                    else: 
-                        logger.warning(f"Izin No '{izin.no}' bukan integer, tidak dapat menghapus data telat terkait.") 
-
-                    new_archive_izin_data = {} 
-                    for column in models.Izin.__table__.columns:  
-                        if column.name == 'no':  
-                            continue  
-                        
-                        value = getattr(izin, column.name) 
-                        if isinstance(value, datetime) and value is not None: 
-                            new_archive_izin_data[column.name] = convert_to_utc_aware(value) 
-                        elif isinstance(value, enum.Enum):  
-                            new_archive_izin_data[column.name] = value.value 
-                        else: 
-                            new_archive_izin_data[column.name] = value 
-                        
-                    new_archive_izin = DynamicDataIzinModel(**new_archive_izin_data) 
-
-                    db.add(new_archive_izin) 
-                    db.delete(izin)  
-                    transferred_count += 1 
-                    logger.debug(f"Memindahkan DataIzin No {izin.no} ke {archive_table_name}")  
-                except Exception as e: 
-                    # Rollback untuk transaksi internal jika ada masalah dengan satu izin
-                    logger.error(f"Gagal memindahkan DataIzin No {izin.no} ke {archive_table_name}: {e}", exc_info=True) 
-
-            # Commit setelah mencoba memindahkan semua izin untuk tahun tertentu
-            db.commit() 
-            logger.info(f"Berhasil memindahkan {transferred_count} data izin ke '{archive_table_name}'.") 
-
-    except Exception as e: 
-        # Rollback untuk seluruh proses jika ada kesalahan umum
-        db.rollback() 
-        logger.error(f"Kesalahan umum saat memindahkan data izin: {e}", exc_info=True) 
-        raise # Reraise exception setelah logging dan rollback
\ No newline at end of file
+### FUNGSI TRANSFER DATA (SET-BASED, PER BATCH)
+
+IZIN_ARCHIVE_CHECKPOINT = "dataIzin"
+
+def _izin_archive_candidates(db: Session, predicate, after_no: int, batch_size: int):
+    izin_table = models.Izin.__table__
+    return db.execute(
+        select(
+            izin_table.c.no,
+            extract("year", izin_table.c.tanggal).label("tahun"),
+            exists().where(DataTelat.__table__.c.izin_no == izin_table.c.no).label("dirujuk_telat"),
+        )
+        .where(izin_table.c.no > after_no, predicate)
+        .order_by(izin_table.c.no)
+        .limit(batch_size)
+    ).all()
+
+def _archive_izin_batch(db: Session, candidates) -> Tuple[int, int]:
+    """Memindahkan satu batch kandidat ke `dataIzin_{tahun}` (tanpa commit); mengembalikan (dipindah, ditahan)."""
+    izin_table = models.Izin.__table__
+    nos_by_year = {}
+    held_back = 0
+    for no, tahun, dirujuk_telat in candidates:
+        if dirujuk_telat:
+            held_back += 1
+            continue
+        nos_by_year.setdefault(int(tahun), []).append(no)
+
+    moved = 0
+    for year, nos in nos_by_year.items():
+        archive_table = get_archive_table(izin_table, f"dataIzin_{year}")
+        archive_table.create(db.connection(), checkfirst=True)
+        archive_models.mark_exists(archive_table.name)
+        db.execute(
+            archive_table.insert().from_select(
+                [column.name for column in izin_table.columns],
+                select(*izin_table.columns).where(izin_table.c.no.in_(nos)),
+            )
+        )
+        moved += db.execute(delete(izin_table).where(izin_table.c.no.in_(nos))).rowcount
+    return moved, held_back
+
+def transfer_old_data_izin_to_archive(db: Session, batch_size: Optional[int] = None, full_scan: bool = False):
+    """
+    Memindahkan data izin sebelum hari ini (GMT+7) ke tabel arsip `dataIzin_{tahun}`.
+
+    Setiap batch adalah satu transaksi: INSERT ... SELECT ke tabel arsip per tahun, DELETE dari
+    tabel live, lalu watermark (`no` tertinggi yang sudah diperiksa) diperbarui. Run berikutnya
+    hanya memindai `no` di atas watermark; run yang terputus melanjutkan dari batch terakhir.
+    Baris di bawah watermark yang tanggalnya jatuh di antara cutoff run sebelumnya dan hari ini
+    disapu sekali lebih dulu (lihat `catch_up_predicate`).
+    Izin yang masih dirujuk dataTelat tidak dipindahkan (foreign key), ia diarsipkan bersama
+    data telatnya. `full_scan=True` mengabaikan watermark untuk memeriksa ulang baris tersebut.
+    Di mode partisi (DB_PARTITIONING_ENABLED) partisi tahun lama cukup di-detach.
+    """
+    if is_partitioned(db.connection(), models.Izin.__table__.name):
+        # Mode partisi: pengarsipan cukup DETACH partisi tahun lama, tanpa memindahkan baris
+        detached = detach_old_partitions(db.connection(), models.Izin.__table__.name)
+        db.commit()
+        logger.info(f"Mode partisi: {len(detached)} partisi data izin di-detach {detached}.")
+        return 0
+
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    today_gmt7 = today_local()
+    izin_table = models.Izin.__table__
+
+    watermark, previous_cutoff = (0, None) if full_scan else get_checkpoint(db, IZIN_ARCHIVE_CHECKPOINT)
+    catch_up = catch_up_predicate(izin_table.c.no, izin_table.c.tanggal, watermark, previous_cutoff, today_gmt7)
+    logger.info(f"Memulai pemindahan data izin lama (sebelum {today_gmt7}, no > {watermark}, batch {batch_size}).")
+
+    started = time.perf_counter()
+    total_moved = 0
+    total_held_back = 0
+    try:
+        if catch_up is not None:
+            # Cutoff lama tetap tersimpan sampai sapuan selesai, sehingga sapuan yang terputus diulang
+            after_no = 0
+            while True:
+                candidates = _izin_archive_candidates(db, catch_up, after_no, batch_size)
+                if not candidates:
+                    break
+                moved, held_back = _archive_izin_batch(db, candidates)
+                set_watermark(db, IZIN_ARCHIVE_CHECKPOINT, watermark, moved, previous_cutoff)
+                db.commit()
+                total_moved += moved
+                total_held_back += held_back
+                after_no = candidates[-1].no
+            set_watermark(db, IZIN_ARCHIVE_CHECKPOINT, watermark, 0, today_gmt7)
+            db.commit()
+
+        while True:
+            candidates = _izin_archive_candidates(db, izin_table.c.tanggal < today_gmt7, watermark, batch_size)
+            if not candidates:
+                break
+            moved, held_back = _archive_izin_batch(db, candidates)
+            watermark = candidates[-1].no
+            set_watermark(db, IZIN_ARCHIVE_CHECKPOINT, watermark, moved, today_gmt7)
+            db.commit()
+            total_moved += moved
+            total_held_back += held_back
+            logger.debug(f"Batch arsip izin selesai: {moved} baris dipindahkan, watermark {watermark}.")
+
+    except Exception as e:
+        # Hanya batch yang sedang berjalan yang di-rollback; batch sebelumnya sudah ter-commit
+        db.rollback()
+        logger.error(f"Kesalahan saat memindahkan data izin (watermark terakhir {watermark}): {e}", exc_info=True)
+        raise
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = total_moved / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Pemindahan data izin selesai: {total_moved} baris dalam {elapsed:.2f} s "
+        f"({rows_per_second:.0f} baris/detik), {total_held_back} ditahan karena dirujuk dataTelat."
+    )
+    return total_moved
@@ -1,37 +1,57 @@
 # app/dataizin/models.py
 
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, text
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.archive import archive_models
+from app.core.timezone import local_date
+from app.users.models import User
 
 class Izin(Base):
     __tablename__ = "dataIzin"
     no = Column(Integer, primary_key=True, index=True)
     user_uid = Column(String, ForeignKey('users.uid'), nullable=False)
-    tanggal = Column(Date, default=func.current_date())
+    tanggal = Column(Date, nullable=False, default=func.current_date())
     jamKeluar = Column(DateTime(timezone=True), nullable=True)
     ipKeluar = Column(String, nullable=True)
     jamKembali = Column(DateTime(timezone=True), nullable=True)
     ipKembali = Column(String, nullable=True)
-    durasi = Column(String, nullable=True)
+    # Durasi izin dalam detik; teks tampilan dirender oleh schema (app/core/duration.py)
+    durasi_detik = Column(Integer, nullable=True)
     status = Column(String, default="Pending")
     createOn = Column(DateTime(timezone=True), server_default=func.now())
     modifiedOn = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    # Hanya satu izin Pending per user; pengaman terakhir untuk admission izin keluar
+    __table_args__ = (
+        Index(
+            "uq_dataIzin_user_pending",
+            "user_uid",
+            unique=True,
+            postgresql_where=text("status = 'Pending'"),
+            sqlite_where=text("status = 'Pending'"),
+        ),
+        # Index komposit untuk urutan daftar (tanggal, createOn, no) DESC dan keyset pagination
+        Index("ix_dataIzin_user_tanggal_createOn_no", "user_uid", tanggal.desc(), createOn.desc(), no.desc()),
+        Index("ix_dataIzin_tanggal_createOn_no", tanggal.desc(), createOn.desc(), no.desc()),
+        # Filter "hari ini" / "per tanggal" GMT+7 (kuota harian, riwayat per tanggal)
+        Index("ix_dataIzin_user_local_date", "user_uid", local_date(createOn)),
+        Index("ix_dataIzin_local_date", local_date(createOn)),
+    )
+
     user = relationship("User", back_populates="izin")
     dataTelat = relationship("DataTelat", back_populates="izin", uselist=False)
 
     def __repr__(self):
         return f"<Izin(no={self.no}, user_uid='{self.user_uid}', tanggal='{self.tanggal}')>"
 
-    @classmethod
-    def create_dynamic_table_model(cls, table_name: str):
-        class DynamicDataIzin(cls):
-            __tablename__ = table_name
-            __table_args__ = ({'extend_existing': True},)
-            # Menambahkan kembali relasi user untuk model dinamis
-            user = relationship("User", foreign_keys=[cls.user_uid], primaryjoin=lambda: cls.user_uid == cls.user.uid, uselist=False)
 
+def _archive_relationships(table, year: int) -> dict:
+    return {
+        "user": relationship(
+            User, primaryjoin=table.c.user_uid == User.uid, foreign_keys=[table.c.user_uid], viewonly=True
+        ),
+    }
 
-        return DynamicDataIzin
\ No newline at end of file
+archive_models.register("dataIzin", Izin.__table__, _archive_relationships)
@@ -1,23 +1,28 @@
 # app/dataizin/router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Response
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date, timezone, timedelta
 
-from app.core.database import get_db, Base, engine
+from app.core.database import get_db, get_async_db, run_and_validate, Base, engine
+from app.core.replica import get_async_read_db
+from app.core.archive import archive_models
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, next_cursor, set_next_cursor
 from app.dataizin import schemas, crud, models
 from app.users.crud import get_user as get_user_by_uid
+from app.users.models import User
+from app.users.schemas import UserDetail
 
 from app.datatelat import crud as datatelat_crud
 
 from app.autentikasi.security import verify_firebase_token, get_admin_user_token
 from app.dataizin import crud as crud_data_izin
-from app.core.fcm import send_fcm_notification_to_all_users, send_fcm_notification_to_single_user
+from app.core.outbox import notification_dispatcher
 
 import logging
 from pydantic import Field
-from sqlalchemy import inspect
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -28,72 +33,54 @@ router = APIRouter(
     responses={404: {"deskripsi": "Izin tidak ditemukan"}},
 )
 
-@router.on_event("startup")
-async def create_izin_table():
-    models.Base.metadata.create_all(bind=engine)
-    print("Tabel 'dataIzin' dipastikan ada atau dibuat.")
-
 def get_current_user_uid_placeholder(user_uid: str = Query(..., description="UID pengguna saat ini (placeholder)")) -> str:
     return user_uid
 
 @router.post("/", response_model=schemas.IzinInDB, status_code=status.HTTP_201_CREATED)
 async def create_izin_keluar(
     izin_data: schemas.IzinCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user_exists = get_user_by_uid(db, user_uid=izin_data.user_uid)
-    if not user_exists:
-        raise HTTPException(status_code=400, detail="Pengguna dengan UID yang diberikan tidak ditemukan.")
-
-    # --- Validasi Tambahan: Cek apakah ada izin pending untuk user ini ---
-    existing_pending_izin = crud.get_pending_izin_by_user(db, izin_data.user_uid)
-    if existing_pending_izin:
-        raise HTTPException(
-            status_code=400,
-            detail="Anda masih memiliki izin keluar yang belum diakhiri (status Pending)."
-        )
-    # --- Akhir Validasi Tambahan ---
-
-    now_utc = datetime.now(timezone.utc)
-    current_time_gmt7 = crud.get_local_datetime_gmt7(now_utc)
-
-    day_of_week = current_time_gmt7.weekday()
-    MAX_DAILY_IZIN = 4
-    if day_of_week == 4: # Hari Jumat (0=Senin, 4=Jumat)
-        MAX_DAILY_IZIN = 6
-
-    current_izin_count = crud.get_izin_count_for_today(db, izin_data.user_uid)
-
-    if current_izin_count >= MAX_DAILY_IZIN:
-        user_name = user_exists.fullname if user_exists and user_exists.fullname else "Staff"
+    def _admit(sync_db: Session):
+        db_izin, fullname = crud.admit_izin_keluar(sync_db, izin_data)
+        return schemas.IzinInDB.model_validate(db_izin), fullname
+
+    # Cek user, izin Pending, kuota harian (Jumat 6X, lainnya 4X) dan insert dalam satu transaksi
+    try:
+        db_dataIzin, _ = await db.run_sync(_admit)
+    except crud.IzinAdmissionRejected as rejected:
+        if rejected.reason == rejected.USER_NOT_FOUND:
+            raise HTTPException(status_code=400, detail="Pengguna dengan UID yang diberikan tidak ditemukan.")
+        if rejected.reason == rejected.PENDING:
+            raise HTTPException(
+                status_code=400,
+                detail="Anda masih memiliki izin keluar yang belum diakhiri (status Pending)."
+            )
         raise HTTPException(
             status_code=403,
-            detail=f"{user_name} telah mencapai batas harian {MAX_DAILY_IZIN}X izin untuk hari ini."
+            detail=f"{rejected.user_name or 'Staff'} telah mencapai batas harian {rejected.max_daily}X izin untuk hari ini."
         )
 
-    if not izin_data.jamKeluar:
-        izin_data.jamKeluar = datetime.now(timezone.utc)
-
-    db_dataIzin = crud.create_izin(db=db, izin=izin_data)
-
-    # --- Panggil Notifikasi FCM untuk Izin Keluar ---
-    user_name = user_exists.fullname if user_exists and user_exists.fullname else "Seorang pengguna"
-    title = "Izin Keluar Baru!"
-    body = f"{user_name} baru saja memulai izin keluar."
-    
-    # Tambahkan background task untuk mengirim notifikasi
-    background_tasks.add_task(
-        send_fcm_notification_to_all_users, 
-        db_session=db, 
-        title=title, 
-        body=body, 
-        data={"type": "izin_keluar", "izin_no": str(db_dataIzin.no), "user_uid": db_dataIzin.user_uid}
-    )
-    # --- Akhir Notifikasi FCM ---
+    # Notifikasi sudah tercatat di outbox bersama izin; dispatcher mengirimnya di luar request
+    notification_dispatcher.wake()
 
     return db_dataIzin
 
+def _catat_data_telat_otomatis(db: Session, izin_no: int, user_uid: str):
+    existing_datatelat = db.query(datatelat_crud.models.DataTelat).filter(datatelat_crud.models.DataTelat.izin_no == izin_no).first()
+    if not existing_datatelat:
+        datatelat_create_schema = datatelat_crud.schemas.DataTelatCreate(
+            izin_no=izin_no,
+            user_uid=user_uid,
+            by="Sistem",
+            keterangan="Otomatis dicatat karena izin kembali lewat waktu.",
+            status="Pending"
+        )
+        datatelat_entry = datatelat_crud.create_dataTelat(db=db, dataTelat=datatelat_create_schema)
+        logger.info(f"Data Telat otomatis dicatat untuk Izin no: {izin_no}, Sanksi: {datatelat_entry.sanksi}, Denda: {datatelat_entry.denda_nominal}")
+    else:
+        logger.info(f"Data Telat untuk Izin no: {izin_no} sudah ada, tidak membuat entri baru.")
+
 class IzinKembaliPayload(schemas.BaseModel):
     jamKembali: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     ipKembali: Optional[str] = None
@@ -102,11 +89,10 @@ class IzinKembaliPayload(schemas.BaseModel):
 async def create_izin_kembali(
     izin_no: int,
     payload: IzinKembaliPayload,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # --- Validasi Tambahan: Cek status izin sebelum update ---
-    db_dataIzin_to_check = crud.get_izin_by_no(db, izin_no)
+    db_dataIzin_to_check = await db.run_sync(crud.get_izin_by_no, izin_no)
     if not db_dataIzin_to_check:
         raise HTTPException(status_code=404, detail="Izin tidak ditemukan.")
     
@@ -117,122 +103,168 @@ async def create_izin_kembali(
         )
     # --- Akhir Validasi Tambahan ---
 
-    db_dataIzin = crud.update_izin_kembali(db, izin_no, payload.jamKembali, payload.ipKembali)
+    db_dataIzin = await run_and_validate(db, schemas.IzinInDB, crud.update_izin_kembali, izin_no, payload.jamKembali, payload.ipKembali)
     # Pemeriksaan db_dataIzin is None ini masih relevan jika update_izin_kembali mengembalikan None
     # karena alasan lain (misalnya, masalah database internal setelah lolos validasi status).
     if db_dataIzin is None:
         raise HTTPException(status_code=500, detail="Gagal memperbarui izin kembali. Silakan coba lagi.")
 
-
-    user_detail = get_user_by_uid(db, db_dataIzin.user_uid)
-
     if db_dataIzin.status == "Lewat Waktu":
         try:
-            existing_datatelat = db.query(datatelat_crud.models.DataTelat).filter(datatelat_crud.models.DataTelat.izin_no == db_dataIzin.no).first()
-            if not existing_datatelat:
-                datatelat_create_schema = datatelat_crud.schemas.DataTelatCreate(
-                    izin_no=db_dataIzin.no,
-                    user_uid=db_dataIzin.user_uid,
-                    by="Sistem",
-                    keterangan="Otomatis dicatat karena izin kembali lewat waktu.",
-                    status="Pending"
-                )
-                datatelat_entry = datatelat_crud.create_dataTelat(db=db, dataTelat=datatelat_create_schema)
-                logger.info(f"Data Telat otomatis dicatat untuk Izin no: {db_dataIzin.no}, Sanksi: {datatelat_entry.sanksi}, Denda: {datatelat_entry.denda}")
-            else:
-                logger.info(f"Data Telat untuk Izin no: {db_dataIzin.no} sudah ada, tidak membuat entri baru.")
+            await db.run_sync(_catat_data_telat_otomatis, db_dataIzin.no, db_dataIzin.user_uid)
         except Exception as e:
+            await db.rollback()
             logger.error(f"Gagal mencatat Data Telat untuk Izin no {db_dataIzin.no}: {e}")
 
-    # --- Panggil Notifikasi FCM untuk Izin Kembali ---
-    user_name = user_detail.fullname if user_detail and user_detail.fullname else "Seorang pengguna"
-    
-    if db_dataIzin.status == "Lewat Waktu":
-        title = "Izin Kembali Lewat Waktu!"
-        body = f"{user_name} telah kembali dari izin dengan status 'Lewat Waktu'. Durasi: {db_dataIzin.durasi}"
-        # ... (logika pencatatan data telat)
-    else:
-        title = "Izin Kembali Tepat Waktu!"
-        body = f"{user_name} telah kembali dari izin dengan status 'Tepat Waktu'. Durasi: {db_dataIzin.durasi}"
-
-    # Tambahkan background task untuk mengirim notifikasi
-    background_tasks.add_task(
-        send_fcm_notification_to_all_users, 
-        db_session=db, 
-        title=title, 
-        body=body, 
-        data={"type": "izin_kembali", "izin_no": str(db_dataIzin.no), "user_uid": db_dataIzin.user_uid, "status": db_dataIzin.status}
-    )
-    # --- Akhir Notifikasi FCM ---
+    # Notifikasi sudah tercatat di outbox bersama update izin
+    notification_dispatcher.wake()
 
     return db_dataIzin
 
 @router.get("/pending_izin/", response_model=Optional[schemas.IzinInDB])
-def get_pending_izin(
+async def get_pending_izin(
     user_uid: str = Depends(get_current_user_uid_placeholder),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    izin = crud.get_pending_izin_by_user(db, user_uid)
+    izin = await run_and_validate(db, schemas.IzinInDB, crud.get_pending_izin_by_user, user_uid)
     return izin
 
 @router.get("/", response_model=List[schemas.IzinInDB])
-def get_izin_history(
+async def get_izin_history(
+    response: Response,
     user_uid: str = Depends(get_current_user_uid_placeholder),
     tanggal: Optional[date] = Query(None, description="Filter izin berdasarkan tanggal (YYYY-MM-DD) di GMT+7"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description=f"Keyset pagination: nilai header {NEXT_CURSOR_HEADER} dari halaman sebelumnya (skip diabaikan)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    izins = crud.get_izin_history_by_user(db, user_uid, tanggal, skip=skip, limit=limit)
+    try:
+        izins = await run_and_validate(db, schemas.IzinInDB, crud.get_izin_history_by_user, user_uid, tanggal, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor(izins, crud.IZIN_SORT_ATTRS, limit))
     return izins
 
 @router.get("/all-pending/", response_model=List[schemas.IzinInDB])
-def get_all_pending_izin_staff(
+async def get_all_pending_izin_staff(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    izins = crud.get_all_pending_izins(db, skip=skip, limit=limit)
+    izins = await run_and_validate(db, schemas.IzinInDB, crud.get_all_pending_izins, skip=skip, limit=limit)
     return izins
 
 @router.get("/all-history/", response_model=List[schemas.IzinInDB])
-def get_all_izins_history_endpoint(
+async def get_all_izins_history_endpoint(
+    response: Response,
     tanggal: Optional[date] = Query(None, description="Filter semua izin berdasarkan tanggal (YYYY-MM-DD) di GMT+7"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description=f"Keyset pagination: nilai header {NEXT_CURSOR_HEADER} dari halaman sebelumnya (skip diabaikan)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        izins = await run_and_validate(db, schemas.IzinInDB, crud.get_all_izins_history, tanggal, skip, limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor(izins, crud.IZIN_SORT_ATTRS, limit))
+    return izins
+
+@router.get("/summary/durasi/", response_model=schemas.IzinDurasiSummary)
+async def get_izin_durasi_summary(
+    user_uid: Optional[str] = Query(None, description="Batasi ke satu pengguna"),
+    tanggal_mulai: Optional[date] = Query(None, description="Tanggal awal (YYYY-MM-DD), inklusif"),
+    tanggal_selesai: Optional[date] = Query(None, description="Tanggal akhir (YYYY-MM-DD), inklusif"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Ringkasan durasi izin (jumlah, total, rata-rata) tanpa memuat baris ke Python.
+    """
+    summary = await db.run_sync(crud.get_izin_durasi_summary, user_uid, tanggal_mulai, tanggal_selesai)
+    return summary
+
+# Harus dideklarasikan sebelum /{izin_no}/ agar "archive" tidak dicocokkan sebagai nomor izin
+@router.get("/archive/", response_model=List[schemas.IzinInDB])
+async def search_izin_all_years(
+    response: Response,
+    tanggal_mulai: date = Query(..., description="Tanggal awal (YYYY-MM-DD), inklusif"),
+    tanggal_selesai: date = Query(..., description="Tanggal akhir (YYYY-MM-DD), inklusif"),
+    user_uid: Optional[str] = Query(None, description="Filter berdasarkan UID pengguna"),
+    status_izin: Optional[str] = Query(None, alias="status", description="Filter berdasarkan status izin"),
+    urutan: str = Query("desc", pattern="^(asc|desc)$", description="Urutan (tanggal, no): desc = terbaru dulu"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description=f"Nilai header {NEXT_CURSOR_HEADER} dari halaman sebelumnya"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user_token: dict = Depends(verify_firebase_token)
 ):
-    izins = crud.get_all_izins_history(db, tanggal, skip, limit)
+    """
+    Riwayat izin lintas tahun: tabel live dan semua tabel arsip dalam rentang tanggal digabung
+    dengan UNION ALL. Halaman berikutnya diambil dengan cursor dari header X-Next-Cursor.
+    """
+    await get_admin_user_token(current_user_token)
+
+    if tanggal_selesai < tanggal_mulai:
+        raise HTTPException(status_code=400, detail="tanggal_selesai tidak boleh sebelum tanggal_mulai.")
+
+    after = None
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            if values.get("urutan") != urutan:
+                raise ValueError("Cursor berasal dari urutan yang berbeda.")
+            after = (date.fromisoformat(values["tanggal"]), int(values["no"]))
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Cursor tidak valid: {e}")
+
+    def _search(sync_db: Session):
+        rows = crud.search_izin_all_years(
+            sync_db, tanggal_mulai, tanggal_selesai, user_uid, status_izin,
+            descending=(urutan == "desc"), limit=limit, after=after
+        )
+        # Detail user dimuat dengan satu query untuk semua baris
+        user_uids = {row["user_uid"] for row in rows}
+        users = {user.uid: user for user in sync_db.query(User).filter(User.uid.in_(user_uids)).all()} if user_uids else {}
+        return [
+            schemas.IzinInDB.model_validate({**row, "user": UserDetail.model_validate(users[row["user_uid"]]) if row["user_uid"] in users else None})
+            for row in rows
+        ]
+
+    izins = await db.run_sync(_search)
+
+    if len(izins) == limit:
+        last = izins[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"tanggal": last.tanggal, "no": last.no, "urutan": urutan})
     return izins
 
 @router.get("/{izin_no}/", response_model=schemas.IzinInDB)
-def get_izin_by_id(
+async def get_izin_by_id(
     izin_no: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mengambil detail izin berdasarkan nomor izin.
     """
-    izin = crud.get_izin_by_no(db, izin_no)
+    izin = await run_and_validate(db, schemas.IzinInDB, crud.get_izin_by_no, izin_no)
     if izin is None:
         raise HTTPException(status_code=404, detail="Izin tidak ditemukan.")
     return izin
 
 @router.put("/{izin_no}", response_model=schemas.IzinInDB)
-def update_existing_izin(izin_no: int, izin: schemas.IzinUpdate, db: Session = Depends(get_db)):
+async def update_existing_izin(izin_no: int, izin: schemas.IzinUpdate, db: AsyncSession = Depends(get_async_db)):
     if izin.user_uid:
-        user_exists = get_user_by_uid(db, user_uid=izin.user_uid)
+        user_exists = await db.run_sync(get_user_by_uid, user_uid=izin.user_uid)
         if not user_exists:
             raise HTTPException(status_code=400, detail="Pengguna dengan UID yang diberikan tidak ditemukan.")
 
-    db_dataIzin = crud.update_izin(db, izin_no=izin_no, izin_update=izin)
+    db_dataIzin = await run_and_validate(db, schemas.IzinInDB, crud.update_izin, izin_no=izin_no, izin_update=izin)
     if db_dataIzin is None:
         raise HTTPException(status_code=404, detail="Izin tidak ditemukan")
     return db_dataIzin
 
 @router.delete("/{izin_no}", status_code=status.HTTP_200_OK)
-def delete_existing_izin(izin_no: int, db: Session = Depends(get_db)):
-    is_deleted = crud.delete_izin(db, izin_no=izin_no)
+async def delete_existing_izin(izin_no: int, db: AsyncSession = Depends(get_async_db)):
+    is_deleted = await db.run_sync(crud.delete_izin, izin_no=izin_no)
     if not is_deleted:
         raise HTTPException(status_code=404, detail="Izin tidak ditemukan")
     return {"message": "Izin berhasil dihapus"}
@@ -252,30 +284,32 @@ async def trigger_transfer_old_data_izin(
     return {"message": "Proses pemindahan data izin lama telah dimulai di latar belakang."}
 
 @router.get("/archive/{year}", response_model=List[schemas.IzinInDB])
-def get_archived_data_izin_by_year(
+async def get_archived_data_izin_by_year(
     year: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user_token: dict = Depends(verify_firebase_token)
 ):
-    get_admin_user_token(current_user_token)
+    await get_admin_user_token(current_user_token)
 
-    archive_table_name = f"dataIzin_{year}"
-    DynamicDataIzinModel = models.Izin.create_dynamic_table_model(archive_table_name)
+    def _list_archive(sync_db: Session):
+        archive_table_name = f"{models.Izin.__tablename__}_{year}"
+        if not archive_models.table_exists(sync_db.get_bind(), archive_table_name):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tabel arsip '{archive_table_name}' tidak ditemukan.")
+        # Model arsip dibangun sekali per tahun lalu dipakai ulang oleh request berikutnya
+        ArchivedIzin = archive_models.get_model(models.Izin.__tablename__, year)
 
-    inspector = inspect(db.bind)
-    if not inspector.has_table(archive_table_name):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tabel arsip '{archive_table_name}' tidak ditemukan.")
+        # Menggunakan joinedload untuk memuat relasi user
+        archived_izins = sync_db.query(ArchivedIzin).options(joinedload(ArchivedIzin.user)).offset(skip).limit(limit).all()
 
-    # Menggunakan joinedload untuk memuat relasi user
-    archived_izins = db.query(DynamicDataIzinModel).options(joinedload(DynamicDataIzinModel.user)).offset(skip).limit(limit).all()
+        # Konversi waktu ke GMT+7 untuk setiap objek izin yang diarsipkan
+        for izin in archived_izins:
+            if izin.jamKeluar: # Hanya konversi jika tidak None
+                izin.jamKeluar = crud_data_izin.get_local_datetime_gmt7(izin.jamKeluar)
+            if izin.jamKembali: # Hanya konversi jika tidak None
+                izin.jamKembali = crud_data_izin.get_local_datetime_gmt7(izin.jamKembali)
 
-    # Konversi waktu ke GMT+7 untuk setiap objek izin yang diarsipkan
-    for izin in archived_izins:
-        if izin.jamKeluar: # Hanya konversi jika tidak None
-            izin.jamKeluar = crud_data_izin.get_local_datetime_gmt7(izin.jamKeluar)
-        if izin.jamKembali: # Hanya konversi jika tidak None
-            izin.jamKembali = crud_data_izin.get_local_datetime_gmt7(izin.jamKembali)
+        return [schemas.IzinInDB.model_validate(row) for row in archived_izins]
 
-    return archived_izins
\ No newline at end of file
+    return await db.run_sync(_list_archive)
\ No newline at end of file
@@ -1,10 +1,11 @@
 # app/dataizin/schemas.py (Revisi Akhir)
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field, field_validator
 from datetime import datetime, date
 from typing import Optional
 
 # Import skema UserDetail yang baru
 from app.users.schemas import UserDetail 
+from app.core.duration import format_durasi
 
 class IzinBase(BaseModel):
     user_uid: str
@@ -19,7 +20,7 @@ class IzinCreate(IzinBase):
 
 class IzinUpdate(BaseModel):
     user_uid: Optional[str] = None
-    durasi: Optional[str] = None 
+    durasi_detik: Optional[int] = None
     status: Optional[str] = None 
     tanggal: Optional[date] = None
     jamKeluar: Optional[datetime] = None
@@ -27,15 +28,44 @@ class IzinUpdate(BaseModel):
     jamKembali: Optional[datetime] = None
     ipKembali: Optional[str] = None
 
+    # tanggal boleh tidak dikirim, tetapi tidak boleh dikosongkan (kunci urutan dan partisi)
+    @field_validator("tanggal")
+    @classmethod
+    def tanggal_tidak_null(cls, value: Optional[date]) -> date:
+        if value is None:
+            raise ValueError("tanggal tidak boleh null")
+        return value
+
 class IzinInDB(IzinBase):
     no: int
-    durasi: Optional[str] = None
+    durasi_detik: Optional[int] = None
     status: str
     createOn: datetime
     modifiedOn: Optional[datetime] = None
     
     user_detail: Optional[UserDetail] = Field(None, alias='user') 
 
+    # Teks durasi (mis. "1 Jam 3 Menit") hanya dirender saat serialisasi
+    @computed_field
+    @property
+    def durasi(self) -> Optional[str]:
+        return format_durasi(self.durasi_detik)
+
     class Config:
         from_attributes = True
-        populate_by_name = True
\ No newline at end of file
+        populate_by_name = True
+
+class IzinDurasiSummary(BaseModel):
+    jumlah: int
+    total_detik: int
+    rata_rata_detik: Optional[float] = None
+
+    @computed_field
+    @property
+    def total(self) -> str:
+        return format_durasi(self.total_detik)
+
+    @computed_field
+    @property
+    def rata_rata(self) -> Optional[str]:
+        return format_durasi(round(self.rata_rata_detik)) if self.rata_rata_detik is not None else None
\ No newline at end of file
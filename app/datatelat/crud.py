@@ -1,7 +1,15 @@
 # app/datatelat/crud.py
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import extract, String
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import case, delete, exists, extract, insert, select, update, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
 from app.datatelat import models, schemas
+from app.core.duration import IZIN_BATAS_DETIK, duration_seconds
+from app.core.timezone import GMT7_TIMEZONE, get_local_datetime_gmt7
+from app.core.partitioning import detach_old_partitions, is_partitioned
+from app.core.archive import archive_models, catch_up_predicate, get_archive_table, get_checkpoint, set_watermark
+from app.core.pagination import apply_keyset
+from app.core.config import settings
 from datetime import datetime, timedelta, date, timezone
 from typing import Optional, List # Tambahkan List
 
@@ -12,61 +20,86 @@ from app.users.models import User # Pastikan ini diimpor
 from fastapi import HTTPException, status
 
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-GMT7_TIMEZONE = timezone(timedelta(hours=7)) # Pastikan ini didefinisikan
-
-def get_local_datetime_gmt7(dt_utc: datetime) -> datetime:
-    """Mengonversi datetime UTC menjadi datetime dengan zona waktu GMT+7."""
-    if dt_utc.tzinfo is None:
-        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-
-    gmt7_offset = timedelta(hours=7)
-    gmt7_timezone = timezone(gmt7_offset)
-
-    return dt_utc.astimezone(gmt7_timezone)
-
-def calculate_duration_and_penalties(jamKeluar: datetime, jamKembali: datetime) -> tuple[str, str, str]:
+def calculate_duration_and_penalties(jamKeluar: datetime, jamKembali: datetime) -> tuple[int, str, int]:
     """
-    Menghitung durasi keterlambatan, sanksi, dan denda.
-    Asumsi: jamKeluar dan jamKembali sudah dalam zona waktu yang sama atau sudah UTC aware.
-    Kita akan mengonversi ke UTC untuk perhitungan yang konsisten jika belum aware.
+    Menghitung durasi keterlambatan (detik di atas batas 15 menit), sanksi, dan denda.
+    Datetime naive dianggap UTC. Teks durasi dirender terpisah lewat app.core.duration.format_durasi.
     """
-    jam_keluar_aware = jamKeluar if jamKeluar.tzinfo is not None else jamKeluar.replace(tzinfo=timezone.utc)
-    jam_kembali_aware = jamKembali if jamKembali is not None and jamKembali.tzinfo is not None else jamKembali.replace(tzinfo=timezone.utc)
-
-    delta = jam_kembali_aware - jam_keluar_aware
-    total_seconds = int(delta.total_seconds())
-
-    over_time_seconds = max(0, total_seconds - (15 * 60)) # Lewat 15 menit
-
-    hours = over_time_seconds // 3600
-    minutes = (over_time_seconds % 3600) // 60
-    seconds = over_time_seconds % 60
+    total_seconds = duration_seconds(jamKeluar, jamKembali)
 
-    duration_parts = []
-    if hours > 0:
-        duration_parts.append(f"{hours} Jam")
-    if minutes > 0:
-        duration_parts.append(f"{minutes} Menit")
-    if seconds > 0:
-        duration_parts.append(f"{seconds} Detik")
-
-    durasi_str = "0 Detik" if not duration_parts else " ".join(duration_parts)
+    over_time_seconds = max(0, total_seconds - IZIN_BATAS_DETIK) # Lewat 15 menit
 
     sanksi = ""
-    denda = "0"
+    denda = 0
 
     if over_time_seconds > 0:
         if over_time_seconds <= (3 * 60): # Telat dibawah atau sama dengan 3 menit dari batas 15 menit
             sanksi = "Kutip sampah"
         else: # Telat di atas 3 menit dari batas 15 menit
             sanksi = "Kutip sampah / Bersihkan PC / Bersihkan meja"
-            denda = "300" # Denda dalam string
+            denda = 300
     
-    return durasi_str, sanksi, denda
+    return over_time_seconds, sanksi, denda
+
+# --- Rekap denda per user per bulan (fine_ledger) ---
+
+def _ledger_periode(tanggal: date) -> date:
+    return date(tanggal.year, tanggal.month, 1)
+
+def apply_fine_ledger_delta(db: Session, user_uid: str, tanggal: Optional[date], jumlah_delta: int, denda_delta: int) -> None:
+    """
+    Menambahkan selisih jumlah telat dan denda ke rekap bulan `tanggal` (tanpa commit),
+    sehingga rekap ikut transaksi yang sama dengan perubahan data telat.
+    """
+    if tanggal is None or (jumlah_delta == 0 and denda_delta == 0):
+        return
+    table = models.FineLedger.__table__
+    periode = _ledger_periode(tanggal)
+
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = pg_insert(table).values(
+            user_uid=user_uid, periode=periode, jumlah_telat=jumlah_delta, total_denda=denda_delta
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_uid, table.c.periode],
+            set_={
+                "jumlah_telat": table.c.jumlah_telat + stmt.excluded.jumlah_telat,
+                "total_denda": table.c.total_denda + stmt.excluded.total_denda,
+                "modifiedOn": func.now(),
+            },
+        ))
+        return
+
+    result = db.execute(
+        update(table)
+        .where(table.c.user_uid == user_uid, table.c.periode == periode)
+        .values(jumlah_telat=table.c.jumlah_telat + jumlah_delta, total_denda=table.c.total_denda + denda_delta)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(table).values(
+            user_uid=user_uid, periode=periode, jumlah_telat=jumlah_delta, total_denda=denda_delta
+        ))
+
+def get_fine_ledger(db: Session, tahun: int, bulan: Optional[int] = None, user_uid: Optional[str] = None) -> List[models.FineLedger]:
+    """Rekap denda dari tabel fine_ledger; tidak memindai dataTelat maupun tabel arsip."""
+    if bulan is not None:
+        mulai = date(tahun, bulan, 1)
+        selesai = date(tahun + 1, 1, 1) if bulan == 12 else date(tahun, bulan + 1, 1)
+    else:
+        mulai, selesai = date(tahun, 1, 1), date(tahun + 1, 1, 1)
+
+    query = db.query(models.FineLedger).options(selectinload(models.FineLedger.user)).filter(
+        models.FineLedger.periode >= mulai,
+        models.FineLedger.periode < selesai
+    )
+    if user_uid:
+        query = query.filter(models.FineLedger.user_uid == user_uid)
+    return query.order_by(models.FineLedger.periode, models.FineLedger.user_uid).all()
 
 # --- CRUD Functions for DataTelat ---
 
@@ -77,19 +110,32 @@ def get_dataTelat(db: Session, dataTelat_no: int):
         joinedload(models.DataTelat.approved_by)
     ).filter(models.DataTelat.no == dataTelat_no).first()
 
-def get_list_dataTelat(db: Session, skip: int = 0, limit: int = 100, tahun: Optional[int] = None):
+# Urutan daftar data telat; `no` sebagai tiebreak unik untuk keyset pagination
+DATATELAT_SORT_ATTRS = ["tanggal", "createOn", "no"]
+
+def get_list_dataTelat(db: Session, skip: int = 0, limit: int = 100, tahun: Optional[int] = None, cursor: Optional[str] = None):
+    """
+    Daftar data telat. Query utama hanya membaca dataTelat (filter tahun dan urutan memakai
+    dataTelat.tanggal, tanpa join ke dataIzin); relasi dimuat dengan selectinload, satu query
+    IN (...) per relasi, sehingga baris tidak dikalikan oleh join lebar.
+    """
     query = db.query(models.DataTelat).options(
-        joinedload(models.DataTelat.user),
-        joinedload(models.DataTelat.izin),
-        joinedload(models.DataTelat.approved_by)
+        selectinload(models.DataTelat.user),
+        selectinload(models.DataTelat.izin).selectinload(Izin.user),
+        selectinload(models.DataTelat.approved_by)
     )
 
     if tahun is not None:
-        query = query.join(Izin, models.DataTelat.izin_no == Izin.no)
-        query = query.filter(extract('year', Izin.tanggal) == tahun)
+        # Filter rentang (bukan extract) agar index/partisi tahun dapat dipakai
+        query = query.filter(
+            models.DataTelat.tanggal >= date(tahun, 1, 1),
+            models.DataTelat.tanggal < date(tahun + 1, 1, 1)
+        )
 
-    query = query.order_by(Izin.tanggal.desc(), models.DataTelat.createOn.desc())
-    return query.offset(skip).limit(limit).all()
+    query = apply_keyset(query, [getattr(models.DataTelat, attr) for attr in DATATELAT_SORT_ATTRS], cursor)
+    if cursor is None:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_dataTelat(db: Session, dataTelat: schemas.DataTelatCreate):
     db_izin = db.query(Izin).filter(Izin.no == dataTelat.izin_no).first()
@@ -99,24 +145,25 @@ def create_dataTelat(db: Session, dataTelat: schemas.DataTelatCreate):
     jam_keluar_from_izin = db_izin.jamKeluar
     jam_kembali_from_izin = db_izin.jamKembali
 
-    calculated_durasi = None
     calculated_sanksi = None
     calculated_denda = None
 
     if jam_keluar_from_izin and jam_kembali_from_izin:
-        calculated_durasi, calculated_sanksi, calculated_denda = \
+        _, calculated_sanksi, calculated_denda = \
             calculate_duration_and_penalties(jam_keluar_from_izin, jam_kembali_from_izin)
 
     db_dataTelat = models.DataTelat(
         izin_no=dataTelat.izin_no,
         user_uid=dataTelat.user_uid,
+        tanggal=db_izin.tanggal,
         by=None,
         keterangan=None,
         sanksi=calculated_sanksi,
-        denda=calculated_denda,
+        denda_nominal=calculated_denda,
         status="Pending"
     )
     db.add(db_dataTelat)
+    apply_fine_ledger_delta(db, db_dataTelat.user_uid, db_dataTelat.tanggal, 1, calculated_denda or 0)
     db.commit()
     db.refresh(db_dataTelat)
     return db_dataTelat
@@ -133,8 +180,9 @@ def update_dataTelat(db: Session, dataTelat_no: int, dataTelat_update: schemas.D
 
     update_data = dataTelat_update.model_dump(exclude_unset=True)
 
-    # Simpan status lama untuk perbandingan
+    # Simpan status dan denda lama untuk perbandingan
     old_status = db_dataTelat.status
+    old_denda = db_dataTelat.denda_nominal or 0
 
     # Tangani logika untuk 'by'
     if "status" in update_data and update_data["status"] != old_status and current_user_uid:
@@ -194,21 +242,22 @@ def update_dataTelat(db: Session, dataTelat_no: int, dataTelat_update: schemas.D
             logger.debug(f"Mengatur {key} menjadi: {getattr(db_dataTelat, key)}")
 
     # Jika sanksi/denda tidak secara eksplisit diupdate, kita bisa menghitung ulang
-    if "sanksi" not in update_data and "denda" not in update_data:
+    if "sanksi" not in update_data and "denda_nominal" not in update_data:
         db.refresh(db_dataTelat, attribute_names=['izin'])
         if db_dataTelat.izin and db_dataTelat.izin.jamKeluar and db_dataTelat.izin.jamKembali:
             _, calculated_sanksi, calculated_denda = \
                 calculate_duration_and_penalties(db_dataTelat.izin.jamKeluar, db_dataTelat.izin.jamKembali)
             db_dataTelat.sanksi = calculated_sanksi
-            db_dataTelat.denda = calculated_denda
-            logger.info(f"Menghitung ulang sanksi/denda: Sanksi='{db_dataTelat.sanksi}', Denda='{db_dataTelat.denda}'")
+            db_dataTelat.denda_nominal = calculated_denda
+            logger.info(f"Menghitung ulang sanksi/denda: Sanksi='{db_dataTelat.sanksi}', Denda='{db_dataTelat.denda_nominal}'")
         elif db_dataTelat.izin:
             db_dataTelat.sanksi = None
-            db_dataTelat.denda = "0"
+            db_dataTelat.denda_nominal = 0
             logger.info("Izin ditemukan tetapi jamKeluar/jamKembali tidak ada, mengatur sanksi/denda ke None/0.")
 
     try:
         db.add(db_dataTelat)
+        apply_fine_ledger_delta(db, db_dataTelat.user_uid, db_dataTelat.tanggal, 0, (db_dataTelat.denda_nominal or 0) - old_denda)
         db.commit()
         db.refresh(db_dataTelat)
         logger.info(f"DataTelat No: {dataTelat_no} berhasil di-commit ke database. Status terbaru: '{db_dataTelat.status}', Jam terbaru: '{db_dataTelat.jam}'")
@@ -219,9 +268,57 @@ def update_dataTelat(db: Session, dataTelat_no: int, dataTelat_update: schemas.D
 
     return db_dataTelat
 
+def _resolve_keterangan(new_status: str, new_keterangan: Optional[str], keterangan_sent: bool) -> Optional[str]:
+    """Aturan keterangan per status, sama seperti update_dataTelat."""
+    if new_status == "Done":
+        if new_keterangan is None or new_keterangan.strip() == "":
+            return "Done Sanksi"
+        return new_keterangan
+    if new_status in ["Izin", "Kendala"]:
+        if new_keterangan is None or new_keterangan.strip() == "":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Keterangan wajib diisi jika status '{new_status}'."
+            )
+        return new_keterangan
+    return new_keterangan if keterangan_sent else None
+
+def bulk_update_dataTelat_status(db: Session, bulk_update: schemas.DataTelatBulkStatusUpdate, current_user_uid: str = None) -> List[dict]:
+    """
+    Mengubah status banyak data telat sekaligus dengan satu UPDATE ... RETURNING.
+    'by' diisi (payload atau user saat ini) hanya pada baris yang statusnya berubah, seperti update satuan.
+    Sanksi/denda tidak dihitung ulang karena jam izin tidak berubah.
+    """
+    keterangan = _resolve_keterangan(bulk_update.status, bulk_update.keterangan, "keterangan" in bulk_update.model_fields_set)
+    jam = bulk_update.jam or get_local_datetime_gmt7(datetime.now(timezone.utc)).strftime("%H:%M:%S")
+    by = bulk_update.by or current_user_uid
+    nos = list(dict.fromkeys(bulk_update.nos))
+
+    table = models.DataTelat.__table__
+    values = {"status": bulk_update.status, "keterangan": keterangan, "jam": jam}
+    if by:
+        values["by"] = case((table.c.status != bulk_update.status, by), else_=table.c.by)
+
+    try:
+        updated = set(db.execute(
+            update(table).where(table.c.no.in_(nos)).values(**values).returning(table.c.no)
+        ).scalars())
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Gagal memperbarui status {len(nos)} data telat sekaligus: {e}", exc_info=True)
+        raise
+
+    logger.info(f"Status {len(updated)} data telat diubah menjadi '{bulk_update.status}' secara massal.")
+    return [
+        {"no": no, "berhasil": no in updated, "detail": None if no in updated else "Data Telat tidak ditemukan"}
+        for no in nos
+    ]
+
 def delete_dataTelat(db: Session, dataTelat_no: int):
     db_dataTelat = db.query(models.DataTelat).filter(models.DataTelat.no == dataTelat_no).first()
     if db_dataTelat:
+        apply_fine_ledger_delta(db, db_dataTelat.user_uid, db_dataTelat.tanggal, -1, -(db_dataTelat.denda_nominal or 0))
         db.delete(db_dataTelat)
         db.commit()
         return True
@@ -235,90 +332,132 @@ def delete_data_telat_by_izin_no(db: Session, izin_no: int) -> bool:
     db_dataTelat = db.query(models.DataTelat).filter(models.DataTelat.izin_no == izin_no).first()
     if db_dataTelat:
         logger.info(f"Menghapus DataTelat terkait dengan Izin No: {izin_no}")
+        apply_fine_ledger_delta(db, db_dataTelat.user_uid, db_dataTelat.tanggal, -1, -(db_dataTelat.denda_nominal or 0))
         db.delete(db_dataTelat)
         db.commit()
         return True
     logger.info(f"Tidak ada DataTelat ditemukan untuk Izin No: {izin_no}")
     return False
 
-# --- FUNGSI TRANSFER DATA YANG BARU ---
-def transfer_old_data_telat_to_archive(db: Session):
-    try:
-        # Dapatkan tahun saat ini di zona waktu GMT+7
-        current_year_gmt7 = datetime.now(GMT7_TIMEZONE).year
-
-        logger.info(f"Memulai proses pemindahan data telat lama. Data dengan tahun '{current_year_gmt7}' akan dipertahankan.")
-
-        # Ambil semua data telat dan muat relasi 'izin' dan 'user' agar bisa diakses
-        # Filter data yang izinnya bukan di tahun berjalan
-        # Lakukan joinedload pada 'izin' dan 'user' agar data relasional siap saat iterasi
-        old_datatelat_entries: List[models.DataTelat] = db.query(models.DataTelat)\
-            .join(Izin, models.DataTelat.izin_no == Izin.no)\
-            .filter(extract('year', Izin.tanggal) != current_year_gmt7)\
-            .options(joinedload(models.DataTelat.izin), joinedload(models.DataTelat.user), joinedload(models.DataTelat.approved_by))\
-            .all()
-
-        if not old_datatelat_entries:
-            logger.info("Tidak ada data telat lama yang ditemukan untuk diarsipkan (kecuali data tahun ini).")
-            return
-
-        datatelat_by_year = {}
-        for datatelat_entry in old_datatelat_entries:
-            # Pastikan izin terkait ada dan memiliki tanggal sebelum mencoba mengakses tahun
-            if datatelat_entry.izin and datatelat_entry.izin.tanggal:
-                year = datatelat_entry.izin.tanggal.year
-                if year not in datatelat_by_year:
-                    datatelat_by_year[year] = []
-                datatelat_by_year[year].append(datatelat_entry)
-            else:
-                logger.warning(f"Data Telat No {datatelat_entry.no} tidak memiliki data izin atau tanggal izin yang valid, melewati pengarsipan.")
-
-
-        for year, datatelat_to_transfer in datatelat_by_year.items():
-            archive_table_name = f"dataTelat_{year}"
-            DynamicDataTelatModel = models.DataTelat.create_dynamic_table_model(archive_table_name)
-
-            archive_table_obj = DynamicDataTelatModel.__table__
-            if not archive_table_obj.exists(db.bind):
-                archive_table_obj.create(db.bind)
-                logger.info(f"Tabel arsip '{archive_table_name}' berhasil dibuat.")
-
-            transferred_count = 0
-            for datatelat_entry in datatelat_to_transfer:
-                try:
-                    new_archive_datatelat_data = {}
-                    # Dapatkan semua kolom dari model DataTelat asli
-                    for column in models.DataTelat.__table__.columns:
-                        # Kita tidak perlu menyalin primary key (no) karena akan dibuat otomatis di tabel baru
-                        if column.name == 'no':
-                            continue
-
-                        value = getattr(datatelat_entry, column.name)
-
-                        # Konversi datetime menjadi UTC-aware jika belum
-                        if isinstance(value, datetime) and value is not None and value.tzinfo is None:
-                            new_archive_datatelat_data[column.name] = value.replace(tzinfo=timezone.utc)
-                        else:
-                            new_archive_datatelat_data[column.name] = value
-
-                    # Buat instance model arsip dan tambahkan ke sesi
-                    new_archive_datatelat = DynamicDataTelatModel(**new_archive_datatelat_data)
-                    db.add(new_archive_datatelat)
+# --- FUNGSI TRANSFER DATA (SET-BASED, PER BATCH) ---
+
+TELAT_ARCHIVE_CHECKPOINT = "dataTelat"
+
+def _telat_archive_candidates(db: Session, predicate, after_no: int, batch_size: int):
+    telat_table = models.DataTelat.__table__
+    return db.execute(
+        select(telat_table.c.no, telat_table.c.izin_no, extract("year", telat_table.c.tanggal).label("tahun"))
+        .where(telat_table.c.no > after_no, predicate)
+        .order_by(telat_table.c.no)
+        .limit(batch_size)
+    ).all()
+
+def _archive_telat_batch(db: Session, candidates) -> int:
+    """Memindahkan satu batch data telat beserta izinnya ke tabel arsip per tahun (tanpa commit)."""
+    telat_table = models.DataTelat.__table__
+    izin_table = Izin.__table__
+    rows_by_year = {}
+    for no, izin_no, tahun in candidates:
+        rows_by_year.setdefault(int(tahun), []).append((no, izin_no))
+
+    moved = 0
+    for year, rows in rows_by_year.items():
+        nos = [no for no, _ in rows]
+        izin_nos = [izin_no for _, izin_no in rows]
+
+        telat_archive = get_archive_table(telat_table, f"dataTelat_{year}")
+        izin_archive = get_archive_table(izin_table, f"dataIzin_{year}")
+        for archive_table in (telat_archive, izin_archive):
+            archive_table.create(db.connection(), checkfirst=True)
+            archive_models.mark_exists(archive_table.name)
+
+        db.execute(
+            telat_archive.insert().from_select(
+                [column.name for column in telat_table.columns],
+                select(*telat_table.columns).where(
+                    telat_table.c.no.in_(nos),
+                    ~exists().where(telat_archive.c.no == telat_table.c.no),
+                ),
+            )
+        )
+        db.execute(
+            izin_archive.insert().from_select(
+                [column.name for column in izin_table.columns],
+                select(*izin_table.columns).where(
+                    izin_table.c.no.in_(izin_nos),
+                    ~exists().where(izin_archive.c.no == izin_table.c.no),
+                ),
+            )
+        )
+        # Data telat dihapus lebih dulu karena merujuk dataIzin lewat foreign key
+        moved += db.execute(delete(telat_table).where(telat_table.c.no.in_(nos))).rowcount
+        db.execute(delete(izin_table).where(izin_table.c.no.in_(izin_nos)))
+    return moved
+
+def transfer_old_data_telat_to_archive_v2(db: Session, batch_size: Optional[int] = None, full_scan: bool = False):
+    """
+    Memindahkan data telat sebelum tahun berjalan (GMT+7) ke tabel arsip `dataTelat_{tahun}`,
+    bersama izin terkait yang masih di tabel live ke `dataIzin_{tahun}`.
+
+    Hanya kolom yang disalin (INSERT ... SELECT, tanpa memuat relasi). Setiap batch adalah satu
+    transaksi yang diakhiri pembaruan watermark, sehingga run yang terputus melanjutkan dari batch
+    terakhir dan run ulang tidak menyalin dua kali (baris yang sudah ada di arsip dilewati).
+    Saat tahun berganti, baris tahun lalu di bawah watermark disapu sekali (`catch_up_predicate`).
+    `full_scan=True` mengabaikan watermark. Di mode partisi partisi tahun lama cukup di-detach.
+    """
+    if is_partitioned(db.connection(), models.DataTelat.__table__.name):
+        # Mode partisi: pengarsipan cukup DETACH partisi tahun lama, tanpa memindahkan baris
+        detached = detach_old_partitions(db.connection(), models.DataTelat.__table__.name)
+        db.commit()
+        logger.info(f"Mode partisi: {len(detached)} partisi data telat di-detach {detached}.")
+        return 0
 
-                    # Hapus data dari tabel utama
-                    db.delete(datatelat_entry)
-                    transferred_count += 1
-                    logger.debug(f"Memindahkan DataTelat No {datatelat_entry.no} (Izin No {datatelat_entry.izin_no}) ke {archive_table_name}")
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    awal_tahun_berjalan = date(datetime.now(GMT7_TIMEZONE).year, 1, 1)
+    telat_table = models.DataTelat.__table__
 
-                except Exception as e:
-                    db.rollback()
-                    logger.error(f"Gagal memindahkan DataTelat No {datatelat_entry.no} ke {archive_table_name}: {e}", exc_info=True)
-                    # Lanjutkan ke entri berikutnya meskipun ada kesalahan pada satu entri
+    watermark, previous_cutoff = (0, None) if full_scan else get_checkpoint(db, TELAT_ARCHIVE_CHECKPOINT)
+    catch_up = catch_up_predicate(telat_table.c.no, telat_table.c.tanggal, watermark, previous_cutoff, awal_tahun_berjalan)
+    logger.info(f"Memulai pemindahan data telat lama (sebelum {awal_tahun_berjalan}, no > {watermark}, batch {batch_size}).")
 
-            db.commit() # Commit setiap batch per tahun
-            logger.info(f"Berhasil memindahkan {transferred_count} data telat ke '{archive_table_name}'.")
+    started = time.perf_counter()
+    total_moved = 0
+    try:
+        if catch_up is not None:
+            # Cutoff lama tetap tersimpan sampai sapuan selesai, sehingga sapuan yang terputus diulang
+            after_no = 0
+            while True:
+                candidates = _telat_archive_candidates(db, catch_up, after_no, batch_size)
+                if not candidates:
+                    break
+                moved = _archive_telat_batch(db, candidates)
+                set_watermark(db, TELAT_ARCHIVE_CHECKPOINT, watermark, moved, previous_cutoff)
+                db.commit()
+                total_moved += moved
+                after_no = candidates[-1].no
+            set_watermark(db, TELAT_ARCHIVE_CHECKPOINT, watermark, 0, awal_tahun_berjalan)
+            db.commit()
+
+        while True:
+            candidates = _telat_archive_candidates(db, telat_table.c.tanggal < awal_tahun_berjalan, watermark, batch_size)
+            if not candidates:
+                break
+            moved = _archive_telat_batch(db, candidates)
+            watermark = candidates[-1].no
+            set_watermark(db, TELAT_ARCHIVE_CHECKPOINT, watermark, moved, awal_tahun_berjalan)
+            db.commit()
+            total_moved += moved
+            logger.debug(f"Batch arsip data telat selesai: {moved} baris dipindahkan, watermark {watermark}.")
 
     except Exception as e:
+        # Hanya batch yang sedang berjalan yang di-rollback; batch sebelumnya sudah ter-commit
         db.rollback()
-        logger.error(f"Kesalahan umum saat memindahkan data telat: {e}", exc_info=True)
-        raise
\ No newline at end of file
+        logger.error(f"Kesalahan saat memindahkan data telat (watermark terakhir {watermark}): {e}", exc_info=True)
+        raise
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = total_moved / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Pemindahan data telat selesai: {total_moved} baris dalam {elapsed:.2f} s ({rows_per_second:.0f} baris/detik)."
+    )
+    return total_moved
@@ -1,8 +1,9 @@
 # app/datatelat/models.py
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, text
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Index, PrimaryKeyConstraint, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.archive import archive_models
 
 # --- TAMBAHKAN IMPOR INI ---
 from app.dataizin.models import Izin
@@ -19,8 +20,12 @@ class DataTelat(Base):
     # Mengubah user_uid menjadi String
     user_uid = Column(String, ForeignKey('users.uid'), nullable=False)
 
+    # Tanggal izin terkait (disalin saat dibuat); kunci tahun untuk filter, arsip, dan partisi
+    tanggal = Column(Date, nullable=False, index=True)
+
     sanksi = Column(String, nullable=True)
-    denda = Column(String, nullable=True)
+    # Nominal denda sebagai integer agar dapat dijumlahkan di SQL (teks "300" dirender di skema)
+    denda_nominal = Column(Integer, nullable=True)
     status = Column(String, default="Pending")
 
     keterangan = Column(String, nullable=True)
@@ -41,23 +46,54 @@ class DataTelat(Base):
     # Relasi ke model User untuk kolom 'by'
     approved_by = relationship("User", foreign_keys=[by], back_populates="approved_dataTelat", remote_side='User.uid')
 
+    # Index komposit untuk urutan daftar (tanggal, createOn, no) DESC dan keyset pagination
+    __table_args__ = (
+        Index("ix_dataTelat_tanggal_createOn_no", tanggal.desc(), createOn.desc(), no.desc()),
+    )
+
     def __repr__(self):
         return f"<DataTelat(no={self.no}, izin_no={self.izin_no}, status='{self.status}', by={self.by})>"
 
-    @classmethod
-    def create_dynamic_table_model(cls, table_name: str):
-        class DynamicDataTelat(cls):
-            __tablename__ = table_name
-            __table_args__ = ({'extend_existing': True},)
 
-            no = Column(Integer, primary_key=True, index=True)
+class FineLedger(Base):
+    """
+    Rekap denda per user per bulan (periode = tanggal 1 bulan tersebut, dari dataTelat.tanggal).
+    Diperbarui secara inkremental setiap data telat dibuat, diubah dendanya, atau dihapus;
+    pengarsipan tidak mengubahnya sehingga rekap tetap mencakup data live dan arsip.
+    """
+    __tablename__ = "fine_ledger"
+    user_uid = Column(String, ForeignKey('users.uid'), nullable=False)
+    periode = Column(Date, nullable=False)
+    jumlah_telat = Column(Integer, nullable=False, default=0)
+    total_denda = Column(Integer, nullable=False, default=0)
+    modifiedOn = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-            # Penting: mendefinisikan ulang relasi untuk model dinamis
-            # Pastikan foreign_keys menunjuk ke kolom dari `cls` (model asli)
-            # Dan primaryjoin menunjuk ke kolom dari `cls` (model asli) juga
-            izin = relationship("Izin", foreign_keys=[cls.izin_no], primaryjoin=lambda: cls.izin_no == Izin.no, uselist=False)
-            user = relationship("User", foreign_keys=[cls.user_uid], primaryjoin=lambda: cls.user_uid == User.uid, remote_side='User.uid')
-            approved_by = relationship("User", foreign_keys=[cls.by], primaryjoin=lambda: cls.by == User.uid, remote_side='User.uid')
+    user = relationship("User", foreign_keys=[user_uid])
 
+    __table_args__ = (
+        PrimaryKeyConstraint("user_uid", "periode", name="pk_fine_ledger"),
+        # Rekap payroll satu bulan untuk semua user
+        Index("ix_fine_ledger_periode", "periode"),
+    )
 
-        return DynamicDataTelat
\ No newline at end of file
+    def __repr__(self):
+        return f"<FineLedger(user_uid={self.user_uid}, periode={self.periode}, total_denda={self.total_denda})>"
+
+
+def _archive_relationships(table, year: int) -> dict:
+    # Izin dari data telat yang diarsipkan berada di arsip izin tahun yang sama jika tabelnya ada
+    izin_table_name = f"{Izin.__tablename__}_{year}"
+    izin_model = archive_models.get_model(Izin.__tablename__, year) if archive_models.is_known(izin_table_name) else Izin
+    return {
+        "izin": relationship(
+            izin_model, primaryjoin=table.c.izin_no == izin_model.no, foreign_keys=[table.c.izin_no], uselist=False, viewonly=True
+        ),
+        "user": relationship(
+            User, primaryjoin=table.c.user_uid == User.uid, foreign_keys=[table.c.user_uid], viewonly=True
+        ),
+        "approved_by": relationship(
+            User, primaryjoin=table.c.by == User.uid, foreign_keys=[table.c.by], viewonly=True
+        ),
+    }
+
+archive_models.register("dataTelat", DataTelat.__table__, _archive_relationships)
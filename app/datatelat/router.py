@@ -1,10 +1,14 @@
 # app/datatelat/router.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Response
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timezone
 
-from app.core.database import get_db, Base, engine
+from app.core.database import get_db, get_async_db, run_and_validate, Base, engine
+from app.core.replica import get_async_read_db
+from app.core.archive import archive_models
+from app.core.pagination import NEXT_CURSOR_HEADER, next_cursor, set_next_cursor
 from app.datatelat import schemas, crud, models
 
 from app.users.crud import get_user as get_user_by_uid
@@ -15,7 +19,6 @@ from app.autentikasi.security import verify_firebase_token, get_admin_user_token
 from app.users.schemas import UserInDB
 
 import logging
-from sqlalchemy import inspect
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -26,59 +29,92 @@ router = APIRouter(
     responses={404: {"description": "Data Telat tidak ditemukan"}},
 )
 
-@router.on_event("startup")
-async def create_datatelat_table():
-    models.Base.metadata.create_all(bind=engine)
-    print("Tabel 'dataTelat' dipastikan ada atau dibuat.")
-
 @router.post("/", response_model=schemas.DataTelatInDB, status_code=status.HTTP_201_CREATED)
-def create_new_dataTelat(
+async def create_new_dataTelat(
     dataTelat_data: schemas.DataTelatCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user_exists = get_user_by_uid(db, user_uid=dataTelat_data.user_uid)
+    user_exists = await db.run_sync(get_user_by_uid, user_uid=dataTelat_data.user_uid)
     if not user_exists:
         raise HTTPException(status_code=400, detail="Pengguna dengan UID yang diberikan tidak ditemukan.")
 
-    izin_exists = get_izin_by_no(db, izin_no=dataTelat_data.izin_no)
+    izin_exists = await db.run_sync(get_izin_by_no, izin_no=dataTelat_data.izin_no)
     if not izin_exists:
         raise HTTPException(status_code=400, detail=f"Data Izin dengan nomor {dataTelat_data.izin_no} tidak ditemukan.")
 
-    existing_dataTelat_for_izin = db.query(models.DataTelat).filter(models.DataTelat.izin_no == dataTelat_data.izin_no).first()
+    existing_dataTelat_for_izin = await db.run_sync(
+        lambda sync_db: sync_db.query(models.DataTelat).filter(models.DataTelat.izin_no == dataTelat_data.izin_no).first()
+    )
     if existing_dataTelat_for_izin:
         raise HTTPException(status_code=409, detail=f"Data Telat untuk Izin nomor {dataTelat_data.izin_no} sudah ada.")
 
-    return crud.create_dataTelat(db=db, dataTelat=dataTelat_data)
+    return await run_and_validate(db, schemas.DataTelatInDB, crud.create_dataTelat, dataTelat=dataTelat_data)
+
+@router.get("/ledger/", response_model=List[schemas.FineLedgerEntry])
+async def get_fine_ledger(
+    tahun: int = Query(..., description="Tahun rekap denda"),
+    bulan: Optional[int] = Query(None, ge=1, le=12, description="Bulan (1-12); kosong = seluruh tahun"),
+    user_uid: Optional[str] = Query(None, description="Filter berdasarkan UID pengguna"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user_token: dict = Depends(verify_firebase_token)
+):
+    """
+    Rekap denda per user per bulan untuk payroll, dibaca dari tabel rekap fine_ledger
+    yang mencakup data telat live maupun arsip.
+    """
+    await get_admin_user_token(current_user_token)
+    return await run_and_validate(db, schemas.FineLedgerEntry, crud.get_fine_ledger, tahun=tahun, bulan=bulan, user_uid=user_uid)
 
 @router.get("/{dataTelat_no}", response_model=schemas.DataTelatInDB)
-def get_single_dataTelat(
+async def get_single_dataTelat(
     dataTelat_no: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_dataTelat = crud.get_dataTelat(db, dataTelat_no)
+    db_dataTelat = await run_and_validate(db, schemas.DataTelatInDB, crud.get_dataTelat, dataTelat_no)
     if db_dataTelat is None:
         raise HTTPException(status_code=404, detail="Data Telat tidak ditemukan")
     return db_dataTelat
 
 @router.get("/", response_model=List[schemas.DataTelatInDB])
-def get_all_dataTelat(
+async def get_all_dataTelat(
+    response: Response,
     tahun: Optional[int] = Query(None, description="Filter data telat berdasarkan tahun Izin"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description=f"Keyset pagination: nilai header {NEXT_CURSOR_HEADER} dari halaman sebelumnya (skip diabaikan)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    dataTelat_list = crud.get_list_dataTelat(db, skip=skip, limit=limit, tahun=tahun)
+    try:
+        dataTelat_list = await run_and_validate(db, schemas.DataTelatInDB, crud.get_list_dataTelat, skip=skip, limit=limit, tahun=tahun, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor(dataTelat_list, crud.DATATELAT_SORT_ATTRS, limit))
     return dataTelat_list
 
+@router.put("/bulk-status/", response_model=List[schemas.DataTelatBulkItemResult])
+async def bulk_update_dataTelat_status(
+    bulk_update: schemas.DataTelatBulkStatusUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Mengubah status (beserta keterangan, by, jam) banyak data telat dengan satu UPDATE.
+    Mengembalikan hasil per nomor; nomor yang tidak ditemukan ditandai berhasil=False.
+    """
+    results = await db.run_sync(crud.bulk_update_dataTelat_status, bulk_update, current_user.uid)
+    return results
+
 @router.put("/{dataTelat_no}", response_model=schemas.DataTelatInDB)
-def update_existing_dataTelat(
+async def update_existing_dataTelat(
     dataTelat_no: int,
     dataTelat_update: schemas.DataTelatUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserInDB = Depends(get_current_active_user)
 ):
-    db_dataTelat = crud.update_dataTelat(
+    db_dataTelat = await run_and_validate(
         db,
+        schemas.DataTelatInDB,
+        crud.update_dataTelat,
         dataTelat_no=dataTelat_no,
         dataTelat_update=dataTelat_update,
         current_user_uid=current_user.uid
@@ -88,11 +124,11 @@ def update_existing_dataTelat(
     return db_dataTelat
 
 @router.delete("/{dataTelat_no}", status_code=status.HTTP_200_OK)
-def delete_existing_dataTelat(
+async def delete_existing_dataTelat(
     dataTelat_no: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    is_deleted = crud.delete_dataTelat(db, dataTelat_no=dataTelat_no)
+    is_deleted = await db.run_sync(crud.delete_dataTelat, dataTelat_no=dataTelat_no)
     if not is_deleted:
         raise HTTPException(status_code=404, detail="Data Telat tidak ditemukan")
     return {"message": "Data Telat berhasil dihapus"}
@@ -105,7 +141,7 @@ async def trigger_transfer_old_data_telat(
     current_user_token: dict = Depends(verify_firebase_token)
 ):
     # Memastikan hanya admin yang bisa memicu
-    get_admin_user_token(current_user_token) # Menggunakan fungsi get_admin_user_token langsung
+    await get_admin_user_token(current_user_token)
 
     logger.info("Memulai pemindahan data telat lama secara manual...")
     background_tasks.add_task(crud.transfer_old_data_telat_to_archive_v2, db)
@@ -113,42 +149,44 @@ async def trigger_transfer_old_data_telat(
 
 # --- FUNGSI MENDAPATKAN DATA ARSIP BARU ---
 @router.get("/archive/{year}", response_model=List[schemas.DataTelatInDB])
-def get_archived_data_telat_by_year(
+async def get_archived_data_telat_by_year(
     year: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user_token: dict = Depends(verify_firebase_token)
 ):
     # Memastikan hanya admin yang bisa mengakses arsip
-    get_admin_user_token(current_user_token)
-
-    archive_table_name = f"dataTelat_{year}"
-    DynamicDataTelatModel = models.DataTelat.create_dynamic_table_model(archive_table_name)
-
-    inspector = inspect(db.bind)
-    if not inspector.has_table(archive_table_name):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tabel arsip '{archive_table_name}' tidak ditemukan.")
-
-    # Menggunakan joinedload untuk memuat relasi user, izin, dan approved_by
-    archived_datatelat = db.query(DynamicDataTelatModel)\
-        .options(joinedload(DynamicDataTelatModel.user),
-                 joinedload(DynamicDataTelatModel.izin),
-                 joinedload(DynamicDataTelatModel.approved_by))\
-        .offset(skip).limit(limit).all()
-
-    # Konversi waktu ke GMT+7 untuk 'jam' jika ada
-    for data_telat in archived_datatelat:
-        if data_telat.createOn:
-            data_telat.createOn = crud.get_local_datetime_gmt7(data_telat.createOn)
-        if data_telat.modifiedOn:
-            data_telat.modifiedOn = crud.get_local_datetime_gmt7(data_telat.modifiedOn)
-
-        # Khusus untuk jamKeluar dan jamKembali di objek izin terkait
-        if data_telat.izin:
-            if data_telat.izin.jamKeluar:
-                data_telat.izin.jamKeluar = crud.get_local_datetime_gmt7(data_telat.izin.jamKeluar)
-            if data_telat.izin.jamKembali:
-                data_telat.izin.jamKembali = crud.get_local_datetime_gmt7(data_telat.izin.jamKembali)
-
-    return archived_datatelat
\ No newline at end of file
+    await get_admin_user_token(current_user_token)
+
+    def _list_archive(sync_db: Session):
+        archive_table_name = f"{models.DataTelat.__tablename__}_{year}"
+        if not archive_models.table_exists(sync_db.get_bind(), archive_table_name):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tabel arsip '{archive_table_name}' tidak ditemukan.")
+        # Model arsip dibangun sekali per tahun lalu dipakai ulang oleh request berikutnya
+        ArchivedDataTelat = archive_models.get_model(models.DataTelat.__tablename__, year)
+
+        # Menggunakan joinedload untuk memuat relasi user, izin, dan approved_by
+        archived_datatelat = sync_db.query(ArchivedDataTelat)\
+            .options(joinedload(ArchivedDataTelat.user),
+                     joinedload(ArchivedDataTelat.izin),
+                     joinedload(ArchivedDataTelat.approved_by))\
+            .offset(skip).limit(limit).all()
+
+        # Konversi waktu ke GMT+7 untuk 'jam' jika ada
+        for data_telat in archived_datatelat:
+            if data_telat.createOn:
+                data_telat.createOn = crud.get_local_datetime_gmt7(data_telat.createOn)
+            if data_telat.modifiedOn:
+                data_telat.modifiedOn = crud.get_local_datetime_gmt7(data_telat.modifiedOn)
+
+            # Khusus untuk jamKeluar dan jamKembali di objek izin terkait
+            if data_telat.izin:
+                if data_telat.izin.jamKeluar:
+                    data_telat.izin.jamKeluar = crud.get_local_datetime_gmt7(data_telat.izin.jamKeluar)
+                if data_telat.izin.jamKembali:
+                    data_telat.izin.jamKembali = crud.get_local_datetime_gmt7(data_telat.izin.jamKembali)
+
+        return [schemas.DataTelatInDB.model_validate(row) for row in archived_datatelat]
+
+    return await db.run_sync(_list_archive)
\ No newline at end of file
@@ -1,13 +1,28 @@
 # app/datatelat/schemas.py
-from pydantic import BaseModel, Field
+import re
+from pydantic import AliasChoices, BaseModel, BeforeValidator, Field, computed_field
 from datetime import datetime, date
-from typing import Optional
+from typing import Annotated, List, Optional
 
 # Import skema UserDetail jika Anda ingin menampilkan detail pengguna terkait
 from app.users.schemas import UserDetail
 # Import skema IzinInDB untuk menampilkan detail izin terkait
 from app.dataizin.schemas import IzinInDB
 
+def _denda_to_int(value):
+    # Klien lama mengirim teks denda (mis. "300" atau "Rp 300"); diambil digitnya seperti migrasi 0008
+    if isinstance(value, str):
+        digits = re.sub(r"[^0-9]", "", value)
+        return int(digits) if digits else None
+    return value
+
+# Input denda menerima nama lama `denda` (teks) selain `denda_nominal`
+DendaNominal = Annotated[
+    Optional[int],
+    BeforeValidator(_denda_to_int),
+    Field(validation_alias=AliasChoices("denda_nominal", "denda")),
+]
+
 class DataTelatBase(BaseModel):
     izin_no: int
     user_uid: str
@@ -15,7 +30,7 @@ class DataTelatBase(BaseModel):
     by: Optional[str] = None
     keterangan: Optional[str] = None
     sanksi: Optional[str] = None
-    denda: Optional[str] = None
+    denda_nominal: DendaNominal = None
     status: Optional[str] = None
     jam: Optional[str] = None
 
@@ -26,12 +41,25 @@ class DataTelatUpdate(BaseModel):
     by: Optional[str] = None
     keterangan: Optional[str] = None
     sanksi: Optional[str] = None
-    denda: Optional[str] = None
+    denda_nominal: DendaNominal = None
     status: Optional[str] = None
     jam: Optional[str] = None
 
+class DataTelatBulkStatusUpdate(BaseModel):
+    nos: List[int] = Field(..., min_length=1, max_length=500)
+    status: str
+    keterangan: Optional[str] = None
+    by: Optional[str] = None
+    jam: Optional[str] = None
+
+class DataTelatBulkItemResult(BaseModel):
+    no: int
+    berhasil: bool
+    detail: Optional[str] = None
+
 class DataTelatInDB(DataTelatBase):
     no: int
+    tanggal: Optional[date] = None
     createOn: datetime
     modifiedOn: Optional[datetime] = None
 
@@ -42,6 +70,24 @@ class DataTelatInDB(DataTelatBase):
     # TAMBAHKAN INI: Alias untuk relasi SQLAlchemy 'approved_by'
     approved_by: Optional[UserDetail] = Field(None, alias='approved_by')
 
+    # Teks denda (mis. "300") tetap disajikan untuk klien lama
+    @computed_field
+    @property
+    def denda(self) -> Optional[str]:
+        return str(self.denda_nominal) if self.denda_nominal is not None else None
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+class FineLedgerEntry(BaseModel):
+    user_uid: str
+    periode: date
+    jumlah_telat: int
+    total_denda: int
+
+    user: Optional[UserDetail] = Field(None, alias='user')
+
     class Config:
         from_attributes = True
         populate_by_name = True
\ No newline at end of file
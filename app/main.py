@@ -1,13 +1,15 @@
 # app/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import Base, engine, get_db
+from app.core.database import Base, engine, async_engine, get_db, log_pool_stats
 from app.core.firebase import initialize_firebase_admin
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 import logging
+import time
 from app.users import router as users_router
 from app.roles import router as roles_router
 from app.dataizin import router as dataizin_router
@@ -16,6 +18,17 @@ from app.datatelat import router as datatelat_router
 from app.datatelat import crud as crud_data_telat
 from app.autentikasi import router as auth_router
 from app.shift import router as shift_router
+from app.monitoring import router as monitoring_router
+from app.autentikasi.keystore import key_store
+from app.core.offload import offloader
+from app.core.schema import bootstrap_schema
+from app.core import replica
+from app.core import query_stats
+from app.core.partitioning import ensure_upcoming_partitions
+from app.core.archive import archive_models
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.outbox import notification_dispatcher
+from app.core import fcm, fcm_fake
 
 # Konfigurasi logging
 logging.basicConfig(level=logging.INFO)
@@ -40,8 +53,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[query_stats.QUERY_COUNT_HEADER, query_stats.QUERY_TIME_HEADER, NEXT_CURSOR_HEADER],
 )
 
+# Tandai klien yang baru saja menulis agar bacaannya tidak diarahkan ke replica yang tertinggal
+@app.middleware("http")
+async def read_after_write_middleware(request: Request, call_next):
+    response = await call_next(request)
+    replica.mark_write(request, response)
+    return response
+
+# Menghitung statement SQL dan total waktu DB per request
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    if not settings.QUERY_STATS_ENABLED:
+        return await call_next(request)
+    stats = query_stats.start_request_stats()
+    response = await call_next(request)
+    query_stats.report_request_stats(request, response, stats)
+    return response
+
 # Tambahkan endpoint ini untuk tampilan awal
 @app.get("/")
 async def read_root():
@@ -61,6 +92,10 @@ app.include_router(roles_router.router)
 app.include_router(dataizin_router.router)
 app.include_router(datatelat_router.router)
 app.include_router(shift_router.router)
+app.include_router(monitoring_router.router)
+if settings.FCM_FAKE_SERVER_ENABLED:
+    # Server FCM palsu untuk benchmark offline; jangan diaktifkan di produksi
+    app.include_router(fcm_fake.router)
 
 # Inisialisasi scheduler
 scheduler = AsyncIOScheduler()
@@ -81,21 +116,86 @@ def scheduled_transfer_telat_task():
     logger.info("Memicu tugas transfer data telat terjadwal...")
     db_session: Session = next(get_db())
     try:
-        crud_data_telat.transfer_old_data_telat_to_archive(db_session)
+        crud_data_telat.transfer_old_data_telat_to_archive_v2(db_session)
     except Exception as e:
         logger.error(f"Kesalahan dalam tugas transfer data telat terjadwal: {e}", exc_info=True)
     finally:
         db_session.close()
 
+# Membuat partisi tahun berjalan/tahun depan lebih awal (mode partisi PostgreSQL)
+def scheduled_ensure_partitions_task():
+    try:
+        with engine.begin() as connection:
+            ensure_upcoming_partitions(connection)
+    except Exception as e:
+        logger.error(f"Kesalahan saat membuat partisi tahunan: {e}", exc_info=True)
+
 @app.on_event("startup")
 async def startup_event():
-    logger.info("Membuat tabel database jika belum ada...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Tabel database berhasil dibuat atau sudah ada.")
+    startup_started = time.perf_counter()
+
+    # Satu-satunya titik pembuatan/migrasi skema; dilewati jika fingerprint tidak berubah
+    bootstrap_started = time.perf_counter()
+    migrated = bootstrap_schema(engine)
+    logger.info(
+        f"Bootstrap skema selesai dalam {(time.perf_counter() - bootstrap_started) * 1000:.0f} ms "
+        f"({'migrasi dijalankan' if migrated else 'tidak ada perubahan'})."
+    )
+
+    # Model tabel arsip per tahun dibangun sekali di sini, bukan per request
+    try:
+        prewarm_started = time.perf_counter()
+        archive_count = archive_models.prewarm(engine)
+        logger.info(f"{archive_count} model tabel arsip disiapkan dalam {(time.perf_counter() - prewarm_started) * 1000:.0f} ms.")
+    except Exception as e:
+        logger.warning(f"Gagal menyiapkan model tabel arsip: {e}")
 
     # Inisialisasi Firebase Admin SDK di startup
     initialize_firebase_admin()
+
+    # Muat kunci publik penandatangan token sebelum menerima request
+    try:
+        key_store.load()
+    except Exception as e:
+        logger.warning(f"Signing key store gagal dimuat saat startup, verifikasi memakai firebase_admin: {e}")
+
+    # Memperbarui kunci publik di latar belakang sebelum kedaluwarsa
+    scheduler.add_job(
+        key_store.refresh_if_needed,
+        IntervalTrigger(seconds=settings.KEYSTORE_CHECK_INTERVAL_SECONDS),
+        id='refresh_signing_keys_job',
+        replace_existing=True
+    )
+    logger.info("Tugas refresh signing key store terjadwal.")
+
+    # Mencatat statistik pool koneksi database secara berkala per worker
+    scheduler.add_job(
+        log_pool_stats,
+        IntervalTrigger(seconds=settings.DB_POOL_STATS_LOG_INTERVAL_SECONDS),
+        id='log_pool_stats_job',
+        replace_existing=True
+    )
     
+    # Mengukur lag read replica (jika dikonfigurasi) di luar jalur request
+    if replica.replica_engine is not None:
+        replica.replica_monitor.refresh()
+        scheduler.add_job(
+            replica.replica_monitor.refresh,
+            IntervalTrigger(seconds=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS),
+            id='replica_lag_check_job',
+            replace_existing=True
+        )
+        logger.info("Pemeriksaan lag read replica terjadwal.")
+
+    if settings.DB_PARTITIONING_ENABLED:
+        scheduler.add_job(
+            scheduled_ensure_partitions_task,
+            CronTrigger(hour=0, minute=30),
+            id='ensure_partitions_job',
+            replace_existing=True
+        )
+        logger.info("Tugas pembuatan partisi tahunan terjadwal setiap hari jam 00:30.")
+
     # Menjadwalkan transfer data izin setiap hari jam 1 pagi
     scheduler.add_job(
         scheduled_transfer_izin_task,
@@ -115,4 +215,19 @@ async def startup_event():
     logger.info("Tugas transfer data telat terjadwal setiap pergantian tahun.")
 
     scheduler.start()
-    logger.info("Scheduler APSScheduler dimulai.")
\ No newline at end of file
+    logger.info("Scheduler APSScheduler dimulai.")
+
+    # Mengirim notifikasi dari outbox di luar jalur request
+    notification_dispatcher.start()
+    logger.info(f"Startup aplikasi selesai dalam {(time.perf_counter() - startup_started) * 1000:.0f} ms.")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    scheduler.shutdown(wait=False)
+    await notification_dispatcher.stop()
+    await fcm.close_fake_client()
+    offloader.shutdown()
+    await async_engine.dispose()
+    if replica.replica_async_engine is not None:
+        await replica.replica_async_engine.dispose()
+    logger.info(f"Thread pool offload dihentikan. Statistik akhir: {offloader.stats()}")
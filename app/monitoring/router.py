@@ -0,0 +1,31 @@
+# app/monitoring/router.py
+
+from fastapi import APIRouter, Depends
+import logging
+
+from app.core.database import get_pool_stats
+from app.core.outbox import notification_dispatcher
+from app.users.device_cache import device_token_cache
+from app.autentikasi.security import verify_firebase_token, get_admin_user_token
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/monitoring",
+    tags=["Monitoring"],
+)
+
+@router.get("/db-pool/")
+async def read_db_pool_stats(current_user_token: dict = Depends(verify_firebase_token)):
+    """
+    Mengembalikan statistik pool koneksi database untuk worker yang melayani request ini.
+    Setiap worker gunicorn memiliki pool sendiri; kolom 'pid' menunjukkan worker-nya.
+    """
+    await get_admin_user_token(current_user_token)
+    return {"pools": get_pool_stats()}
+
+@router.get("/notification-outbox/")
+async def read_notification_outbox_stats(current_user_token: dict = Depends(verify_firebase_token)):
+    """Statistik dispatcher outbox notifikasi (terkirim, dicoba ulang, gagal) dan cache token FCM untuk worker ini."""
+    await get_admin_user_token(current_user_token)
+    return {**notification_dispatcher.stats(), "device_tokens": device_token_cache.stats()}
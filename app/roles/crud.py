@@ -2,6 +2,7 @@
 
 from sqlalchemy.orm import Session
 from app.roles import models, schemas
+from app.autentikasi.principal_cache import principal_cache
 
 def get_role(db: Session, role_id: int):
     return db.query(models.Role).filter(models.Role.id == role_id).first()
@@ -30,6 +31,7 @@ def update_role(db: Session, role_id: int, role: schemas.RoleUpdate):
         for key, value in update_data.items():
             setattr(db_role, key, value)
         db.commit()
+        principal_cache.invalidate_role(role_id)
         db.refresh(db_role)
     return db_role
 
@@ -38,4 +40,5 @@ def delete_role(db: Session, role_id: int):
     if db_role:
         db.delete(db_role)
         db.commit()
+        principal_cache.invalidate_role(role_id)
     return db_role
\ No newline at end of file
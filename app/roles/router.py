@@ -13,13 +13,6 @@ router = APIRouter(
     responses={404: {"deskripsi": "Not found"}},
 )
 
-# Pastikan tabel dibuat saat aplikasi dimulai
-@router.on_event("startup")
-async def create_roles_table():
-    from app.core.database import engine, Base
-    Base.metadata.create_all(bind=engine)
-    print("Tabel 'roles' dipastikan ada atau dibuat.")
-
 
 @router.post("/", response_model=schemas.RoleInDB)
 def create_new_role(role: schemas.RoleCreate, db: Session = Depends(get_db)):
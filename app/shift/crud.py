@@ -2,6 +2,8 @@
 from sqlalchemy.orm import Session, joinedload # Import joinedload
 from sqlalchemy import func
 from app.shift import models, schemas
+from app.users.models import User
+from app.core.pagination import apply_keyset
 from uuid import UUID
 from datetime import date, datetime
 
@@ -10,18 +12,21 @@ def get_shift(db: Session, shift_no: int):
     Mengambil satu data shift berdasarkan nomor (no) dengan eager loading relasi user.
     """
     return db.query(models.Shift)\
-             .options(joinedload(models.Shift.user))\
-             .options(joinedload(models.Shift.created_by_user))\
+             .options(joinedload(models.Shift.user).joinedload(User.role))\
+             .options(joinedload(models.Shift.created_by_user).joinedload(User.role))\
              .filter(models.Shift.no == shift_no).first()
 
-def get_shifts(db: Session, skip: int = 0, limit: int = 100, user_uid: UUID = None, start_date: date = None, end_date: date = None):
+# Urutan daftar shift untuk keyset pagination (no unik dan naik sesuai urutan input)
+SHIFT_SORT_ATTRS = ["no"]
+
+def get_shifts(db: Session, skip: int = 0, limit: int = 100, user_uid: UUID = None, start_date: date = None, end_date: date = None, cursor: str = None):
     """
     Mengambil daftar data shift dengan opsi filter dan paginasi,
     serta eager loading relasi user dan created_by_user.
     """
     query = db.query(models.Shift)\
-              .options(joinedload(models.Shift.user))\
-              .options(joinedload(models.Shift.created_by_user)) # Tambahkan ini
+              .options(joinedload(models.Shift.user).joinedload(User.role))\
+              .options(joinedload(models.Shift.created_by_user).joinedload(User.role)) # Tambahkan ini
 
     if user_uid:
         query = query.filter(models.Shift.user_uid == user_uid)
@@ -29,8 +34,11 @@ def get_shifts(db: Session, skip: int = 0, limit: int = 100, user_uid: UUID = No
         query = query.filter(models.Shift.tanggalMulai >= start_date)
     if end_date:
         query = query.filter(models.Shift.tanggalAkhir <= end_date)
-        
-    return query.offset(skip).limit(limit).all()
+
+    query = apply_keyset(query, [getattr(models.Shift, attr) for attr in SHIFT_SORT_ATTRS], cursor, descending=False)
+    if cursor is None:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_shift(db: Session, shift: schemas.ShiftCreate, createdBy_uid: UUID):
     """
@@ -42,8 +50,8 @@ def create_shift(db: Session, shift: schemas.ShiftCreate, createdBy_uid: UUID):
     db.refresh(db_shift)
     # Setelah membuat, kita juga ingin meload relasi agar respons sesuai
     db_shift = db.query(models.Shift)\
-                 .options(joinedload(models.Shift.user))\
-                 .options(joinedload(models.Shift.created_by_user))\
+                 .options(joinedload(models.Shift.user).joinedload(User.role))\
+                 .options(joinedload(models.Shift.created_by_user).joinedload(User.role))\
                  .filter(models.Shift.no == db_shift.no).first()
     return db_shift
 
@@ -61,8 +69,8 @@ def update_shift(db: Session, shift_no: int, shift_update: schemas.ShiftUpdate):
         db.refresh(db_shift)
         # Setelah update, kita juga ingin meload relasi agar respons sesuai
         db_shift = db.query(models.Shift)\
-                     .options(joinedload(models.Shift.user))\
-                     .options(joinedload(models.Shift.created_by_user))\
+                     .options(joinedload(models.Shift.user).joinedload(User.role))\
+                     .options(joinedload(models.Shift.created_by_user).joinedload(User.role))\
                      .filter(models.Shift.no == db_shift.no).first()
     return db_shift
 
@@ -1,5 +1,5 @@
 # app/shift/models.py
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Index
 # from sqlalchemy.dialects.postgresql import UUID # Hapus baris ini
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -33,5 +33,10 @@ class Shift(Base):
     user = relationship("User", back_populates="shift", foreign_keys=[user_uid])
     created_by_user = relationship("User", foreign_keys=[createdBy_uid], back_populates="created_shifts")
 
+    # Filter user_uid dengan urutan no untuk keyset pagination daftar shift
+    __table_args__ = (
+        Index("ix_dataShift_user_uid_no", "user_uid", "no"),
+    )
+
     def __repr__(self):
         return f"<Shift(no={self.no}, user_uid='{self.user_uid}', tanggalMulai='{self.tanggalMulai}')>"
\ No newline at end of file
@@ -1,12 +1,13 @@
 # app/shift/routes.py (atau file router Anda)
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 from datetime import date, datetime
 
-from app.core.database import get_db
+from app.core.database import get_async_db, run_and_validate
+from app.core.pagination import NEXT_CURSOR_HEADER, next_cursor, set_next_cursor
 from app.shift import crud, schemas, models
 from app.autentikasi.security import get_current_active_user as get_current_user
 from app.users.schemas import UserDetail
@@ -18,23 +19,25 @@ router = APIRouter(
 
 # Endpoint untuk membuat data shift baru
 @router.post("/", response_model=schemas.ShiftInDB, status_code=status.HTTP_201_CREATED)
-def create_new_shift(
+async def create_new_shift(
     shift: schemas.ShiftCreate, # <<< ShiftCreate mengandung jadwal
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDetail = Depends(get_current_user)
 ):
-    db_shift = crud.create_shift(db=db, shift=shift, createdBy_uid=current_user.uid)
+    db_shift = await run_and_validate(db, schemas.ShiftInDB, crud.create_shift, shift=shift, createdBy_uid=current_user.uid)
     return db_shift
 
 # Endpoint untuk mendapatkan semua data shift
 @router.get("/", response_model=List[schemas.ShiftInDB])
-def read_all_shifts(
+async def read_all_shifts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description=f"Keyset pagination: nilai header {NEXT_CURSOR_HEADER} dari halaman sebelumnya (skip diabaikan)"),
     user_uid: Optional[UUID] = None, # Filter berdasarkan user_uid
     start_date: Optional[date] = None, # Filter berdasarkan tanggal mulai
     end_date: Optional[date] = None, # Filter berdasarkan tanggal akhir
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDetail = Depends(get_current_user)
 ):
     """
@@ -62,21 +65,25 @@ def read_all_shifts(
     # ini berarti jika user_uid adalah None, crud.get_shifts akan mendapatkan semua shift
     # (sesuai dengan limit dan filter tanggal).
 
-    shifts = crud.get_shifts(db, skip=skip, limit=limit, user_uid=user_uid, start_date=start_date, end_date=end_date)
+    try:
+        shifts = await run_and_validate(db, schemas.ShiftInDB, crud.get_shifts, skip=skip, limit=limit, user_uid=user_uid, start_date=start_date, end_date=end_date, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor(shifts, crud.SHIFT_SORT_ATTRS, limit))
     return shifts
 
 # Endpoint untuk mendapatkan data shift berdasarkan no
 @router.get("/{shift_no}", response_model=schemas.ShiftInDB)
-def read_shift_by_no(
+async def read_shift_by_no(
     shift_no: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDetail = Depends(get_current_user)
 ):
     """
     Mengambil satu data shift berdasarkan nomor (no).
     Membutuhkan autentikasi.
     """
-    db_shift = crud.get_shift(db, shift_no=shift_no)
+    db_shift = await db.run_sync(crud.get_shift, shift_no=shift_no)
     if db_shift is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shift tidak ditemukan")
 
@@ -92,31 +99,31 @@ def read_shift_by_no(
 
 # Endpoint untuk memperbarui data shift
 @router.put("/{shift_no}", response_model=schemas.ShiftInDB)
-def update_existing_shift(
+async def update_existing_shift(
     shift_no: int,
     shift: schemas.ShiftUpdate, # <<< ShiftUpdate mengandung jadwal
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDetail = Depends(get_current_user)
 ):
-    db_shift = crud.get_shift(db, shift_no=shift_no)
+    db_shift = await db.run_sync(crud.get_shift, shift_no=shift_no)
     if db_shift is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shift tidak ditemukan")
 
-    updated_shift = crud.update_shift(db=db, shift_no=shift_no, shift_update=shift)
+    updated_shift = await run_and_validate(db, schemas.ShiftInDB, crud.update_shift, shift_no=shift_no, shift_update=shift)
     return updated_shift
 
 # Endpoint untuk menghapus data shift
 @router.delete("/{shift_no}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_shift(
+async def delete_existing_shift(
     shift_no: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDetail = Depends(get_current_user)
 ):
     """
     Menghapus data shift.
     Membutuhkan autentikasi. Hanya pemilik shift atau admin yang bisa menghapus.
     """
-    db_shift = crud.get_shift(db, shift_no=shift_no)
+    db_shift = await db.run_sync(crud.get_shift, shift_no=shift_no)
     if db_shift is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shift tidak ditemukan")
 
@@ -128,5 +135,5 @@ def delete_existing_shift(
             detail="Tidak memiliki izin untuk menghapus shift ini."
         )
 
-    crud.delete_shift(db=db, shift_no=shift_no)
+    await db.run_sync(crud.delete_shift, shift_no=shift_no)
     return {"message": "Shift berhasil dihapus"}
\ No newline at end of file
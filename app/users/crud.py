@@ -1,8 +1,14 @@
 # app/users/crud.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+from datetime import datetime, timezone
 from app.users import models, schemas
 from app.roles import models as role_models # Impor model Role jika belum
+from app.autentikasi.principal_cache import principal_cache
+from app.users.device_cache import device_token_cache
+from app.core.pagination import apply_keyset
 # Hapus import uuid
 # import uuid
 
@@ -39,8 +45,16 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+# Urutan daftar user untuk keyset pagination (primary key)
+USER_SORT_ATTRS = ["uid"]
+
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: str = None):
+    # selectinload: satu query tambahan untuk semua role, bukan satu lazy load per user
+    query = db.query(models.User).options(selectinload(models.User.role))
+    query = apply_keyset(query, [getattr(models.User, attr) for attr in USER_SORT_ATTRS], cursor, descending=False)
+    if cursor is None:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def update_user(db: Session, user_uid: str, user_update: schemas.UserUpdate):
     # PERBAIKAN: Hapus konversi UID ke objek UUID.
@@ -57,8 +71,15 @@ def update_user(db: Session, user_uid: str, user_update: schemas.UserUpdate):
     for key, value in update_data.items():
         setattr(db_user, key, value)
 
+    # Klien lama mendaftarkan token lewat update user; token tersebut juga dicatat sebagai perangkat
+    if update_data.get("fcm_token"):
+        _upsert_device(db, user_uid, update_data["fcm_token"])
+
     db.add(db_user)
     db.commit()
+    principal_cache.invalidate(user_uid)
+    if update_data.get("fcm_token"):
+        device_token_cache.invalidate()
     db.refresh(db_user)
     return db_user
 
@@ -73,5 +94,95 @@ def delete_user(db: Session, user_uid: str):
     if db_user:
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate(user_uid)
+        device_token_cache.invalidate()
         return True
-    return False
\ No newline at end of file
+    return False
+
+# --- Token FCM (user_devices) ---
+
+def _load_device_tokens(db: Session) -> dict:
+    generation = device_token_cache.generation
+    rows = db.execute(select(models.UserDevice.user_uid, models.UserDevice.fcm_token)).all()
+    return device_token_cache.store(rows, generation)
+
+def get_users_fcm_tokens(db: Session) -> List[str]:
+    """Semua token FCM terdaftar, dari cache per proses bila tersedia."""
+    cached = device_token_cache.get_all()
+    if cached is not None:
+        return cached
+    return [token for tokens in _load_device_tokens(db).values() for token in tokens]
+
+def get_fcm_tokens_by_user_uid(db: Session, user_uid: str) -> List[str]:
+    """Token FCM semua perangkat milik satu user."""
+    cached = device_token_cache.get_user(user_uid)
+    if cached is not None:
+        return cached
+    return _load_device_tokens(db).get(user_uid, [])
+
+def _upsert_device(db: Session, user_uid: str, fcm_token: str, platform: Optional[str] = None) -> models.UserDevice:
+    # Token yang sama dapat berpindah akun (logout lalu login user lain di perangkat yang sama)
+    db_device = db.query(models.UserDevice).filter(models.UserDevice.fcm_token == fcm_token).first()
+    if db_device is None:
+        db_device = models.UserDevice(user_uid=user_uid, fcm_token=fcm_token)
+        db.add(db_device)
+    db_device.user_uid = user_uid
+    if platform is not None:
+        db_device.platform = platform
+    db_device.last_seen = datetime.now(timezone.utc)
+    return db_device
+
+def get_device_owner(db: Session, fcm_token: str) -> Optional[models.User]:
+    """User pemilik token saat ini (sebelum token dipindahkan ke akun lain), atau None."""
+    return db.query(models.User).join(models.UserDevice, models.UserDevice.user_uid == models.User.uid)\
+        .options(selectinload(models.User.role))\
+        .filter(models.UserDevice.fcm_token == fcm_token).first()
+
+def register_device(db: Session, user_uid: str, device: schemas.UserDeviceCreate) -> models.UserDevice:
+    """Mendaftarkan atau menyegarkan (last_seen) token perangkat milik user."""
+    db_device = _upsert_device(db, user_uid, device.fcm_token, device.platform)
+    db.commit()
+    device_token_cache.invalidate()
+    db.refresh(db_device)
+    return db_device
+
+def get_user_devices(db: Session, user_uid: str) -> List[models.UserDevice]:
+    return db.query(models.UserDevice).filter(models.UserDevice.user_uid == user_uid)\
+        .order_by(models.UserDevice.last_seen.desc()).all()
+
+def unregister_device(db: Session, user_uid: str, fcm_token: str) -> bool:
+    deleted = db.execute(
+        delete(models.UserDevice).where(
+            models.UserDevice.user_uid == user_uid,
+            models.UserDevice.fcm_token == fcm_token,
+        )
+    ).rowcount
+    # Kolom lama ikut dikosongkan agar tidak didaftarkan ulang dari data user
+    db.execute(
+        update(models.User)
+        .where(models.User.uid == user_uid, models.User.fcm_token == fcm_token)
+        .values(fcm_token=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    device_token_cache.invalidate()
+    principal_cache.invalidate(user_uid)
+    return deleted > 0
+
+def clear_fcm_tokens(db: Session, tokens: List[str]) -> int:
+    """Menghapus token yang dilaporkan FCM tidak valid/tidak terdaftar. Mengembalikan jumlah perangkat terhapus."""
+    if not tokens:
+        return 0
+    deleted = db.execute(delete(models.UserDevice).where(models.UserDevice.fcm_token.in_(tokens))).rowcount
+    user_uids = list(db.execute(
+        update(models.User)
+        .where(models.User.fcm_token.in_(tokens))
+        .values(fcm_token=None)
+        .returning(models.User.uid)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    db.commit()
+    device_token_cache.invalidate()
+    for user_uid in user_uids:
+        principal_cache.invalidate(user_uid)
+    return deleted
@@ -0,0 +1,83 @@
+# app/users/device_cache.py
+import threading
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceTokenCache:
+    """
+    Cache per proses untuk seluruh token FCM di user_devices, dikelompokkan per user.
+
+    Broadcast izin membaca set token dari memori, bukan dari database di setiap event.
+    Cache diinvalidasi secara eksplisit oleh crud saat perangkat didaftarkan/dihapus; `generation`
+    mencegah hasil query yang dimulai sebelum invalidasi disimpan. TTL membatasi data basi dari
+    perubahan yang dilakukan worker lain.
+    """
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._tokens_by_user: Optional[Dict[str, List[str]]] = None
+        self._all_tokens: List[str] = []
+        self._loaded_at = 0.0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self) -> bool:
+        return self._tokens_by_user is not None and time.monotonic() - self._loaded_at < self._ttl
+
+    def get_all(self) -> Optional[List[str]]:
+        with self._lock:
+            if not self._is_fresh():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._all_tokens
+
+    def get_user(self, user_uid: str) -> Optional[List[str]]:
+        with self._lock:
+            if not self._is_fresh():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._tokens_by_user.get(user_uid, [])
+
+    def store(self, rows: Iterable[Tuple[str, str]], generation: int) -> Dict[str, List[str]]:
+        """Menyimpan pasangan (user_uid, fcm_token); mengembalikan pengelompokannya walau tidak disimpan."""
+        tokens_by_user: Dict[str, List[str]] = {}
+        for user_uid, fcm_token in rows:
+            tokens_by_user.setdefault(user_uid, []).append(fcm_token)
+        with self._lock:
+            if generation != self.generation:
+                logger.debug("Set token FCM tidak disimpan karena cache diinvalidasi selama query.")
+                return tokens_by_user
+            self._tokens_by_user = tokens_by_user
+            self._all_tokens = [token for tokens in tokens_by_user.values() for token in tokens]
+            self._loaded_at = time.monotonic()
+        return tokens_by_user
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._tokens_by_user = None
+            self._all_tokens = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._tokens_by_user is not None,
+                "users": len(self._tokens_by_user or {}),
+                "tokens": len(self._all_tokens),
+                "ttl": self._ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+device_token_cache = DeviceTokenCache(ttl=settings.DEVICE_TOKEN_CACHE_TTL_SECONDS)
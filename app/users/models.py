@@ -23,14 +23,30 @@ class User(Base):
     modifiedOn = Column("modifiedOn", DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # --- Tambahan: Kolom FCM Token ---
+    # Token terakhir yang didaftarkan lewat update user; pengiriman memakai tabel user_devices
     fcm_token = Column(String, nullable=True, unique=True, index=True)
     # ----------------------------------
 
     role = relationship("Role")
+    devices = relationship("UserDevice", back_populates="user", cascade="all, delete-orphan")
     izin = relationship("Izin", back_populates="user")
 
     dataTelat = relationship("DataTelat", foreign_keys="[DataTelat.user_uid]", back_populates="user")
     approved_dataTelat = relationship("DataTelat", foreign_keys="[DataTelat.by]", back_populates="approved_by")
 
     shift = relationship("Shift", back_populates="user", foreign_keys="[Shift.user_uid]")
-    created_shifts = relationship("Shift", back_populates="created_by_user", foreign_keys="[Shift.createdBy_uid]")
\ No newline at end of file
+    created_shifts = relationship("Shift", back_populates="created_by_user", foreign_keys="[Shift.createdBy_uid]")
+
+
+class UserDevice(Base):
+    """Token FCM per perangkat; satu user dapat memiliki banyak perangkat (ponsel, tablet)."""
+    __tablename__ = "user_devices"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_uid = Column(String, ForeignKey("users.uid", ondelete="CASCADE"), nullable=False, index=True)
+    fcm_token = Column(String, nullable=False, unique=True)
+    platform = Column(String, nullable=True)
+    createOn = Column("createOn", DateTime(timezone=True), server_default=func.now())
+    last_seen = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    user = relationship("User", back_populates="devices")
@@ -1,15 +1,17 @@
 # app/users/router.py
 
 # --- IMPOR YANG DIBUTUHKAN ---
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
+from app.core.pagination import NEXT_CURSOR_HEADER, next_cursor, set_next_cursor
 from app.users import schemas, crud, models
 from app.roles.crud import get_role # Untuk memvalidasi role_id
 from app.roles.models import Role 
-from app.autentikasi.security import verify_firebase_token
+from app.autentikasi.security import verify_firebase_token, get_admin_user_token
+from app.core import fcm_topics
 from app.core.firebase import firebase_admin # Import instance firebase_admin yang sudah diinisialisasi
 import logging 
 
@@ -25,13 +27,6 @@ router = APIRouter(
     
 )
 
-# --- DEKORATOR DAN FUNGSI on_event ---
-@router.on_event("startup")
-async def create_users_table():
-    from app.core.database import engine, Base
-    Base.metadata.create_all(bind=engine)
-    print("Tabel 'users' dipastikan ada atau dibuat.")
-
 # --- SEMUA ENDPOINT ANDA BERADA DI SINI ---
 
 @router.post("/", response_model=schemas.UserInDB, status_code=status.HTTP_201_CREATED)
@@ -47,8 +42,18 @@ def create_new_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return crud.create_user(db=db, user=user)
 
 @router.get("/", response_model=List[schemas.UserInDB])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = crud.get_users(db, skip=skip, limit=limit)
+def read_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description=f"Keyset pagination: nilai header {NEXT_CURSOR_HEADER} dari halaman sebelumnya (skip diabaikan)"),
+    db: Session = Depends(get_db)
+):
+    try:
+        users = crud.get_users(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor(users, crud.USER_SORT_ATTRS, limit))
     return users
 
 @router.get("/{user_uid}", response_model=schemas.UserInDB)
@@ -62,6 +67,7 @@ def read_user(user_uid: str, db: Session = Depends(get_db)):
 def update_existing_user(
     user_uid: str, 
     user: schemas.UserUpdate, 
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     # Tambahkan dependensi autentikasi di sini
     current_user_token: dict = Depends(verify_firebase_token) 
@@ -81,14 +87,109 @@ def update_existing_user(
         if not role:
             raise HTTPException(status_code=400, detail="Invalid role_id")
 
+    existing_user = crud.get_user(db, user_uid=user_uid)
+    previous_topics = fcm_topics.topics_for_user(existing_user) if existing_user else None
+    if existing_user and user.fcm_token:
+        _unsubscribe_previous_owner(background_tasks, db, user.fcm_token, existing_user)
+
     db_user = crud.update_user(db, user_uid=user_uid, user_update=user)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found or invalid role_id")
+
+    # Role/jabatan atau token dapat berubah: samakan langganan topic FCM di latar belakang
+    if fcm_topics.topic_mode_enabled() and (user.fcm_token or user.role_id is not None or user.jabatan is not None):
+        background_tasks.add_task(fcm_topics.sync_user_topics, user_uid, previous_topics)
     return db_user
 
+# --- PERANGKAT (TOKEN FCM) ---
+@router.post("/{user_uid}/devices/", response_model=schemas.UserDeviceInDB)
+def register_user_device(
+    user_uid: str,
+    device: schemas.UserDeviceCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user_token: dict = Depends(verify_firebase_token)
+):
+    """Mendaftarkan token FCM perangkat (dipanggil aplikasi setiap login/token diperbarui)."""
+    db_user = crud.get_user(db, user_uid=user_uid)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    _unsubscribe_previous_owner(background_tasks, db, device.fcm_token, db_user)
+    db_device = crud.register_device(db, user_uid=user_uid, device=device)
+    # Mode topic: perangkat di-subscribe ke all_staff, admins, dan topic jabatan
+    if fcm_topics.topic_mode_enabled():
+        background_tasks.add_task(fcm_topics.subscribe_tokens, [db_device.fcm_token], fcm_topics.topics_for_user(db_user))
+    return db_device
+
+def _unsubscribe_previous_owner(background_tasks: BackgroundTasks, db: Session, fcm_token: str, new_owner: models.User):
+    """
+    Token yang berpindah akun di-unsubscribe dari topic pemilik lama yang tidak berlaku untuk
+    pemilik baru (mis. `admins`). Harus dipanggil sebelum token dipindahkan.
+    """
+    if not fcm_topics.topic_mode_enabled():
+        return
+    previous_owner = crud.get_device_owner(db, fcm_token)
+    if previous_owner is None or previous_owner.uid == new_owner.uid:
+        return
+    new_topics = fcm_topics.topics_for_user(new_owner)
+    stale = [topic for topic in fcm_topics.topics_for_user(previous_owner) if topic not in new_topics]
+    if stale:
+        background_tasks.add_task(fcm_topics.unsubscribe_tokens, [fcm_token], stale)
+
+@router.get("/{user_uid}/devices/", response_model=List[schemas.UserDeviceInDB])
+def read_user_devices(
+    user_uid: str,
+    db: Session = Depends(get_db),
+    current_user_token: dict = Depends(verify_firebase_token)
+):
+    return crud.get_user_devices(db, user_uid=user_uid)
+
+@router.delete("/{user_uid}/devices/", status_code=status.HTTP_200_OK)
+def unregister_user_device(
+    user_uid: str,
+    background_tasks: BackgroundTasks,
+    fcm_token: str = Query(..., description="Token FCM perangkat yang dihapus (mis. saat logout)"),
+    db: Session = Depends(get_db),
+    current_user_token: dict = Depends(verify_firebase_token)
+):
+    db_user = crud.get_user(db, user_uid=user_uid)
+    topics = fcm_topics.topics_for_user(db_user) if db_user else []
+    if not crud.unregister_device(db, user_uid=user_uid, fcm_token=fcm_token):
+        raise HTTPException(status_code=404, detail="Device not found")
+    if fcm_topics.topic_mode_enabled():
+        background_tasks.add_task(fcm_topics.unsubscribe_tokens, [fcm_token], topics)
+    return {"message": "Device unregistered successfully"}
+
+@router.post("/devices/topics/sync/", status_code=status.HTTP_200_OK)
+async def sync_device_topics(
+    background_tasks: BackgroundTasks,
+    current_user_token: dict = Depends(verify_firebase_token)
+):
+    """Subscribe ulang semua perangkat ke topic FCM-nya, mis. saat pertama kali beralih ke FCM_DELIVERY_MODE=topic."""
+    await get_admin_user_token(current_user_token)
+    if not fcm_topics.topic_mode_enabled():
+        raise HTTPException(status_code=400, detail="FCM_DELIVERY_MODE bukan 'topic'.")
+    background_tasks.add_task(_sync_all_topics_task)
+    return {"message": "Sinkronisasi topic FCM dimulai di latar belakang."}
+
+def _sync_all_topics_task():
+    db = SessionLocal()
+    try:
+        fcm_topics.sync_all_topic_subscriptions(db)
+    finally:
+        db.close()
+
 # --- FUNGSI DELETE YANG DIMODIFIKASI ---
 @router.delete("/{user_uid}", status_code=status.HTTP_200_OK)
-def delete_existing_user(user_uid: str, db: Session = Depends(get_db)):
+def delete_existing_user(user_uid: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    # Token dan topic dibaca sebelum dihapus: baris user_devices ikut terhapus (cascade)
+    db_user = crud.get_user(db, user_uid=user_uid)
+    if db_user is not None and fcm_topics.topic_mode_enabled():
+        tokens = [device.fcm_token for device in db_user.devices]
+        topics = fcm_topics.topics_for_user(db_user)
+    else:
+        tokens, topics = [], []
+
     # LANGKAH 1: Hapus pengguna dari database lokal (PostgreSQL) terlebih dahulu
     logger.info(f"Mencoba menghapus pengguna dengan UID '{user_uid}' dari database lokal.")
     is_deleted = crud.delete_user(db, user_uid=user_uid)
@@ -98,6 +199,10 @@ def delete_existing_user(user_uid: str, db: Session = Depends(get_db)):
     
     logger.info(f"Pengguna dengan UID '{user_uid}' berhasil dihapus dari database lokal.")
 
+    # Perangkat mantan user tidak boleh lagi menerima broadcast topic
+    if tokens:
+        background_tasks.add_task(fcm_topics.unsubscribe_tokens, tokens, topics)
+
     # LANGKAH 2: Sekarang, coba hapus pengguna dari firebase Auth
     try:
         logger.info(f"Mencoba menghapus pengguna dengan UID '{user_uid}' dari firebase Auth.")
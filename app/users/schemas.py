@@ -77,4 +77,20 @@ class UserInDB(UserBase):
     # ----------------------------------
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Perangkat (token FCM) milik user ---
+class UserDeviceCreate(BaseModel):
+    fcm_token: str = Field(..., min_length=1)
+    platform: Optional[str] = None
+
+class UserDeviceInDB(BaseModel):
+    id: int
+    user_uid: str
+    fcm_token: str
+    platform: Optional[str] = None
+    createOn: Optional[datetime] = None
+    last_seen: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,124 @@
+# benchmarks/bench_dataizin_list.py
+"""
+Benchmark requests/sec GET /api/dataizin/ sebelum dan sesudah AsyncSession.
+
+Varian "sync" adalah handler sebelum porting (def + get_db, dijalankan di threadpool FastAPI),
+dipasang sementara di /bench/dataizin-sync/. Varian "async" adalah route /api/dataizin/ saat ini
+(AsyncSession + run_sync). Keduanya dipanggil in-process lewat httpx.ASGITransport dengan
+`--concurrency` klien bersamaan, termasuk middleware aplikasi.
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_dataizin_list.py --requests 2000 --concurrency 50
+
+Dengan --base-url, hanya server yang sedang berjalan yang diukur (mis. jalankan sekali pada commit
+sebelum porting dan sekali pada commit ini untuk perbandingan antar revisi).
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+import httpx
+from fastapi import Depends, Query
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from common import SessionLocal, ensure_schema, load_app, seed_users, summarize
+
+USER_PREFIX = "bench-list-"
+# Log per request dari httpx menenggelamkan hasil benchmark
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def _install_sync_variant(app) -> None:
+    from app.core.database import get_db
+    from app.dataizin import crud, schemas
+
+    @app.get("/bench/dataizin-sync/", response_model=List[schemas.IzinInDB])
+    def get_izin_history_sync(
+        user_uid: str = Query(...),
+        tanggal: Optional[date] = None,
+        skip: int = 0,
+        limit: int = 100,
+        db: Session = Depends(get_db),
+    ):
+        return crud.get_izin_history_by_user(db, user_uid, tanggal, skip=skip, limit=limit)
+
+
+def _seed_izin(uids: list, per_user: int) -> None:
+    from app.dataizin.models import Izin
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(Izin).where(Izin.user_uid.in_(uids)))
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            Izin(
+                user_uid=uid, tanggal=(now - timedelta(days=i)).date(), jamKeluar=now - timedelta(days=i),
+                jamKembali=now - timedelta(days=i) + timedelta(minutes=10), status="Tepat Waktu",
+            )
+            for uid in uids for i in range(per_user)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _load(client: httpx.AsyncClient, path: str, uids: list, total: int, concurrency: int):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(uids[i % len(uids)])
+
+    async def _worker():
+        nonlocal errors
+        while True:
+            try:
+                uid = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            response = await client.get(path, params={"user_uid": uid, "limit": 50})
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[_worker() for _ in range(concurrency)])
+    return latencies, time.perf_counter() - started, errors
+
+
+async def _run(args) -> None:
+    ensure_schema()
+    uids = seed_users(USER_PREFIX, args.users)
+    _seed_izin(uids, args.izin_per_user)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+            latencies, elapsed, errors = await _load(client, "/api/dataizin/", uids, args.requests, args.concurrency)
+        summarize(args.base_url, latencies, elapsed, errors=errors)
+        return
+
+    app = load_app()
+    _install_sync_variant(app)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+        for label, path in (("sync", "/bench/dataizin-sync/"), ("async", "/api/dataizin/")):
+            await _load(client, path, uids, min(args.concurrency, args.requests), args.concurrency)  # pemanasan pool
+            latencies, elapsed, errors = await _load(client, path, uids, args.requests, args.concurrency)
+            summarize(label, latencies, elapsed, errors=errors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--izin-per-user", type=int, default=100)
+    parser.add_argument("--base-url", default=None, help="Ukur server yang sedang berjalan, bukan in-process")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/bench_datatelat_archive.py
+"""
+Benchmark pengarsipan data telat: archiver lama (ORM per baris dengan joinedload izin/user/approved_by)
+dibandingkan transfer_old_data_telat_to_archive_v2 (INSERT ... SELECT per batch dengan watermark).
+Kedua varian dijalankan pada dataset yang sama: `--rows` data telat tahun-tahun lalu plus sebagian
+kecil data tahun berjalan yang harus tetap di tabel live.
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_datatelat_archive.py --rows 20000
+
+Gunakan database khusus benchmark: baris dataIzin/dataTelat milik user benchmark dan tabel arsipnya
+dihapus sebelum setiap varian.
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, extract, insert, inspect, text
+from sqlalchemy.orm import joinedload
+
+from common import SessionLocal, engine, ensure_schema, seed_users
+
+from app.core.archive import archive_checkpoint_table, archive_models
+from app.core.timezone import GMT7_TIMEZONE
+from app.datatelat import crud
+from app.datatelat.models import DataTelat
+from app.dataizin.models import Izin
+
+USER_PREFIX = "bench-archive-"
+
+
+def legacy_transfer(db) -> int:
+    """Salinan archiver sebelum v2 (tanpa cabang mode partisi), hanya untuk perbandingan."""
+    current_year_gmt7 = datetime.now(GMT7_TIMEZONE).year
+    old_entries = db.query(DataTelat)\
+        .join(Izin, DataTelat.izin_no == Izin.no)\
+        .filter(extract("year", Izin.tanggal) != current_year_gmt7)\
+        .options(joinedload(DataTelat.izin), joinedload(DataTelat.user), joinedload(DataTelat.approved_by))\
+        .all()
+
+    by_year = {}
+    for entry in old_entries:
+        if entry.izin and entry.izin.tanggal:
+            by_year.setdefault(entry.izin.tanggal.year, []).append(entry)
+
+    moved = 0
+    for year, entries in by_year.items():
+        ArchivedDataTelat = archive_models.get_model(DataTelat.__tablename__, year)
+        ArchivedDataTelat.__table__.create(db.connection(), checkfirst=True)
+        archive_models.mark_exists(f"dataTelat_{year}")
+        for entry in entries:
+            values = {}
+            for column in DataTelat.__table__.columns:
+                value = getattr(entry, column.name)
+                if isinstance(value, datetime) and value.tzinfo is None:
+                    value = value.replace(tzinfo=timezone.utc)
+                values[column.name] = value
+            db.add(ArchivedDataTelat(**values))
+            db.delete(entry)
+            moved += 1
+        db.commit()
+    return moved
+
+
+def _reset_and_seed(uids: list, rows: int, current_ratio: float) -> None:
+    db = SessionLocal()
+    try:
+        for table_name in inspect(engine).get_table_names():
+            if table_name.startswith(("dataTelat_", "dataIzin_")) and table_name[-4:].isdigit():
+                db.execute(text(f'DROP TABLE "{table_name}"'))
+        db.execute(delete(DataTelat).where(DataTelat.user_uid.in_(uids)))
+        db.execute(delete(Izin).where(Izin.user_uid.in_(uids)))
+        db.execute(delete(archive_checkpoint_table))
+        db.commit()
+
+        this_year = datetime.now(GMT7_TIMEZONE).year
+        current_every = max(1, round(1 / current_ratio)) if current_ratio else None
+        izin_rows, telat_rows = [], []
+        for i in range(rows):
+            if current_every and i % current_every == 0:
+                tanggal = date(this_year, 1, 1) + timedelta(days=i % 28)
+            else:
+                tanggal = date(this_year - 1 - i % 2, 1, 1) + timedelta(days=i % 360)
+            jam_keluar = datetime(tanggal.year, tanggal.month, tanggal.day, 3, tzinfo=timezone.utc)
+            user_uid = uids[i % len(uids)]
+            izin_rows.append({
+                "user_uid": user_uid, "tanggal": tanggal, "jamKeluar": jam_keluar,
+                "jamKembali": jam_keluar + timedelta(minutes=25), "status": "Lewat Waktu",
+            })
+        izin_nos = db.execute(insert(Izin).returning(Izin.no, Izin.user_uid, Izin.tanggal), izin_rows).all()
+        for no, user_uid, tanggal in izin_nos:
+            telat_rows.append({
+                "izin_no": no, "user_uid": user_uid, "tanggal": tanggal, "by": uids[0],
+                "sanksi": "Push Up", "denda_nominal": 300, "status": "Done",
+            })
+        db.execute(insert(DataTelat), telat_rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_variant(label: str, fn, uids: list, rows: int, current_ratio: float) -> dict:
+    _reset_and_seed(uids, rows, current_ratio)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        moved = fn(db)
+        elapsed = time.perf_counter() - started
+        remaining = db.query(DataTelat).filter(DataTelat.user_uid.in_(uids)).count()
+    finally:
+        db.close()
+    print(
+        f"variant={label} moved={moved} remaining_live={remaining} elapsed_s={elapsed:.3f} "
+        f"rows_per_second={moved / elapsed if elapsed > 0 else 0:.0f}"
+    )
+    return {"moved": moved, "elapsed": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--current-ratio", type=float, default=0.05, help="Porsi baris tahun berjalan (tidak diarsip)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    ensure_schema()
+    uids = seed_users(USER_PREFIX, args.users)
+    _run_variant("legacy", legacy_transfer, uids, args.rows, args.current_ratio)
+    _run_variant(
+        "v2",
+        lambda db: crud.transfer_old_data_telat_to_archive_v2(db, batch_size=args.batch_size, full_scan=True),
+        uids, args.rows, args.current_ratio,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_izin_admission.py
+"""
+Benchmark konkurensi admission izin keluar: alur lama (get_user, izin Pending, hitung kuota,
+create_izin = empat round trip tanpa kunci) dibandingkan admit_izin_keluar (kunci baris user,
+hitung, insert dalam satu transaksi). Setiap ronde, semua user melakukan `--taps` tap bersamaan.
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_izin_admission.py --users 50 --taps 4 --rounds 5
+
+Gunakan database khusus benchmark: izin milik user benchmark dihapus di setiap ronde.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+
+from common import SessionLocal, ensure_schema, seed_users, summarize
+
+from app.core.outbox import notification_outbox_table
+from app.core.timezone import today_local
+from app.dataizin import crud, schemas
+from app.dataizin.models import Izin
+
+USER_PREFIX = "bench-admission-"
+
+
+def _izin_create(user_uid: str) -> schemas.IzinCreate:
+    return schemas.IzinCreate(
+        user_uid=user_uid, tanggal=today_local(), jamKeluar=datetime.now(timezone.utc), ipKeluar="127.0.0.1"
+    )
+
+
+def legacy_tap(user_uid: str) -> str:
+    """Alur sebelum admit_izin_keluar: setiap pemeriksaan adalah round trip tersendiri."""
+    db = SessionLocal()
+    try:
+        if db.query(crud.user_models.User).filter(crud.user_models.User.uid == user_uid).first() is None:
+            return "user_not_found"
+        if crud.get_pending_izin_by_user(db, user_uid):
+            return "pending"
+        if crud.get_izin_count_for_today(db, user_uid) >= crud.get_max_daily_izin():
+            return "quota"
+        try:
+            crud.create_izin(db, _izin_create(user_uid))
+        except IntegrityError:
+            # Hanya partial unique index yang mencegah izin Pending ganda
+            db.rollback()
+            return "integrity_error"
+        return "admitted"
+    finally:
+        db.close()
+
+
+def atomic_tap(user_uid: str) -> str:
+    db = SessionLocal()
+    try:
+        crud.admit_izin_keluar(db, _izin_create(user_uid))
+        return "admitted"
+    except crud.IzinAdmissionRejected as rejected:
+        return rejected.reason
+    finally:
+        db.close()
+
+
+def _reset(uids: list, outbox_floor: int) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(delete(Izin).where(Izin.user_uid.in_(uids)))
+        db.execute(delete(notification_outbox_table).where(notification_outbox_table.c.id > outbox_floor))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _pending_per_user(uids: list) -> dict:
+    db = SessionLocal()
+    try:
+        return dict(db.execute(
+            select(Izin.user_uid, func.count()).where(Izin.user_uid.in_(uids), Izin.status == "Pending").group_by(Izin.user_uid)
+        ).all())
+    finally:
+        db.close()
+
+
+def run_variant(label: str, tap, uids: list, taps: int, rounds: int, outbox_floor: int) -> dict:
+    latencies, outcomes = [], {}
+    duplicate_users = 0
+    elapsed = 0.0
+    lock = threading.Lock()
+    for _ in range(rounds):
+        _reset(uids, outbox_floor)
+        barrier = threading.Barrier(len(uids) * taps)
+
+        def _timed(user_uid: str):
+            barrier.wait()
+            started = time.perf_counter()
+            outcome = tap(user_uid)
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(uids) * taps) as pool:
+            list(pool.map(_timed, [uid for uid in uids for _ in range(taps)]))
+        elapsed += time.perf_counter() - started
+        duplicate_users += sum(1 for count in _pending_per_user(uids).values() if count > 1)
+
+    _reset(uids, outbox_floor)
+    return summarize(label, latencies, elapsed, duplicate_pending_users=duplicate_users, **outcomes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--taps", type=int, default=4, help="Tap bersamaan per user per ronde")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    ensure_schema()
+    uids = seed_users(USER_PREFIX, args.users)
+    db = SessionLocal()
+    try:
+        outbox_floor = db.execute(select(func.coalesce(func.max(notification_outbox_table.c.id), 0))).scalar()
+    finally:
+        db.close()
+
+    run_variant("legacy", legacy_tap, uids, args.taps, args.rounds, outbox_floor)
+    run_variant("atomic", atomic_tap, uids, args.taps, args.rounds, outbox_floor)
+
+
+if __name__ == "__main__":
+    main()
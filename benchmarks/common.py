@@ -0,0 +1,96 @@
+# benchmarks/common.py
+"""
+Bantuan bersama untuk skrip benchmark. Skrip dijalankan dari root repo, mis.
+`DATABASE_URL=postgresql://... python benchmarks/bench_izin_admission.py`.
+Tanpa DATABASE_URL dipakai SQLite sementara (hasil konkurensi SQLite tidak representatif).
+"""
+import os
+import statistics
+import sys
+import tempfile
+from datetime import date
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='adminpython-bench-'), 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+# Semua model diimpor agar relationship antar-model dapat dikonfigurasi
+from app.roles.models import Role  # noqa: E402
+from app.users.models import User  # noqa: E402
+from app.shift import models as _shift_models  # noqa: E402,F401
+from app.dataizin import models as _izin_models  # noqa: E402,F401
+from app.datatelat import models as _telat_models  # noqa: E402,F401
+
+BENCH_ROLE = "Benchmark"
+
+
+def load_app():
+    """
+    Mengimpor aplikasi FastAPI tanpa service account Firebase: SDK diinisialisasi lebih dulu dengan
+    kredensial anonim sehingga app.autentikasi.security tidak membaca FIREBASE_SERVICE_ACCOUNT_KEY.
+    """
+    import firebase_admin
+    import google.auth.credentials
+    from firebase_admin import credentials
+
+    class _AnonymousCredential(credentials.Base):
+        def get_credential(self):
+            return google.auth.credentials.AnonymousCredentials()
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(_AnonymousCredential(), {"projectId": "adminpython-bench"})
+    from app.main import app
+    return app
+
+
+def ensure_schema() -> None:
+    """Membuat tabel yang belum ada (di PostgreSQL sebaiknya `alembic upgrade head` lebih dulu)."""
+    Base.metadata.create_all(engine)
+
+
+def seed_users(prefix: str, count: int) -> list:
+    """Membuat user `{prefix}{i}` yang belum ada; mengembalikan daftar uid."""
+    db = SessionLocal()
+    try:
+        role = db.query(Role).filter(Role.nama == BENCH_ROLE).first()
+        if role is None:
+            role = Role(nama=BENCH_ROLE, deskripsi="Dibuat oleh skrip benchmark")
+            db.add(role)
+            db.flush()
+        uids = [f"{prefix}{i}" for i in range(count)]
+        existing = {uid for (uid,) in db.query(User.uid).filter(User.uid.in_(uids))}
+        db.add_all([
+            User(
+                uid=uid, fullname=f"Benchmark {uid}", email=f"{uid}@benchmark.local",
+                joinDate=date(2024, 1, 1), grupDate=date(2024, 1, 1), role_id=role.id, status="Aktif",
+            )
+            for uid in uids if uid not in existing
+        ])
+        db.commit()
+        return uids
+    finally:
+        db.close()
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label: str, latencies_ms: list, elapsed_s: float, **extra) -> dict:
+    summary = {
+        "variant": label,
+        "requests": len(latencies_ms),
+        "elapsed_s": round(elapsed_s, 3),
+        "per_second": round(len(latencies_ms) / elapsed_s, 1) if elapsed_s > 0 else None,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "mean_ms": round(statistics.fmean(latencies_ms), 2) if latencies_ms else 0.0,
+        **extra,
+    }
+    print(" ".join(f"{key}={value}" for key, value in summary.items()))
+    return summary
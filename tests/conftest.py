@@ -0,0 +1,80 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from datetime import date
+
+import pytest
+
+# Database SQLite sementara; harus diatur sebelum app.core.database diimpor
+_DB_DIR = tempfile.mkdtemp(prefix="adminpython-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import firebase_admin  # noqa: E402
+import google.auth.credentials  # noqa: E402
+from firebase_admin import credentials  # noqa: E402
+
+
+class _AnonymousCredential(credentials.Base):
+    """Kredensial palsu agar app.autentikasi.security tidak membaca service account saat diimpor."""
+
+    def get_credential(self):
+        return google.auth.credentials.AnonymousCredentials()
+
+
+if not firebase_admin._apps:
+    firebase_admin.initialize_app(_AnonymousCredential(), {"projectId": "adminpython-tests"})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.autentikasi.security import verify_firebase_token  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.roles.models import Role  # noqa: E402
+from app.users.models import User  # noqa: E402
+
+ADMIN_UID = "admin-uid"
+
+
+@pytest.fixture()
+def db_session():
+    """Skema dibuat ulang per test sehingga setiap test mulai dari database kosong."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture()
+def client(db_session):
+    """TestClient dengan token Firebase admin; startup event (scheduler, dispatcher) tidak dijalankan."""
+    app.dependency_overrides[verify_firebase_token] = lambda: {"uid": ADMIN_UID, "admin": True}
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def make_user(db, uid: str, role_nama: str = "Staff", **fields) -> User:
+    role = db.query(Role).filter(Role.nama == role_nama).first()
+    if role is None:
+        role = Role(nama=role_nama)
+        db.add(role)
+        db.flush()
+    user = User(
+        uid=uid,
+        fullname=fields.pop("fullname", f"User {uid}"),
+        email=fields.pop("email", f"{uid}@example.com"),
+        joinDate=fields.pop("joinDate", date(2024, 1, 1)),
+        grupDate=fields.pop("grupDate", date(2024, 1, 1)),
+        role_id=role.id,
+        status=fields.pop("status", "Aktif"),
+        **fields,
+    )
+    db.add(user)
+    db.commit()
+    return user
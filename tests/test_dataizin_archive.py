@@ -0,0 +1,113 @@
+# tests/test_dataizin_archive.py
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.autentikasi.security import verify_firebase_token
+from app.core.archive import get_checkpoint
+from app.dataizin import crud
+from app.dataizin.models import Izin
+from app.datatelat.models import DataTelat
+from app.main import app
+
+from conftest import make_user
+
+
+def _izin(db, no: int, user_uid: str, tanggal: date, status: str = "Tepat Waktu") -> Izin:
+    izin = Izin(
+        no=no,
+        user_uid=user_uid,
+        tanggal=tanggal,
+        jamKeluar=datetime(tanggal.year, tanggal.month, tanggal.day, 3, 0, tzinfo=timezone.utc),
+        status=status,
+    )
+    db.add(izin)
+    return izin
+
+
+def test_archive_search_is_routed_before_izin_detail(client, db_session):
+    make_user(db_session, "u1")
+    make_user(db_session, "u2")
+    _izin(db_session, 1, "u1", date(2026, 3, 1))
+    _izin(db_session, 2, "u1", date(2026, 3, 2))
+    _izin(db_session, 3, "u2", date(2026, 3, 2))
+    _izin(db_session, 4, "u1", date(2025, 12, 31))
+    db_session.commit()
+
+    response = client.get(
+        "/api/dataizin/archive/",
+        params={"tanggal_mulai": "2026-01-01", "tanggal_selesai": "2026-12-31", "user_uid": "u1"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert [row["no"] for row in response.json()] == [2, 1]
+    assert all(row["user"]["fullname"] == "User u1" for row in response.json())
+
+
+def test_archive_search_pages_with_cursor(client, db_session):
+    make_user(db_session, "u1")
+    for no in range(1, 6):
+        _izin(db_session, no, "u1", date(2026, 3, no))
+    db_session.commit()
+
+    params = {"tanggal_mulai": "2026-01-01", "tanggal_selesai": "2026-12-31", "limit": 3}
+    first = client.get("/api/dataizin/archive/", params=params)
+    assert first.status_code == 200, first.text
+    assert [row["no"] for row in first.json()] == [5, 4, 3]
+
+    second = client.get("/api/dataizin/archive/", params={**params, "cursor": first.headers["X-Next-Cursor"]})
+    assert second.status_code == 200, second.text
+    assert [row["no"] for row in second.json()] == [2, 1]
+
+
+def test_izin_detail_still_resolves_numeric_path(client, db_session):
+    make_user(db_session, "u1")
+    _izin(db_session, 7, "u1", date(2026, 3, 1))
+    db_session.commit()
+
+    response = client.get("/api/dataizin/7/")
+    assert response.status_code == 200, response.text
+    assert response.json()["no"] == 7
+
+
+def test_archiver_keeps_watermark_and_sweeps_previous_day(db_session, monkeypatch):
+    make_user(db_session, "u1")
+    _izin(db_session, 1, "u1", date(2026, 3, 1))
+    # Dibuat sebelum run malam pertama, baru lolos cutoff keesokan harinya
+    _izin(db_session, 2, "u1", date(2026, 3, 2))
+    _izin(db_session, 3, "u1", date(2026, 2, 1), status="Lewat Waktu")
+    db_session.add(DataTelat(no=1, izin_no=3, user_uid="u1", tanggal=date(2026, 2, 1), denda_nominal=300))
+    db_session.commit()
+
+    monkeypatch.setattr(crud, "today_local", lambda: date(2026, 3, 2))
+    assert crud.transfer_old_data_izin_to_archive(db_session, batch_size=2) == 1
+    assert get_checkpoint(db_session, crud.IZIN_ARCHIVE_CHECKPOINT) == (3, date(2026, 3, 2))
+
+    _izin(db_session, 4, "u1", date(2026, 3, 2))
+    db_session.commit()
+    monkeypatch.setattr(crud, "today_local", lambda: date(2026, 3, 3))
+    assert crud.transfer_old_data_izin_to_archive(db_session, batch_size=2) == 2
+
+    # Watermark tidak dimulai ulang; izin yang dirujuk dataTelat tetap di tabel live
+    assert get_checkpoint(db_session, crud.IZIN_ARCHIVE_CHECKPOINT) == (4, date(2026, 3, 3))
+    assert [izin.no for izin in db_session.query(Izin).all()] == [3]
+
+
+@pytest.mark.parametrize("path", ["/api/dataizin/archive/2024", "/api/datatelat/archive/2024"])
+def test_archive_by_year_requires_admin(client, db_session, path):
+    app.dependency_overrides[verify_firebase_token] = lambda: {"uid": "u1", "admin": False}
+
+    response = client.get(path)
+    assert response.status_code == 403, response.text
+
+
+def test_archive_by_year_lists_archived_izin(client, db_session, monkeypatch):
+    make_user(db_session, "u1")
+    _izin(db_session, 1, "u1", date(2024, 6, 1))
+    db_session.commit()
+    monkeypatch.setattr(crud, "today_local", lambda: date(2024, 6, 2))
+    assert crud.transfer_old_data_izin_to_archive(db_session, full_scan=True) == 1
+
+    response = client.get("/api/dataizin/archive/2024")
+    assert response.status_code == 200, response.text
+    assert 1 in [row["no"] for row in response.json()]
@@ -0,0 +1,58 @@
+# tests/test_dataizin_history.py
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.core.pagination import next_cursor
+from app.dataizin import crud
+from app.dataizin.models import Izin
+
+from conftest import make_user
+
+
+def _izin(db, no: int, tanggal: date, create_on: datetime) -> Izin:
+    # createOn eksplisit: default CURRENT_TIMESTAMP SQLite tidak sebanding dengan nilai cursor
+    izin = Izin(no=no, user_uid="u1", tanggal=tanggal, status="Tepat Waktu", createOn=create_on)
+    db.add(izin)
+    return izin
+
+
+def test_history_filter_follows_create_on_for_back_dated_izin(db_session):
+    make_user(db_session, "u1")
+    # 03:00 UTC = 10:00 GMT+7 pada 10 Maret, tetapi tanggal izin diisi mundur seminggu
+    _izin(db_session, 1, date(2026, 3, 3), datetime(2026, 3, 10, 3, 0, tzinfo=timezone.utc))
+    _izin(db_session, 2, date(2026, 3, 10), datetime(2026, 3, 10, 4, 0, tzinfo=timezone.utc))
+    _izin(db_session, 3, date(2026, 3, 11), datetime(2026, 3, 11, 4, 0, tzinfo=timezone.utc))
+    db_session.commit()
+
+    by_user = crud.get_izin_history_by_user(db_session, "u1", date(2026, 3, 10))
+    all_users = crud.get_all_izins_history(db_session, date(2026, 3, 10))
+
+    assert sorted(izin.no for izin in by_user) == [1, 2]
+    assert sorted(izin.no for izin in all_users) == [1, 2]
+
+
+def test_tanggal_cannot_be_nulled_so_keyset_pages_reach_every_row(client, db_session):
+    make_user(db_session, "u1")
+    for no in range(1, 6):
+        _izin(db_session, no, date(2026, 3, no), datetime(2026, 3, no, 4, 0, tzinfo=timezone.utc))
+    db_session.commit()
+
+    # PUT dengan tanggal null ditolak; baris tetap berada di urutan keyset
+    response = client.put("/api/dataizin/3", json={"tanggal": None})
+    assert response.status_code == 422, response.text
+    assert client.put("/api/dataizin/3", json={"ipKeluar": "10.0.0.1"}).status_code == 200
+
+    seen, cursor = [], None
+    while True:
+        page = crud.get_all_izins_history(db_session, limit=2, cursor=cursor)
+        seen.extend(izin.no for izin in page)
+        cursor = next_cursor(page, crud.IZIN_SORT_ATTRS, 2)
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+    with pytest.raises(IntegrityError):
+        db_session.execute(insert(Izin).values(no=6, user_uid="u1", tanggal=None, status="Tepat Waktu"))
@@ -0,0 +1,57 @@
+# tests/test_datatelat_archive.py
+from datetime import date, datetime
+
+from sqlalchemy import inspect, select
+
+from app.core.archive import archive_checkpoint_table, catch_up_predicate, get_checkpoint, set_watermark
+from app.core.database import engine
+from app.datatelat import crud
+from app.datatelat.models import DataTelat
+from app.dataizin.models import Izin
+
+from conftest import make_user
+
+
+def _frozen_year(year: int):
+    class _Datetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(year, 3, 1, 12, 0, tzinfo=tz)
+    return _Datetime
+
+
+def _telat(db, no: int, tanggal: date) -> None:
+    db.add(Izin(no=no, user_uid="u1", tanggal=tanggal, status="Lewat Waktu"))
+    db.add(DataTelat(no=no, izin_no=no, user_uid="u1", tanggal=tanggal, denda_nominal=300, status="Done"))
+
+
+def test_checkpoint_keeps_watermark_across_cutoffs(db_session):
+    assert get_checkpoint(db_session, "contoh") == (0, None)
+    set_watermark(db_session, "contoh", 42, 5, date(2026, 1, 1))
+    db_session.commit()
+
+    assert get_checkpoint(db_session, "contoh") == (42, date(2026, 1, 1))
+    columns = DataTelat.__table__.c
+    assert catch_up_predicate(columns.no, columns.tanggal, 42, date(2026, 1, 1), date(2026, 1, 1)) is None
+    assert catch_up_predicate(columns.no, columns.tanggal, 0, None, date(2026, 1, 1)) is None
+    sweep = catch_up_predicate(columns.no, columns.tanggal, 42, date(2026, 1, 1), date(2027, 1, 1))
+    assert len(sweep.clauses) == 3
+
+
+def test_rows_below_previous_watermark_are_archived_next_year(db_session, monkeypatch):
+    make_user(db_session, "u1")
+    # no=1 dibuat di tahun berjalan; no=2 adalah izin 31 Des yang baru dikembalikan setelahnya
+    _telat(db_session, 1, date(2026, 1, 2))
+    _telat(db_session, 2, date(2025, 12, 31))
+    db_session.commit()
+
+    monkeypatch.setattr(crud, "datetime", _frozen_year(2026))
+    assert crud.transfer_old_data_telat_to_archive_v2(db_session, batch_size=10) == 1
+    assert db_session.execute(select(archive_checkpoint_table.c.last_no)).scalar() == 2
+
+    monkeypatch.setattr(crud, "datetime", _frozen_year(2027))
+    assert crud.transfer_old_data_telat_to_archive_v2(db_session, batch_size=10) == 1
+    assert get_checkpoint(db_session, crud.TELAT_ARCHIVE_CHECKPOINT) == (2, date(2027, 1, 1))
+
+    assert db_session.query(DataTelat).count() == 0
+    assert {"dataTelat_2025", "dataTelat_2026", "dataIzin_2026"} <= set(inspect(engine).get_table_names())
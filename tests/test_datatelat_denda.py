@@ -0,0 +1,42 @@
+# tests/test_datatelat_denda.py
+from datetime import date, datetime, timezone
+
+from app.datatelat.models import DataTelat, FineLedger
+from app.dataizin.models import Izin
+
+from conftest import ADMIN_UID, make_user
+
+
+def _seed_telat(db) -> DataTelat:
+    make_user(db, ADMIN_UID, role_nama="Admin")
+    make_user(db, "u1")
+    izin = Izin(
+        no=1, user_uid="u1", tanggal=date(2026, 3, 2), status="Lewat Waktu",
+        jamKeluar=datetime(2026, 3, 2, 3, 0, tzinfo=timezone.utc),
+        jamKembali=datetime(2026, 3, 2, 3, 30, tzinfo=timezone.utc),
+    )
+    telat = DataTelat(no=1, izin_no=1, user_uid="u1", tanggal=izin.tanggal, sanksi="Push Up", denda_nominal=300, status="Pending")
+    db.add_all([izin, telat, FineLedger(user_uid="u1", periode=date(2026, 3, 1), jumlah_telat=1, total_denda=300)])
+    db.commit()
+    return telat
+
+
+def test_update_accepts_legacy_denda_text(client, db_session):
+    _seed_telat(db_session)
+
+    response = client.put("/api/datatelat/1", json={"denda": "500"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["denda_nominal"] == 500
+    assert response.json()["denda"] == "500"
+    db_session.expire_all()
+    assert db_session.get(FineLedger, ("u1", date(2026, 3, 1))).total_denda == 500
+
+
+def test_update_accepts_denda_nominal(client, db_session):
+    _seed_telat(db_session)
+
+    response = client.put("/api/datatelat/1", json={"denda_nominal": 0})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["denda"] == "0"
@@ -0,0 +1,98 @@
+# tests/test_datatelat_query_plan.py
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app.core.database import engine
+from app.core.pagination import next_cursor
+from app.datatelat import crud
+from app.datatelat.models import DataTelat
+from app.dataizin.models import Izin
+from app.users.models import User
+
+from conftest import make_user
+
+ROWS = 30000
+USERS = 50
+# Query utama + selectinload user, izin, izin.user, approved_by
+EXPECTED_STATEMENTS = 5
+
+
+@pytest.fixture()
+def seeded_telat(db_session):
+    """Puluhan ribu izin + data telat lintas dua tahun, diisi dengan bulk insert Core."""
+    for index in range(USERS):
+        make_user(db_session, f"u{index}")
+    start = date(2025, 1, 1)
+    izin_rows, telat_rows = [], []
+    for no in range(1, ROWS + 1):
+        tanggal = start + timedelta(days=no % 700)
+        jam_keluar = datetime(tanggal.year, tanggal.month, tanggal.day, 3, tzinfo=timezone.utc)
+        user_uid = f"u{no % USERS}"
+        izin_rows.append({
+            "no": no, "user_uid": user_uid, "tanggal": tanggal, "jamKeluar": jam_keluar,
+            "jamKembali": jam_keluar + timedelta(minutes=20), "status": "Lewat Waktu",
+        })
+        telat_rows.append({
+            "no": no, "izin_no": no, "user_uid": user_uid, "tanggal": tanggal, "by": f"u{(no + 1) % USERS}",
+            "sanksi": "Push Up", "denda_nominal": 300, "status": "Done",
+            # createOn eksplisit: default CURRENT_TIMESTAMP SQLite tidak sebanding dengan nilai cursor
+            "createOn": jam_keluar + timedelta(minutes=20),
+        })
+    db_session.execute(insert(Izin), izin_rows)
+    db_session.execute(insert(DataTelat), telat_rows)
+    db_session.commit()
+    db_session.execute(text("ANALYZE"))
+    return db_session
+
+
+def _capture_statements(fn):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return result, statements
+
+
+@pytest.mark.parametrize("tahun", [None, 2026])
+def test_list_query_does_not_join_izin(seeded_telat, tahun):
+    db = seeded_telat
+    db.expunge_all()
+
+    rows, statements = _capture_statements(lambda: crud.get_list_dataTelat(db, limit=100, tahun=tahun))
+
+    assert len(rows) == 100
+    assert len(statements) == EXPECTED_STATEMENTS
+    main_sql, main_params = statements[0]
+    assert '"dataTelat"' in main_sql
+    assert '"dataIzin"' not in main_sql and "JOIN" not in main_sql.upper()
+
+    plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {main_sql}", main_params).all()
+    plan_text = "\n".join(row[-1] for row in plan)
+    assert "dataIzin" not in plan_text
+    assert "dataTelat" in plan_text
+    # Relasi dimuat per batch dengan IN (...), bukan satu query per baris
+    assert all(" IN (" in sql.upper() for sql, _ in statements[1:])
+    # Baris tidak dikalikan oleh join: setiap relasi terisi dari query selectin
+    assert all(isinstance(row.user, User) and isinstance(row.izin, Izin) for row in rows)
+
+
+def test_keyset_page_keeps_statement_count(seeded_telat):
+    db = seeded_telat
+    first = crud.get_list_dataTelat(db, limit=100)
+    cursor = next_cursor(first, crud.DATATELAT_SORT_ATTRS, 100)
+    db.expunge_all()
+
+    rows, statements = _capture_statements(lambda: crud.get_list_dataTelat(db, limit=100, cursor=cursor))
+
+    assert len(rows) == 100
+    assert rows[0].no not in {row.no for row in first}
+    assert len(statements) == EXPECTED_STATEMENTS
+    assert '"dataIzin"' not in statements[0][0]
@@ -0,0 +1,35 @@
+# tests/test_izin_admission.py
+from app.dataizin import crud
+from app.dataizin.models import Izin
+
+from conftest import make_user
+
+IZIN_KELUAR = {"user_uid": "u1", "tanggal": "2026-03-02", "jamKeluar": "2026-03-02T03:00:00Z", "ipKeluar": "10.0.0.1"}
+
+
+def test_second_tap_is_rejected_while_pending(client, db_session):
+    make_user(db_session, "u1")
+
+    first = client.post("/api/dataizin/", json=IZIN_KELUAR)
+    second = client.post("/api/dataizin/", json={**IZIN_KELUAR, "tanggal": "2026-03-03"})
+
+    assert first.status_code == 201, first.text
+    assert second.status_code == 400
+    assert "Pending" in second.json()["detail"]
+    assert db_session.query(Izin).filter(Izin.user_uid == "u1").count() == 1
+
+
+def test_daily_quota_counts_izin_created_today(client, db_session, monkeypatch):
+    make_user(db_session, "u1")
+    monkeypatch.setattr(crud, "get_max_daily_izin", lambda: 1)
+    db_session.add(Izin(user_uid="u1", status="Tepat Waktu"))
+    db_session.commit()
+
+    response = client.post("/api/dataizin/", json=IZIN_KELUAR)
+
+    assert response.status_code == 403, response.text
+
+
+def test_unknown_user_is_rejected(client, db_session):
+    response = client.post("/api/dataizin/", json={**IZIN_KELUAR, "user_uid": "missing"})
+    assert response.status_code == 400
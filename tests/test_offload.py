@@ -0,0 +1,27 @@
+# tests/test_offload.py
+import asyncio
+
+import pytest
+
+from app.core.offload import BlockingOffloader
+
+
+def _fail():
+    raise RuntimeError("gagal")
+
+
+def test_failed_calls_are_not_counted_as_completed():
+    offloader = BlockingOffloader(max_workers=2, max_concurrency=2, queue_warning_threshold=10)
+
+    async def _scenario():
+        assert await offloader.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(RuntimeError):
+            await offloader.run(_fail)
+
+    try:
+        asyncio.run(_scenario())
+    finally:
+        offloader.shutdown()
+
+    stats = offloader.stats()
+    assert (stats["completed"], stats["failed"], stats["running"]) == (1, 1, 0)
@@ -0,0 +1,75 @@
+# tests/test_outbox.py
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+
+from app.core import outbox
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.outbox import NotificationDispatcher, enqueue_notification, notification_outbox_table as table
+
+
+def _run(coro):
+    async def _wrapped():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(_wrapped())
+
+
+def _rows(db):
+    db.expire_all()
+    return {row.id: row for row in db.execute(select(table).order_by(table.c.id)).all()}
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def test_row_reclaimed_by_another_worker_is_not_sent_twice(db_session, monkeypatch):
+    enqueue_notification(db_session, "A", "satu")
+    enqueue_notification(db_session, "B", "dua")
+    db_session.commit()
+    first_id, second_id = list(_rows(db_session))
+    delivered = []
+
+    async def _deliver(row):
+        delivered.append(row["id"])
+        if row["id"] == first_id:
+            # Worker lain mengklaim ulang baris kedua (lease dianggap habis) selama baris pertama dikirim
+            db_session.execute(update(table).where(table.c.id == second_id).values(attempts=table.c.attempts + 1))
+            db_session.commit()
+
+    dispatcher = NotificationDispatcher()
+    monkeypatch.setattr(dispatcher, "_deliver", _deliver)
+    processed = _run(dispatcher.dispatch_batch())
+
+    rows = _rows(db_session)
+    assert processed == 2
+    assert delivered == [first_id]
+    assert rows[first_id].status == outbox.STATUS_SENT
+    assert rows[second_id].status == outbox.STATUS_PENDING
+    assert rows[second_id].attempts == 2
+
+
+def test_lease_is_renewed_while_a_slow_broadcast_is_sending(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_LEASE_SECONDS", 0.2)
+    enqueue_notification(db_session, "Lambat", "fan-out panjang")
+    db_session.commit()
+    (row_id,) = list(_rows(db_session))
+    leased_until = []
+
+    async def _deliver(row):
+        for _ in range(4):
+            await asyncio.sleep(0.15)
+            leased_until.append((_aware(_rows(db_session)[row_id].next_attempt_at), datetime.now(timezone.utc)))
+
+    dispatcher = NotificationDispatcher()
+    monkeypatch.setattr(dispatcher, "_deliver", _deliver)
+    _run(dispatcher.dispatch_batch())
+
+    # Sepanjang pengiriman (0.6 s, tiga kali lease) baris tidak pernah bisa diklaim ulang
+    assert all(until > now for until, now in leased_until)
+    assert _rows(db_session)[row_id].status == outbox.STATUS_SENT
@@ -0,0 +1,25 @@
+# tests/test_partitioning.py
+import logging
+
+from app.core.partitioning import _unique_with_key
+
+PENDING_INDEX = (
+    'CREATE UNIQUE INDEX "uq_dataIzin_user_pending" ON "dataIzin" USING btree (user_uid) '
+    "WHERE ((status)::text = 'Pending'::text)"
+)
+
+
+def test_unique_index_gets_partition_key_and_warns(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.core.partitioning"):
+        rewritten = _unique_with_key(PENDING_INDEX, "tanggal")
+
+    assert "USING btree (user_uid, tanggal)" in rewritten
+    assert rewritten.endswith("WHERE ((status)::text = 'Pending'::text)")
+    assert "hanya unik per nilai 'tanggal'" in caplog.text
+
+
+def test_unique_index_with_partition_key_is_unchanged(caplog):
+    indexdef = 'CREATE UNIQUE INDEX "uq_x" ON "dataIzin" USING btree (no, tanggal)'
+    with caplog.at_level(logging.WARNING, logger="app.core.partitioning"):
+        assert _unique_with_key(indexdef, "tanggal") == indexdef
+    assert caplog.text == ""
@@ -0,0 +1,78 @@
+# tests/test_query_budgets.py
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.autentikasi.principal_cache import principal_cache
+from app.core.query_stats import QUERY_BUDGETS, QUERY_COUNT_HEADER
+from app.datatelat.models import DataTelat, FineLedger
+from app.dataizin.models import Izin
+from app.shift.models import Shift
+
+from conftest import ADMIN_UID, make_user
+
+# Schema shift memvalidasi uid sebagai UUID
+STAFF = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(6)]
+
+# URL konkret untuk setiap route yang memiliki anggaran; route baru di QUERY_BUDGETS wajib ditambahkan di sini
+ROUTE_URLS = {
+    ("GET", "/api/users/"): "/api/users/",
+    ("GET", "/api/users/{user_uid}"): f"/api/users/{STAFF[0]}",
+    ("GET", "/api/roles/"): "/api/roles/",
+    ("GET", "/api/shifts/"): "/api/shifts/",
+    ("GET", "/api/shifts/{shift_no}"): "/api/shifts/1",
+    ("GET", "/api/dataizin/"): f"/api/dataizin/?user_uid={STAFF[0]}",
+    ("GET", "/api/dataizin/all-pending/"): "/api/dataizin/all-pending/",
+    ("GET", "/api/dataizin/all-history/"): "/api/dataizin/all-history/",
+    ("GET", "/api/dataizin/archive/"): "/api/dataizin/archive/?tanggal_mulai=2025-01-01&tanggal_selesai=2026-12-31",
+    ("GET", "/api/datatelat/"): "/api/datatelat/",
+    ("GET", "/api/datatelat/ledger/"): "/api/datatelat/ledger/?tahun=2026",
+}
+
+
+def _seed(db) -> None:
+    """Beberapa baris per relasi agar lazy load per baris (N+1) terlihat pada jumlah statement."""
+    make_user(db, ADMIN_UID, role_nama="Admin")
+    for index, uid in enumerate(STAFF):
+        make_user(db, uid, role_nama="Staff" if index % 2 else "Supervisor", jabatan="Kasir")
+    base = datetime(2026, 3, 2, 3, 0, tzinfo=timezone.utc)
+    no = 0
+    for index, uid in enumerate(STAFF):
+        db.add(Shift(
+            no=index + 1, user_uid=uid, createdBy_uid=STAFF[0],
+            tanggalMulai=date(2026, 3, 1), tanggalAkhir=date(2026, 3, 31), jadwal="Pagi",
+        ))
+        for day in range(3):
+            no += 1
+            jam_keluar = base + timedelta(days=day)
+            status = "Pending" if day == 2 else "Lewat Waktu"
+            db.add(Izin(
+                no=no, user_uid=uid, tanggal=jam_keluar.date(), jamKeluar=jam_keluar, status=status,
+                jamKembali=None if status == "Pending" else jam_keluar + timedelta(minutes=25),
+            ))
+            if status == "Lewat Waktu":
+                db.add(DataTelat(
+                    izin_no=no, user_uid=uid, tanggal=jam_keluar.date(), by=ADMIN_UID,
+                    sanksi="Push Up", denda_nominal=300, status="Done",
+                ))
+        db.add(FineLedger(user_uid=uid, periode=date(2026, 3, 1), jumlah_telat=2, total_denda=600))
+    db.commit()
+
+
+def test_every_budgeted_route_is_covered():
+    assert set(ROUTE_URLS) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("route", sorted(QUERY_BUDGETS), ids=lambda route: f"{route[0]} {route[1]}")
+def test_route_stays_within_query_budget(client, db_session, route):
+    _seed(db_session)
+    # Request pertama mengisi cache per proses (principal); anggaran diukur pada request berikutnya
+    principal_cache.clear()
+    client.request(route[0], ROUTE_URLS[route])
+
+    response = client.request(route[0], ROUTE_URLS[route])
+
+    assert response.status_code == 200, response.text
+    assert response.json(), "Route harus mengembalikan data agar N+1 terdeteksi"
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    assert count <= QUERY_BUDGETS[route], f"{route[0]} {route[1]}: {count} statement, anggaran {QUERY_BUDGETS[route]}"
@@ -0,0 +1,46 @@
+# tests/test_user_topics.py
+import firebase_admin.auth
+import pytest
+
+from app.core import fcm_topics
+from app.core.config import settings
+from app.users.models import UserDevice
+
+from conftest import make_user
+
+
+@pytest.fixture()
+def topic_calls(monkeypatch):
+    """Mode topic dengan subscribe/unsubscribe yang dicatat, tanpa memanggil Firebase."""
+    calls = []
+    monkeypatch.setattr(settings, "FCM_DELIVERY_MODE", "topic")
+    monkeypatch.setattr(fcm_topics, "subscribe_tokens", lambda tokens, topics: calls.append(("subscribe", list(tokens), list(topics))))
+    monkeypatch.setattr(fcm_topics, "unsubscribe_tokens", lambda tokens, topics: calls.append(("unsubscribe", list(tokens), list(topics))))
+    monkeypatch.setattr(firebase_admin.auth, "delete_user", lambda uid: None)
+    return calls
+
+
+def test_delete_user_unsubscribes_devices(client, db_session, topic_calls):
+    make_user(db_session, "boss", role_nama="Admin", jabatan="Kasir")
+    db_session.add_all([UserDevice(user_uid="boss", fcm_token="tok-1"), UserDevice(user_uid="boss", fcm_token="tok-2")])
+    db_session.commit()
+
+    response = client.delete("/api/users/boss")
+
+    assert response.status_code == 200, response.text
+    assert topic_calls == [("unsubscribe", ["tok-1", "tok-2"], ["all_staff", "admins", "jabatan_kasir"])]
+
+
+def test_moving_token_drops_previous_owner_topics(client, db_session, topic_calls):
+    make_user(db_session, "boss", role_nama="Admin", jabatan="Kasir")
+    make_user(db_session, "staff", jabatan="Gudang")
+    db_session.add(UserDevice(user_uid="boss", fcm_token="shared-token"))
+    db_session.commit()
+
+    response = client.post("/api/users/staff/devices/", json={"fcm_token": "shared-token"})
+
+    assert response.status_code == 200, response.text
+    assert topic_calls == [
+        ("unsubscribe", ["shared-token"], ["admins", "jabatan_kasir"]),
+        ("subscribe", ["shared-token"], ["all_staff", "jabatan_gudang"]),
+    ]